@@ -0,0 +1,125 @@
+﻿from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .audio import WHISPER_RATE
+from .segmenter import MAX_SEGMENT_SEC, OVERLAP_SEC, TRAILING_SILENCE_SEC, Segment
+
+
+# Sous la decoupe de base seulement avec une grande marge (RTF_FAST): chaque appel whisper
+# a un cout fixe, des segments de 2 s en font 1,5x plus pour un texte plus tot.
+MIN_SEGMENT_SEC = 2.0
+MAX_ADAPTIVE_SEGMENT_SEC = 8.0
+MIN_OVERLAP_SEC = 0.20
+MAX_TRAILING_SILENCE_SEC = 0.40
+RTF_HIGH = 1.0  # au-dela: whisper ne suit plus le direct, segments plus longs
+RTF_LOW = 0.5  # en dessous: marge, retour vers la decoupe de base
+RTF_FAST = 0.25  # en dessous: segments plus courts que la decoupe de base, jusqu'a MIN_SEGMENT_SEC
+RTF_SMOOTHING = 0.3
+ADAPT_MIN_SEGMENTS = 3
+ADAPT_INTERVAL_SEC = 5.0
+GROW_FACTOR = 1.25
+SHRINK_FACTOR = 0.9
+BACKLOG_SEGMENTS = 2
+DEADLINE_SEC = 4.0  # age max (fin d'audio -> debut du decodage) avant fusion
+DROP_DEADLINE_SEC = 12.0  # age max d'un segment final avant abandon
+MAX_MERGED_SEC = 16.0
+
+
+@dataclass
+class SegmentPlan:
+    max_segment_sec: float = MAX_SEGMENT_SEC
+    overlap_sec: float = OVERLAP_SEC
+    trailing_silence_sec: float = TRAILING_SILENCE_SEC
+
+    def describe(self) -> str:
+        return (
+            f"max {self.max_segment_sec:.1f}s, overlap {self.overlap_sec:.2f}s, "
+            f"silence de fin {self.trailing_silence_sec:.2f}s"
+        )
+
+
+class SegmentController:
+    """Ajuste la decoupe d'apres le RTF mesure (temps whisper / duree audio).
+
+    RTF lisse au-dessus de ``RTF_HIGH`` ou file de segments qui s'allonge: chaque appel
+    whisper a un cout fixe, des segments plus longs (et moins de recouvrement) en
+    font moins. Sous ``RTF_LOW``: retour progressif vers la decoupe de base (latence),
+    et en dessous jusqu'a ``MIN_SEGMENT_SEC`` si le RTF reste sous ``RTF_FAST``.
+    """
+
+    def __init__(self, plan: SegmentPlan | None = None) -> None:
+        self.plan = plan or SegmentPlan()
+        self.rtf = 0.0
+        self.samples = 0
+        self.adjustments = 0
+        self._last_decision = time.monotonic()
+
+    def observe(self, audio_sec: float, elapsed: float) -> None:
+        if audio_sec <= 0:
+            return
+        rtf = elapsed / audio_sec
+        self.rtf = rtf if self.samples == 0 else self.rtf + RTF_SMOOTHING * (rtf - self.rtf)
+        self.samples += 1
+
+    def decide(self, backlog: int, now: float | None = None) -> SegmentPlan | None:
+        """Nouveau plan si la decoupe doit changer, sinon None (au plus un par ``ADAPT_INTERVAL_SEC``)."""
+        now = time.monotonic() if now is None else now
+        if self.samples < ADAPT_MIN_SEGMENTS or now - self._last_decision < ADAPT_INTERVAL_SEC:
+            return None
+        self._last_decision = now
+        current = self.plan.max_segment_sec
+        if self.rtf > RTF_HIGH or backlog >= BACKLOG_SEGMENTS:
+            target = min(MAX_ADAPTIVE_SEGMENT_SEC, current * GROW_FACTOR)
+        elif self.rtf < RTF_LOW:
+            floor = MIN_SEGMENT_SEC if self.rtf < RTF_FAST else MAX_SEGMENT_SEC
+            target = max(min(floor, current), current * SHRINK_FACTOR)
+        else:
+            return None
+        if abs(target - current) < 0.05:
+            return None
+        overlap = OVERLAP_SEC if self.rtf <= RTF_HIGH else max(MIN_OVERLAP_SEC, OVERLAP_SEC * RTF_HIGH / self.rtf)
+        silence = TRAILING_SILENCE_SEC * max(1.0, target / MAX_SEGMENT_SEC)
+        self.plan = SegmentPlan(
+            max_segment_sec=round(target, 2),
+            overlap_sec=round(min(overlap, target / 4), 2),
+            trailing_silence_sec=round(min(MAX_TRAILING_SILENCE_SEC, silence), 2),
+        )
+        self.adjustments += 1
+        return self.plan
+
+
+@dataclass
+class DeadlineStats:
+    merged: int = 0
+    dropped: int = 0
+    dropped_partials: int = 0
+
+    def describe(self) -> str:
+        return (
+            f"{self.merged} segments fusionnes, {self.dropped} abandonnes, "
+            f"{self.dropped_partials} hypotheses partielles perimees"
+        )
+
+
+def segment_age(segment: Segment, now: float) -> float:
+    return now - segment.captured_at if segment.captured_at is not None else 0.0
+
+
+def merge_segments(first: Segment, second: Segment) -> Segment:
+    """Concatene deux segments finals successifs sur l'axe du tampon: le recouvrement n'est decode
+    qu'une fois, et l'intervalle entre eux (pause, segment abandonne) devient du silence, pour que
+    les horodatages whisper et la duree du segment fusionne restent justes."""
+    gap = int(round((second.start - first.end) * WHISPER_RATE / second.rate))
+    if gap >= 0:
+        first.samples = np.concatenate((first.samples, np.zeros(gap, dtype=first.samples.dtype), second.samples))
+    else:
+        first.samples = np.concatenate((first.samples, second.samples[-gap:]))
+    first.end = second.end
+    first.index = second.index
+    first.forced = second.forced
+    first.captured_at = second.captured_at
+    return first
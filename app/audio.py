@@ -0,0 +1,146 @@
+﻿from __future__ import annotations
+
+import io
+import math
+import wave
+from functools import lru_cache
+
+import numpy as np
+
+
+WHISPER_RATE = 16000
+ZERO_CROSSINGS = 16
+ROLLOFF = 0.945
+KAISER_BETA = 8.0
+BLOCK_OUTPUT_SAMPLES = 8192
+
+
+def pcm16_to_float(data: bytes | np.ndarray, channels: int) -> np.ndarray:
+    """Convertit du PCM int16 entrelace en float32 mono dans [-1, 1]."""
+    samples = np.frombuffer(data, dtype=np.int16) if isinstance(data, (bytes, bytearray, memoryview)) else data
+    samples = samples.astype(np.float32) / 32768.0
+    if channels > 1:
+        usable = samples.size - samples.size % channels
+        samples = samples[:usable].reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return samples
+
+
+@lru_cache(maxsize=16)
+def _polyphase_table(up: int, down: int) -> tuple[np.ndarray, int]:
+    cutoff = min(1.0, up / down) * ROLLOFF
+    half_width = int(math.ceil(ZERO_CROSSINGS / cutoff))
+    offsets = np.arange(-half_width + 1, half_width + 1, dtype=np.float64)
+    phases = np.arange(up, dtype=np.float64)[:, None] / up
+    tau = phases - offsets[None, :]
+    window = np.kaiser(2 * half_width + 1, KAISER_BETA)
+    window_pos = np.clip(tau / half_width, -1.0, 1.0)
+    window_values = np.interp(window_pos, np.linspace(-1.0, 1.0, window.size), window)
+    table = cutoff * np.sinc(cutoff * tau) * window_values
+    return table.astype(np.float32), half_width
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int = WHISPER_RATE) -> np.ndarray:
+    """Reechantillonnage polyphase (sinc fenetre Kaiser) d'un signal float32 mono."""
+    if src_rate == dst_rate or samples.size == 0:
+        return samples.astype(np.float32, copy=False)
+
+    g = math.gcd(src_rate, dst_rate)
+    up, down = dst_rate // g, src_rate // g
+    table, half_width = _polyphase_table(up, down)
+
+    n_out = (samples.size * up) // down
+    padded = np.concatenate(
+        (np.zeros(half_width, dtype=np.float32), samples.astype(np.float32, copy=False), np.zeros(half_width + 1, dtype=np.float32))
+    )
+    taps = np.arange(-half_width + 1, half_width + 1) + half_width
+    out = np.empty(n_out, dtype=np.float32)
+    for start in range(0, n_out, BLOCK_OUTPUT_SAMPLES):
+        n = np.arange(start, min(n_out, start + BLOCK_OUTPUT_SAMPLES), dtype=np.int64)
+        position = n * down
+        base = position // up
+        phase = position % up
+        gathered = padded[base[:, None] + taps[None, :]]
+        out[start : start + n.size] = np.einsum("ij,ij->i", gathered, table[phase])
+    return out
+
+
+class Resampler:
+    def __init__(self, src_rate: int, channels: int, dst_rate: int = WHISPER_RATE) -> None:
+        self.src_rate = src_rate
+        self.channels = channels
+        self.dst_rate = dst_rate
+
+    @property
+    def passthrough(self) -> bool:
+        return self.src_rate == self.dst_rate and self.channels == 1
+
+    def process(self, data: bytes | np.ndarray) -> np.ndarray:
+        return resample(pcm16_to_float(data, self.channels), self.src_rate, self.dst_rate)
+
+
+class StreamResampler(Resampler):
+    """Meme filtre que ``resample``, applique a un flux decoupe en blocs quelconques.
+
+    Les derniers echantillons d'entree sont gardes d'un bloc a l'autre: le resultat
+    concatene (``flush`` compris) est celui d'un seul appel sur tout le signal.
+    """
+
+    def __init__(self, src_rate: int, channels: int, dst_rate: int = WHISPER_RATE) -> None:
+        super().__init__(src_rate, channels, dst_rate)
+        g = math.gcd(src_rate, dst_rate)
+        self.up, self.down = dst_rate // g, src_rate // g
+        self.half_width = _polyphase_table(self.up, self.down)[1] if src_rate != dst_rate else 0
+        self._pending = np.zeros(self.half_width, dtype=np.float32)
+        self._first = -self.half_width  # indice d'entree de _pending[0]
+        self._received = 0
+        self._next = 0  # prochain indice de sortie
+
+    def process(self, data: bytes | np.ndarray) -> np.ndarray:
+        samples = pcm16_to_float(data, self.channels)
+        if self.src_rate == self.dst_rate:
+            return samples
+        self._pending = np.concatenate((self._pending, samples))
+        self._received += samples.size
+        # Sortie n calculable si toutes ses entrees (jusqu'a n * down // up + half_width) sont recues.
+        return self._emit(((self._received - self.half_width) * self.up - 1) // self.down + 1)
+
+    def flush(self) -> np.ndarray:
+        """Fin du flux: complete avec des zeros, comme ``resample`` aux bords."""
+        if self.src_rate == self.dst_rate:
+            return np.zeros(0, dtype=np.float32)
+        self._pending = np.concatenate((self._pending, np.zeros(self.half_width + 1, dtype=np.float32)))
+        return self._emit(self._received * self.up // self.down)
+
+    def _emit(self, end: int) -> np.ndarray:
+        if end <= self._next:
+            return np.zeros(0, dtype=np.float32)
+        table, half_width = _polyphase_table(self.up, self.down)
+        taps = np.arange(2 * half_width)
+        out = np.empty(end - self._next, dtype=np.float32)
+        for start in range(self._next, end, BLOCK_OUTPUT_SAMPLES):
+            n = np.arange(start, min(end, start + BLOCK_OUTPUT_SAMPLES), dtype=np.int64)
+            position = n * self.down
+            base = position // self.up - half_width + 1 - self._first
+            gathered = self._pending[base[:, None] + taps[None, :]]
+            out[start - self._next : start - self._next + n.size] = np.einsum(
+                "ij,ij->i", gathered, table[position % self.up]
+            )
+        self._next = end
+        keep = end * self.down // self.up - half_width + 1 - self._first
+        self._pending = self._pending[keep:]
+        self._first += keep
+        return out
+
+
+def float_to_pcm16(samples: np.ndarray) -> np.ndarray:
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+
+def wav_bytes(samples: np.ndarray, rate: int = WHISPER_RATE) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(float_to_pcm16(samples).tobytes())
+    return buffer.getvalue()
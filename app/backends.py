@@ -0,0 +1,371 @@
+﻿from __future__ import annotations
+
+import json
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .audio import WHISPER_RATE, wav_bytes
+from .logsink import LOG_BACKUPS, MAX_LOG_BYTES, rotate_files
+from .merge import Word, group_words
+
+
+WARMUP_SEC = 0.5
+SERVER_OUTPUT_TAIL_LINES = 20
+
+
+@dataclass
+class WhisperResult:
+    text: str
+    ok: bool
+    stdout: str = ""
+    stderr: str = ""
+    returncode: int = 0
+    words: list[Word] | None = None
+    timed_out: bool = False
+
+
+class WhisperBackend:
+    name = "base"
+    timeout = 30.0
+
+    def start(self) -> None:
+        pass
+
+    def transcribe(self, samples: np.ndarray) -> WhisperResult:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def is_alive(self) -> bool:
+        return True
+
+    def describe(self) -> str:
+        return self.name
+
+
+class CliWhisperBackend(WhisperBackend):
+    name = "cli"
+
+    def __init__(
+        self,
+        cli_path: Path,
+        model_path: Path,
+        use_cuda: bool,
+        work_file: Path,
+        timeout: float = 30.0,
+        threads: int = 0,
+    ) -> None:
+        self.cli_path = cli_path
+        self.model_path = model_path
+        self.use_cuda = use_cuda
+        self.work_file = work_file
+        self.timeout = timeout
+        self.threads = threads
+
+    def start(self) -> None:
+        if not self.cli_path.exists():
+            raise RuntimeError(f"whisper-cli introuvable: {self.cli_path}")
+
+    def build_command(self, wav_path: Path) -> list[str]:
+        command = [
+            str(self.cli_path),
+            "-m",
+            str(self.model_path),
+            "-f",
+            str(wav_path),
+            "-l",
+            "en",
+            "-nt",
+            "-ojf",
+            "-of",
+            str(self.json_base),
+        ]
+        if self.threads > 0:
+            command += ["-t", str(self.threads)]
+        if not self.use_cuda:
+            command.append("-ng")
+        return command
+
+    @property
+    def json_base(self) -> Path:
+        return self.work_file.with_suffix("")
+
+    def _read_words(self) -> list[Word] | None:
+        json_file = self.json_base.with_suffix(".json")
+        try:
+            data = json.loads(json_file.read_text(encoding="utf-8", errors="replace"))
+            json_file.unlink()
+        except (OSError, ValueError):
+            return None
+        pieces = []
+        for segment in data.get("transcription", []):
+            for token in segment.get("tokens", []):
+                offsets = token.get("offsets", {})
+                pieces.append(
+                    (str(token.get("text", "")), offsets.get("from", 0) / 1000.0, offsets.get("to", 0) / 1000.0)
+                )
+        return group_words(pieces) or None
+
+    def transcribe(self, samples: np.ndarray) -> WhisperResult:
+        self.work_file.write_bytes(wav_bytes(samples))
+        try:
+            result = subprocess.run(
+                self.build_command(self.work_file),
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return _timeout_result(self.timeout)
+        return WhisperResult(
+            text=" ".join(result.stdout.split()),
+            ok=result.returncode == 0,
+            stdout=result.stdout,
+            stderr=result.stderr,
+            returncode=result.returncode,
+            words=self._read_words() if result.returncode == 0 else None,
+        )
+
+    def describe(self) -> str:
+        return f"whisper-cli ({self.cli_path})"
+
+
+class ServerWhisperBackend(WhisperBackend):
+    """Garde un whisper-server resident: le modele est charge une seule fois.
+
+    Si ``server_path`` vaut None, le backend se connecte a un serveur deja lance
+    sur ``host:port`` (serveur externe ou faux serveur local).
+    """
+
+    name = "server"
+
+    def __init__(
+        self,
+        server_path: Path | None,
+        model_path: Path,
+        use_cuda: bool,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        startup_timeout: float = 60.0,
+        timeout: float = 30.0,
+        log_path: Path | None = None,
+        threads: int = 0,
+        log_max_bytes: int = MAX_LOG_BYTES,
+    ) -> None:
+        self.server_path = server_path
+        self.model_path = model_path
+        self.use_cuda = use_cuda
+        self.host = host
+        self.port = port
+        self.startup_timeout = startup_timeout
+        self.timeout = timeout
+        self.log_path = log_path
+        self.log_max_bytes = log_max_bytes
+        self.threads = threads
+        self.process: subprocess.Popen | None = None
+        self._output_tail: deque[str] = deque(maxlen=SERVER_OUTPUT_TAIL_LINES)
+        self._output_thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def build_command(self) -> list[str]:
+        command = [
+            str(self.server_path),
+            "-m",
+            str(self.model_path),
+            "--host",
+            self.host,
+            "--port",
+            str(self.port),
+            "-l",
+            "en",
+            "-nt",
+        ]
+        if self.threads > 0:
+            command += ["-t", str(self.threads)]
+        if not self.use_cuda:
+            command.append("-ng")
+        return command
+
+    def start(self) -> None:
+        if self.server_path is not None:
+            if not self.server_path.exists():
+                raise RuntimeError(f"whisper-server introuvable: {self.server_path}")
+            if self.port == 0:
+                self.port = _free_port(self.host)
+            self.process = subprocess.Popen(
+                self.build_command(),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+            self._output_tail.clear()
+            self._output_thread = threading.Thread(
+                target=self._drain_output, args=(self.process.stdout,), name="whisper-server-log", daemon=True
+            )
+            self._output_thread.start()
+        try:
+            self._wait_until_listening()
+            warmup = self.transcribe(np.zeros(int(WHISPER_RATE * WARMUP_SEC), dtype=np.float32))
+            if not warmup.ok:
+                raise RuntimeError(f"Echec warm-up whisper-server: {warmup.stderr}")
+        except Exception:
+            self.close()
+            raise
+
+    def _wait_until_listening(self) -> None:
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process is not None and self.process.poll() is not None:
+                if self._output_thread is not None:
+                    self._output_thread.join(timeout=1.0)
+                tail = "\n".join(self._output_tail)
+                raise RuntimeError(f"whisper-server s'est arrete (code {self.process.returncode})\n{tail}".rstrip())
+            try:
+                with socket.create_connection((self.host, self.port), timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError(f"whisper-server ne repond pas sur {self.url}")
+
+    def _drain_output(self, stream) -> None:
+        """Sortie du serveur (un bandeau par requete) vers un journal plafonne, avec rotation.
+
+        Le tube est lu jusqu'au bout meme si le journal ne peut pas etre ecrit: sinon le serveur bloque.
+        Les dernieres lignes restent en memoire pour le message d'echec au demarrage.
+        """
+        log = None
+        try:
+            if self.log_path is not None:
+                try:
+                    if self.log_path.exists() and self.log_path.stat().st_size >= self.log_max_bytes:
+                        rotate_files(self.log_path, LOG_BACKUPS)
+                    log = open(self.log_path, "ab")
+                except OSError:
+                    log = None
+            for line in iter(stream.readline, b""):
+                self._output_tail.append(line.decode("utf-8", errors="replace").rstrip())
+                if log is None:
+                    continue
+                try:
+                    log.write(line)
+                    log.flush()
+                    if log.tell() >= self.log_max_bytes:
+                        log.close()
+                        rotate_files(self.log_path, LOG_BACKUPS)
+                        log = open(self.log_path, "ab")
+                except OSError:
+                    log.close()
+                    log = None
+        finally:
+            stream.close()
+            if log is not None:
+                log.close()
+
+    def transcribe(self, samples: np.ndarray) -> WhisperResult:
+        fields = {"temperature": "0.0", "response_format": "verbose_json"}
+        body, content_type = _encode_multipart(fields, "file", "audio.wav", wav_bytes(samples))
+        request = urllib.request.Request(
+            f"{self.url}/inference",
+            data=body,
+            headers={"Content-Type": content_type},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = response.read().decode("utf-8", errors="replace")
+        except urllib.error.HTTPError as exc:
+            detail = exc.read().decode("utf-8", errors="replace")
+            return WhisperResult(text="", ok=False, stderr=detail, returncode=exc.code)
+        except urllib.error.URLError as exc:
+            if isinstance(exc.reason, TimeoutError):
+                return _timeout_result(self.timeout)
+            return WhisperResult(text="", ok=False, stderr=str(exc), returncode=-1)
+        except TimeoutError:
+            # socket.timeout pendant la lecture de la reponse (alias de TimeoutError depuis 3.10).
+            return _timeout_result(self.timeout)
+        except OSError as exc:
+            return WhisperResult(text="", ok=False, stderr=str(exc), returncode=-1)
+
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return WhisperResult(text="", ok=False, stdout=payload, stderr="Reponse JSON invalide", returncode=-1)
+        if "error" in data:
+            return WhisperResult(text="", ok=False, stdout=payload, stderr=str(data["error"]), returncode=-1)
+        pieces = []
+        for segment in data.get("segments", []):
+            for word in segment.get("words", []):
+                pieces.append((str(word.get("word", "")), float(word.get("start", 0.0)), float(word.get("end", 0.0))))
+        return WhisperResult(
+            text=" ".join(str(data.get("text", "")).split()),
+            ok=True,
+            stdout=payload,
+            words=group_words(pieces) or None,
+        )
+
+    def close(self) -> None:
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+            self.process = None
+        if self._output_thread is not None:
+            self._output_thread.join(timeout=5)
+            self._output_thread = None
+
+    def is_alive(self) -> bool:
+        if self.server_path is None:
+            return True
+        return self.process is not None and self.process.poll() is None
+
+    def describe(self) -> str:
+        if self.server_path is None:
+            return f"whisper-server externe ({self.url})"
+        return f"whisper-server ({self.server_path}) sur {self.url}"
+
+
+def _timeout_result(timeout: float) -> WhisperResult:
+    return WhisperResult(text="", ok=False, stderr=f"timeout apres {timeout:.1f} s", returncode=-1, timed_out=True)
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return int(sock.getsockname()[1])
+
+
+def _encode_multipart(fields: dict[str, str], file_field: str, filename: str, data: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts: list[bytes] = []
+    for key, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    parts.append(
+        (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            "Content-Type: audio/wav\r\n\r\n"
+        ).encode("utf-8")
+    )
+    parts.append(data)
+    parts.append(f"\r\n--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
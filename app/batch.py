@@ -0,0 +1,457 @@
+﻿"""Transcription hors ligne d'un enregistrement: ``python -m app.batch fichier.wav``."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from multiprocessing.util import Finalize
+from pathlib import Path
+
+import numpy as np
+
+from .audio import WHISPER_RATE, StreamResampler, float_to_pcm16
+from .backends import WhisperBackend
+from .cli import resolve_model_path
+from .config import load_config, tuning_for
+from .core import RunOptions, start_backend
+from .merge import Word
+from .ringbuffer import PcmRingBuffer
+from .segmenter import Segmenter
+from .sources import CHUNK, FileSource
+from .translation import TranslationService
+from .vad import create_vad
+
+
+TARGET_CHUNK_SEC = 28.0  # fenetre native de whisper: 30 s
+CUT_SEARCH_SEC = 4.0
+CUT_PAUSE_SEC = 1.5  # silence qui ferme un morceau avant TARGET_CHUNK_SEC
+READ_BLOCK_SEC = 60
+WHISPER_THREADS_PER_DECODE = 4  # defaut de whisper.cpp (-t)
+CHUNK_TIMEOUT_MIN_SEC = 30.0
+CHUNK_TIMEOUT_MARGIN = 3.0  # delai d'un morceau: duree x RTF mesure x marge, double a chaque essai
+CHUNK_RETRIES = 1
+CUE_MAX_SEC = 6.0
+CUE_MAX_CHARS = 84
+CUE_GAP_SEC = 0.8
+CUE_MIN_SEC = 1.0
+FORMATS = ("srt", "vtt", "json")
+
+
+@dataclass
+class Chunk:
+    index: int
+    start: int
+    end: int
+
+    @property
+    def start_sec(self) -> float:
+        return self.start / WHISPER_RATE
+
+    @property
+    def end_sec(self) -> float:
+        return self.end / WHISPER_RATE
+
+
+@dataclass
+class ChunkResult:
+    index: int
+    ok: bool
+    text: str = ""
+    words: list[Word] = field(default_factory=list)
+    error: str = ""
+    elapsed: float = 0.0
+    attempts: int = 1
+
+
+@dataclass
+class Cue:
+    start: float
+    end: float
+    text: str
+    translation: str = ""
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 1) // WHISPER_THREADS_PER_DECODE)
+
+
+def available_cpus() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_sets(slots: int, threads: int) -> list[tuple[int, ...]] | None:
+    """Coeurs disjoints par decodage (``threads`` chacun, ou parts egales); None hors Linux."""
+    if not hasattr(os, "sched_setaffinity"):
+        return None
+    cpus = available_cpus()
+    size = threads if threads > 0 else len(cpus) // max(1, slots)
+    size = max(1, min(size, len(cpus) // max(1, slots)))
+    return [tuple(cpus[i * size : (i + 1) * size]) for i in range(slots)]
+
+
+def pool_settings(
+    project_root: Path,
+    model_path: Path,
+    workers: int | None,
+    threads: int | None,
+) -> tuple[int, int, bool]:
+    """(decodages simultanes, threads par decodage, epinglage): options explicites,
+    sinon reglage mesure par ``app.tuning`` pour ce modele, sinon defauts."""
+    tuning = tuning_for(load_config(project_root), model_path.name)
+    if tuning is None:
+        return workers or default_workers(), threads or 0, False
+    pin = tuning.pin and workers is None and threads is None
+    return workers or tuning.slots, threads or tuning.threads, pin
+
+
+def load_audio(path: Path) -> np.ndarray:
+    """Fichier WAV/FLAC -> PCM16 mono 16 kHz, lu par blocs de 60 s dans un seul reechantillonneur."""
+    source = FileSource(path, realtime=False)
+    source.open()
+    try:
+        resampler = StreamResampler(source.rate, source.channels)
+        blocks = source.blocks(source.rate * READ_BLOCK_SEC)
+        parts = [float_to_pcm16(resampler.process(block.reshape(-1))) for block in blocks]
+        parts.append(float_to_pcm16(resampler.flush()))
+    finally:
+        source.close()
+    return np.concatenate(parts)
+
+
+def plan_chunks(pcm: np.ndarray, vad_name: str = "energy", target_sec: float = TARGET_CHUNK_SEC) -> list[Chunk]:
+    """Decoupe du direct (``Segmenter`` + VAD) avec des longueurs de batch: morceaux d'au plus
+    ``target_sec``, fermes par ``CUT_PAUSE_SEC`` de silence ou coupes au point le moins energetique.
+
+    Le silence et les morceaux rejetes par le VAD ne sont pas decodes.
+    """
+    ring = PcmRingBuffer(int(WHISPER_RATE * (target_sec + CUT_SEARCH_SEC)), 1)
+    segmenter = Segmenter(ring, WHISPER_RATE, CHUNK, create_vad(vad_name, WHISPER_RATE), CUT_SEARCH_SEC)
+    segmenter.configure(target_sec, 0.0, CUT_PAUSE_SEC)
+    segments = []
+    for start in range(0, pcm.size, CHUNK):
+        block = pcm[start : start + CHUNK]
+        ring.write(np.pad(block, (0, CHUNK - block.size)))
+        segments.append(segmenter.feed(start, start + CHUNK))
+    segments.append(segmenter.finish())
+    bounds = [(s.start, min(s.end, pcm.size)) for s in segments if s is not None]
+    return [Chunk(i, start, end) for i, (start, end) in enumerate(bounds)]
+
+
+_backend: WhisperBackend | None = None
+_rtf = 1.0  # dernier RTF mesure par ce worker
+
+
+def init_worker(
+    project_root: Path,
+    options: RunOptions,
+    sets: list[tuple[int, ...]] | None = None,
+    slot=None,
+) -> None:
+    global _backend
+    if sets:
+        # Le backend (whisper-server ou whisper-cli) herite des coeurs du process worker.
+        with slot.get_lock():
+            index = slot.value
+            slot.value += 1
+        os.sched_setaffinity(0, sets[index % len(sets)])
+    work_dir = tempfile.mkdtemp(prefix="voxbridge-batch-")
+    # Les workers d'un ProcessPoolExecutor sortent via os._exit: atexit ne suffirait pas.
+    # Priorite plus basse: le dossier est supprime apres l'arret du backend.
+    Finalize(None, shutil.rmtree, args=(work_dir,), kwargs={"ignore_errors": True}, exitpriority=5)
+    errors: list[str] = []
+    work_file = Path(work_dir) / "chunk_16k.wav"
+    _backend = start_backend(project_root, options, lambda kind, msg: errors.append(msg), work_file)
+    if _backend is None:
+        raise RuntimeError(errors[-1] if errors else "backend whisper indisponible")
+    Finalize(_backend, _backend.close, exitpriority=10)
+
+
+def chunk_timeout(duration_sec: float, rtf: float, attempt: int = 0) -> float:
+    """Delai whisper d'un morceau: un modele plus lent que le temps reel ne doit pas echouer a chaque morceau."""
+    return max(CHUNK_TIMEOUT_MIN_SEC, duration_sec * max(rtf, 1.0) * CHUNK_TIMEOUT_MARGIN) * 2**attempt
+
+
+def transcribe_chunk(index: int, pcm: np.ndarray, attempt: int = 0) -> ChunkResult:
+    global _rtf
+    duration = pcm.size / WHISPER_RATE
+    _backend.timeout = chunk_timeout(duration, _rtf, attempt)
+    started = time.perf_counter()
+    try:
+        result = _backend.transcribe(pcm.astype(np.float32) / 32768.0)
+    except Exception as exc:
+        return ChunkResult(index, False, error=str(exc), elapsed=time.perf_counter() - started, attempts=attempt + 1)
+    elapsed = time.perf_counter() - started
+    if not result.ok:
+        return ChunkResult(index, False, error=result.stderr.strip(), elapsed=elapsed, attempts=attempt + 1)
+    _rtf = elapsed / max(duration, 1e-6)
+    return ChunkResult(index, True, result.text, result.words or [], elapsed=elapsed, attempts=attempt + 1)
+
+
+def chunk_words(chunk: Chunk, result: ChunkResult) -> list[Word]:
+    """Mots en temps absolu; sans horodatage whisper, repartis uniformement sur le morceau."""
+    duration = chunk.end_sec - chunk.start_sec
+    if result.words:
+        return [Word(w.text, chunk.start_sec + w.start, chunk.start_sec + min(w.end, duration)) for w in result.words]
+    tokens = result.text.split()
+    if not tokens:
+        return []
+    step = duration / len(tokens)
+    return [Word(t, chunk.start_sec + i * step, chunk.start_sec + (i + 1) * step) for i, t in enumerate(tokens)]
+
+
+def build_cues(words: list[Word]) -> list[Cue]:
+    cues: list[Cue] = []
+    current: list[Word] = []
+
+    def close() -> None:
+        if current:
+            cues.append(Cue(current[0].start, max(current[-1].end, current[0].start), " ".join(w.text for w in current)))
+            current.clear()
+
+    for word in words:
+        if current:
+            duration = word.end - current[0].start
+            length = sum(len(w.text) + 1 for w in current) + len(word.text)
+            if duration > CUE_MAX_SEC or length > CUE_MAX_CHARS or word.start - current[-1].end > CUE_GAP_SEC:
+                close()
+        current.append(word)
+        if word.text.endswith((".", "?", "!")) and current[-1].end - current[0].start >= CUE_MIN_SEC:
+            close()
+    close()
+    return cues
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    millis = int(round(max(0.0, seconds) * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def _cue_lines(cue: Cue, bilingual: bool) -> str:
+    if not cue.translation:
+        return cue.text
+    return f"{cue.text}\n{cue.translation}" if bilingual else cue.translation
+
+
+def render_srt(cues: list[Cue], bilingual: bool = False) -> str:
+    blocks = [
+        f"{i}\n{_timestamp(c.start, ',')} --> {_timestamp(c.end, ',')}\n{_cue_lines(c, bilingual)}\n"
+        for i, c in enumerate(cues, 1)
+    ]
+    return "\n".join(blocks)
+
+
+def render_vtt(cues: list[Cue], bilingual: bool = False) -> str:
+    blocks = [f"{_timestamp(c.start, '.')} --> {_timestamp(c.end, '.')}\n{_cue_lines(c, bilingual)}\n" for c in cues]
+    return "WEBVTT\n\n" + "\n".join(blocks)
+
+
+def render_json(cues: list[Cue], meta: dict) -> str:
+    return json.dumps({**meta, "cues": [asdict(c) for c in cues]}, indent=2, ensure_ascii=False)
+
+
+def create_pool(project_root: Path, options: RunOptions, workers: int, pin: bool = False) -> ProcessPoolExecutor:
+    context = mp.get_context("spawn")
+    sets = cpu_sets(workers, options.threads) if pin else None
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(project_root, options, sets, context.Value("i", 0) if sets else None),
+    )
+
+
+def write_outputs(base: Path, formats: list[str], cues: list[Cue], meta: dict, bilingual: bool) -> list[Path]:
+    renderers = {
+        "srt": lambda: render_srt(cues, bilingual),
+        "vtt": lambda: render_vtt(cues, bilingual),
+        "json": lambda: render_json(cues, meta),
+    }
+    paths = []
+    for fmt in formats:
+        path = base.with_name(base.name + f".{fmt}")
+        path.write_text(renderers[fmt](), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def transcribe_chunks(
+    project_root: Path,
+    options: RunOptions,
+    pcm: np.ndarray,
+    chunks: list[Chunk],
+    workers: int,
+    progress=None,
+    pin: bool = False,
+) -> list[ChunkResult]:
+    """Un backend whisper par process (modele charge une fois par worker), resultats remis dans l'ordre.
+
+    Un morceau en echec est soumis de nouveau (``CHUNK_RETRIES`` fois, delai double).
+    """
+    results: list[ChunkResult | None] = [None] * len(chunks)
+    with create_pool(project_root, options, workers, pin) as pool:
+        pending = {pool.submit(transcribe_chunk, c.index, pcm[c.start : c.end]): c for c in chunks}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = pending.pop(future)
+                result = future.result()
+                if not result.ok and result.attempts <= CHUNK_RETRIES:
+                    retry = pool.submit(transcribe_chunk, chunk.index, pcm[chunk.start : chunk.end], result.attempts)
+                    pending[retry] = chunk
+                    continue
+                results[result.index] = result
+                if progress is not None:
+                    progress(result, chunk)
+    return results
+
+
+def translate_cues(cues: list[Cue], mode: str, workers: int) -> None:
+    service = TranslationService(mode, workers)
+    service.start()
+    try:
+        futures = [service.submit(c.text) for c in cues]
+        for cue, future in zip(cues, futures):
+            cue.translation = future.result()
+    finally:
+        service.close()
+
+
+def parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="VoxBridge batch: transcription d'un fichier en morceaux paralleles")
+    parser.add_argument("input", type=Path, help="Fichier WAV (PCM16) ou FLAC")
+    parser.add_argument("--model", default="", help="Nom du modele dans whisper.cpp/models")
+    parser.add_argument("--backend", choices=["server", "cli"], default="server", help="Backend whisper")
+    parser.add_argument("--no-gpu", action="store_true", help="Desactive CUDA")
+    parser.add_argument("--vad", choices=["energy", "peak"], default="energy", help="Detection de parole")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help=f"Decodages simultanes (defaut: reglage app.tuning, sinon coeurs / {WHISPER_THREADS_PER_DECODE})",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Threads whisper par decodage (defaut: reglage app.tuning, sinon defaut de whisper.cpp)",
+    )
+    parser.add_argument("--chunk-sec", type=float, default=TARGET_CHUNK_SEC, help="Duree maximale d'un morceau")
+    parser.add_argument("--formats", default="srt,vtt,json", help="Sorties parmi srt, vtt, json")
+    parser.add_argument("--output", type=Path, default=None, help="Chemin de sortie sans extension")
+    parser.add_argument("--translate", action="store_true", help="Traduit les sous-titres EN -> FR")
+    parser.add_argument("--bilingual", action="store_true", help="SRT/VTT: texte source + traduction")
+    parser.add_argument("--translation", choices=["process", "thread"], default="process")
+    parser.add_argument("--translation-workers", type=int, default=1)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None, project_root: Path | None = None) -> int:
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    args = parse_args(argv)
+    project_root = project_root or Path(__file__).resolve().parents[1]
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        print(f"Erreur: format inconnu {', '.join(unknown)} (attendus: {', '.join(FORMATS)})")
+        return 1
+    model_path = resolve_model_path(project_root, args.model)
+    if model_path is None:
+        print("Erreur: aucun modele Whisper trouve dans whisper.cpp/models/")
+        return 1
+
+    started = time.perf_counter()
+    try:
+        pcm = load_audio(args.input)
+    except (RuntimeError, OSError, EOFError, ValueError) as exc:
+        print(f"Erreur audio: {exc}")
+        return 1
+    audio_sec = pcm.size / WHISPER_RATE
+    chunks = plan_chunks(pcm, args.vad, args.chunk_sec)
+    workers, threads, pin = pool_settings(project_root, model_path, args.workers, args.threads)
+    workers = max(1, min(workers, len(chunks) or 1))
+    print(
+        f"{args.input.name}: {audio_sec:.1f}s, {len(chunks)} morceaux avec parole "
+        f"({sum(c.end - c.start for c in chunks) / WHISPER_RATE:.1f}s a decoder), {workers} workers"
+        + (f" x {threads} threads" if threads else "")
+        + (" (coeurs epingles)" if pin else "")
+    )
+
+    options = RunOptions(
+        mode="transcription",
+        source="file",
+        device_index=0,
+        model_path=model_path,
+        use_cuda=not args.no_gpu,
+        backend=args.backend,
+        vad=args.vad,
+        threads=threads,
+    )
+    done = 0
+
+    def progress(result: ChunkResult, chunk: Chunk) -> None:
+        nonlocal done
+        done += 1
+        rtf = result.elapsed / max(chunk.end_sec - chunk.start_sec, 1e-6)
+        state = "ok" if result.ok else f"echec apres {result.attempts} essais: {result.error}"
+        print(f"[{done}/{len(chunks)}] morceau {chunk.index} @ {_timestamp(chunk.start_sec, '.')} RTF {rtf:.2f} {state}")
+
+    decode_started = time.perf_counter()
+    try:
+        results = transcribe_chunks(project_root, options, pcm, chunks, workers, progress, pin) if chunks else []
+    except BrokenProcessPool as exc:
+        print(f"Erreur: un worker whisper s'est arrete ({exc})")
+        return 1
+    except RuntimeError as exc:
+        print(f"Erreur backend: {exc}")
+        return 1
+    decode_sec = time.perf_counter() - decode_started
+
+    words: list[Word] = []
+    for chunk, result in zip(chunks, results):
+        if result.ok:
+            words.extend(chunk_words(chunk, result))
+    cues = build_cues(words)
+    if args.translate and cues:
+        try:
+            translate_cues(cues, args.translation, args.translation_workers)
+        except Exception as exc:
+            print(f"Erreur traduction: {exc}")
+            return 1
+
+    base = args.output or args.input.with_suffix("")
+    failed = [r.index for r in results if not r.ok]
+    meta = {
+        "source": str(args.input),
+        "model": model_path.name,
+        "audio_sec": round(audio_sec, 3),
+        "chunks": [{"index": c.index, "start": c.start_sec, "end": c.end_sec} for c in chunks],
+        "failed_chunks": failed,
+    }
+    for path in write_outputs(base, formats, cues, meta, args.bilingual):
+        print(f"Ecrit: {path}")
+
+    total = time.perf_counter() - started
+    print(
+        f"{len(cues)} sous-titres, {audio_sec:.1f}s d'audio en {total:.1f}s "
+        f"(decodage {decode_sec:.1f}s, {audio_sec / max(decode_sec, 1e-6):.1f}x temps reel)"
+        + (f", {len(failed)} morceaux en echec" if failed else "")
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
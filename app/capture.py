@@ -0,0 +1,129 @@
+﻿from __future__ import annotations
+
+import multiprocessing as mp
+import queue
+
+from .ringbuffer import PcmRingBuffer
+
+
+CAPTURE_START_TIMEOUT_SEC = 15.0
+
+
+def make_ring_callback(ring: PcmRingBuffer, continue_flag: int, overflow_flag: int):
+    def callback(in_data, frame_count, time_info, status):
+        if status & overflow_flag:
+            ring.add_overflow()
+        ring.write(in_data)
+        return (None, continue_flag)
+
+    return callback
+
+
+def _capture_main(
+    shm_name: str,
+    capacity: int,
+    channels: int,
+    rate: int,
+    device_index: int,
+    loopback: bool,
+    chunk: int,
+    stop_event,
+    status_queue,
+) -> None:
+    ring = PcmRingBuffer.attach(shm_name, capacity, channels)
+    if loopback:
+        import pyaudiowpatch as pa_lib  # type: ignore
+    else:
+        import pyaudio as pa_lib
+
+    p = pa_lib.PyAudio()
+    try:
+        stream = p.open(
+            format=pa_lib.paInt16,
+            channels=channels,
+            rate=rate,
+            input=True,
+            input_device_index=device_index,
+            frames_per_buffer=chunk,
+            stream_callback=make_ring_callback(ring, pa_lib.paContinue, getattr(pa_lib, "paInputOverflow", 0x2)),
+        )
+    except Exception as exc:
+        status_queue.put(str(exc) or exc.__class__.__name__)
+        p.terminate()
+        ring.close()
+        return
+
+    status_queue.put("")
+    try:
+        while not stop_event.wait(0.2):
+            if not stream.is_active():
+                break
+    finally:
+        try:
+            stream.stop_stream()
+            stream.close()
+        finally:
+            p.terminate()
+            ring.close()
+
+
+class CaptureProcess:
+    """Capture PyAudio dans un process dedie, ecrivant dans un PcmRingBuffer partage.
+
+    Expose ``is_active``/``stop_stream``/``close`` comme un flux PyAudio.
+    """
+
+    def __init__(
+        self,
+        ring: PcmRingBuffer,
+        rate: int,
+        device_index: int,
+        loopback: bool,
+        chunk: int,
+    ) -> None:
+        if ring.name is None:
+            raise ValueError("La capture en process separe demande un tampon en memoire partagee")
+        ctx = mp.get_context("spawn")
+        self._stop_event = ctx.Event()
+        self._status_queue = ctx.Queue()
+        self.process = ctx.Process(
+            target=_capture_main,
+            args=(
+                ring.name,
+                ring.capacity,
+                ring.channels,
+                rate,
+                device_index,
+                loopback,
+                chunk,
+                self._stop_event,
+                self._status_queue,
+            ),
+            name="voxbridge-capture",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self.process.start()
+        try:
+            error = self._status_queue.get(timeout=CAPTURE_START_TIMEOUT_SEC)
+        except queue.Empty:
+            error = "pas de reponse du process de capture"
+        if error:
+            self.close()
+            raise RuntimeError(error)
+
+    def is_active(self) -> bool:
+        return self.process.is_alive()
+
+    def stop_stream(self) -> None:
+        self._stop_event.set()
+
+    def close(self) -> None:
+        self._stop_event.set()
+        if self.process.pid is None:
+            return
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
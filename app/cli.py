@@ -0,0 +1,243 @@
+﻿from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import sys
+import time
+from pathlib import Path
+
+from .client import RemoteWorker, connect_daemon
+from .config import live_threads, load_config
+
+DEFAULT_DEVICE_INDEX = 2
+DEFAULT_MODELS = ("ggml-tiny.en.bin", "ggml-tiny.en-q5_1.bin")
+
+
+def parse_args(mode: str) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f"VoxBridge CLI ({mode})")
+    parser.add_argument("--minimal", action="store_true", help="Affiche uniquement le texte")
+    parser.add_argument("--loopback", action="store_true", help="Capture WASAPI loopback (Windows)")
+    parser.add_argument(
+        "--source",
+        choices=["device", "loopback", "file", "stdin", "monitor"],
+        default="",
+        help="Source audio (defaut: device, ou loopback avec --loopback)",
+    )
+    parser.add_argument(
+        "--input",
+        default="",
+        help="file: WAV/FLAC; stdin: pipe nomme (defaut stdin); monitor: source PulseAudio/PipeWire",
+    )
+    parser.add_argument("--input-rate", type=int, default=16000, help="Frequence du PCM brut (--source stdin)")
+    parser.add_argument("--input-channels", type=int, default=1, help="Canaux du PCM brut (--source stdin)")
+    parser.add_argument("--fast", action="store_true", help="Lit le fichier au plus vite (--source file)")
+    parser.add_argument("--list-devices", action="store_true", help="Liste les peripheriques audio")
+    parser.add_argument("--device", type=int, default=DEFAULT_DEVICE_INDEX, help="Index du peripherique d'entree")
+    parser.add_argument("--model", default="", help="Nom du modele dans whisper.cpp/models")
+    parser.add_argument("--backend", choices=["server", "cli"], default="server", help="Backend whisper")
+    parser.add_argument("--no-gpu", action="store_true", help="Desactive CUDA")
+    parser.add_argument("--vad", choices=["energy", "peak"], default="energy", help="Detection de parole")
+    parser.add_argument(
+        "--split-window",
+        type=float,
+        default=1.0,
+        help="Fenetre (s) de recherche du point de coupe le moins energetique",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Affiche des hypotheses partielles avant la fin de chaque segment",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="Threads whisper par decodage (defaut: reglage app.tuning, sinon defaut de whisper.cpp)",
+    )
+    parser.add_argument(
+        "--fixed-segments",
+        action="store_true",
+        help="Decoupe fixe: pas d'ajustement selon la vitesse de whisper ni de fusion des segments en retard",
+    )
+    parser.add_argument(
+        "--capture-process",
+        action="store_true",
+        help="Capture audio dans un process dedie (memoire partagee)",
+    )
+    parser.add_argument(
+        "--translation",
+        choices=["process", "thread"],
+        default="process",
+        help="Traduction dans un process dedie ou un pool de threads",
+    )
+    parser.add_argument("--translation-workers", type=int, default=1, help="Nombre de workers de traduction")
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=0,
+        help="Expose les metriques sur http://127.0.0.1:PORT/metrics (format Prometheus)",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Enregistre une trace Chrome/Perfetto (voxbridge_trace_*.json)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profilage par echantillonnage des le demarrage (SIGUSR1 bascule en cours de session)",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Ignore le demon VoxBridge (python -m app.daemon) et charge whisper dans ce process",
+    )
+    return parser.parse_args()
+
+
+def print_devices(loopback: bool) -> None:
+    if loopback:
+        import pyaudiowpatch as pa_lib  # type: ignore
+    else:
+        import pyaudio as pa_lib
+
+    p = pa_lib.PyAudio()
+    try:
+        print("index | maxInput | maxOutput | defaultRate | name")
+        for i in range(p.get_device_count()):
+            d = p.get_device_info_by_index(i)
+            print(
+                f"{i:>5} | {int(d.get('maxInputChannels', 0)):>8} | "
+                f"{int(d.get('maxOutputChannels', 0)):>9} | "
+                f"{int(d.get('defaultSampleRate', 0)):>11} | {d.get('name', '')}"
+            )
+    finally:
+        p.terminate()
+
+
+def resolve_model_path(project_root: Path, model_name: str) -> Path | None:
+    model_dir = project_root / "whisper.cpp" / "models"
+    names = (model_name,) if model_name else DEFAULT_MODELS
+    for name in names:
+        path = model_dir / name
+        if path.exists():
+            return path
+    return None
+
+
+class CliPrinter:
+    def __init__(self, mode: str, minimal: bool) -> None:
+        self.mode = mode
+        self.minimal = minimal
+        self.pending_transcription: str | None = None
+        self.partial_width = 0
+
+    def _clear_partial(self) -> None:
+        if self.partial_width:
+            sys.stdout.write("\r" + " " * self.partial_width + "\r")
+            self.partial_width = 0
+
+    def __call__(self, kind: str, message: str) -> None:
+        if kind == "metrics":
+            return
+        if kind in ("partial", "interim"):
+            if not self.minimal:
+                self._clear_partial()
+                prefix = "FR ... " if kind == "interim" else "... "
+                line = f"{prefix}{message}" if message else ""
+                sys.stdout.write(line)
+                self.partial_width = len(line)
+                sys.stdout.flush()
+            return
+
+        self._clear_partial()
+        if kind == "status":
+            if not self.minimal:
+                print(message)
+        elif kind == "error":
+            if not self.minimal:
+                print(f"Erreur: {message}")
+        elif kind == "transcription":
+            if self.mode == "transcription":
+                print(message)
+            else:
+                self.pending_transcription = message
+        elif kind == "translation":
+            if self.minimal:
+                print(f"FR: {message}")
+            else:
+                print(f"Transcription: {self.pending_transcription or ''}\nTraduction FR: {message}")
+            self.pending_transcription = None
+        sys.stdout.flush()
+
+
+def main(project_root: Path, mode: str) -> int:
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    logging.getLogger("stanza").setLevel(logging.ERROR)
+    args = parse_args(mode)
+
+    if args.list_devices:
+        try:
+            print_devices(args.loopback)
+        except ImportError as exc:
+            print("Mode --loopback indisponible: installe pyaudiowpatch" if args.loopback else f"Erreur: {exc}")
+            return 1
+        return 0
+
+    model_path = resolve_model_path(project_root, args.model)
+    if model_path is None:
+        print("Erreur: aucun modele Whisper trouve.")
+        print("Place un modele ici: whisper.cpp/models/")
+        print("Exemple attendu: ggml-tiny.en.bin ou ggml-tiny.en-q5_1.bin")
+        print("Commande utile: cd whisper.cpp/models && .\\download-ggml-model.cmd tiny.en")
+        return 1
+
+    source = args.source or ("loopback" if args.loopback else "device")
+    options = dict(
+        mode=mode,
+        source=source,
+        device_index=args.device,
+        model_path=model_path,
+        use_cuda=not args.no_gpu,
+        backend=args.backend,
+        capture_process=args.capture_process,
+        vad=args.vad,
+        split_search_sec=args.split_window,
+        streaming=args.streaming,
+        adaptive=not args.fixed_segments,
+        threads=args.threads or live_threads(load_config(project_root), model_path.name),
+        translation=args.translation,
+        translation_workers=args.translation_workers,
+        metrics_port=args.metrics_port,
+        trace=args.trace,
+        profile=args.profile,
+        input_path=str(Path(args.input).resolve()) if source == "file" and args.input else args.input,
+        input_rate=args.input_rate,
+        input_channels=args.input_channels,
+        realtime=not args.fast,
+    )
+    printer = CliPrinter(mode, args.minimal)
+    # stdin reste local: le demon ne lit pas l'entree standard de ce process.
+    conn = None if args.no_daemon or source == "stdin" else connect_daemon(project_root)
+    if conn is not None:
+        if not args.minimal:
+            print(f"VoxBridge {mode}: {model_path.name}, session dans le demon", flush=True)
+        worker = RemoteWorker(conn, options, printer)
+    else:
+        if not args.minimal:
+            print(f"VoxBridge {mode}: {model_path.name}, chargement...", flush=True)
+        # Import differe: numpy/pyaudio ne retardent pas l'affichage ci-dessus.
+        from .core import RunOptions, TranscriptionWorker
+
+        worker = TranscriptionWorker(project_root, RunOptions(**options), printer)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: worker.set_profiling(not worker.profiling))
+    worker.start()
+    try:
+        while worker.is_alive():
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        worker.stop()
+        worker.join(timeout=10)
+    return 0
@@ -0,0 +1,126 @@
+﻿"""Client du demon VoxBridge (``app.daemon``): la GUI et les CLI s'y attachent s'il tourne.
+
+Module volontairement leger (stdlib uniquement): l'attache ne charge ni numpy, ni
+pyaudio, ni argostranslate. Les messages sont des tuples de types simples.
+"""
+
+from __future__ import annotations
+
+import getpass
+import os
+import secrets
+import sys
+import tempfile
+import threading
+from multiprocessing.connection import AuthenticationError, Client, Connection
+from pathlib import Path
+from typing import Any, Callable
+
+
+KEY_FILENAME = ".voxbridge_daemon.key"
+
+
+def daemon_address() -> str:
+    if sys.platform == "win32":
+        return rf"\\.\pipe\voxbridge-{getpass.getuser()}"
+    return os.path.join(tempfile.gettempdir(), f"voxbridge-{os.getuid()}.sock")
+
+
+def read_authkey(project_root: Path) -> bytes | None:
+    try:
+        return (project_root / KEY_FILENAME).read_bytes()
+    except OSError:
+        return None
+
+
+def write_authkey(project_root: Path) -> bytes:
+    key = secrets.token_bytes(32)
+    path = project_root / KEY_FILENAME
+    path.write_bytes(key)
+    if sys.platform != "win32":
+        path.chmod(0o600)
+    return key
+
+
+def connect_daemon(project_root: Path) -> Connection | None:
+    """Connexion au demon s'il tourne pour ce projet, sinon None (le client travaille en local)."""
+    address = daemon_address()
+    key = read_authkey(project_root)
+    if key is None or (sys.platform != "win32" and not os.path.exists(address)):
+        return None
+    try:
+        return Client(address, authkey=key)
+    except (OSError, EOFError, AuthenticationError):
+        return None
+
+
+def request(project_root: Path, command: str, *args: Any) -> Any:
+    """Commande ponctuelle (``models``, ``devices``, ``status``, ``shutdown``) sur une connexion dediee."""
+    conn = connect_daemon(project_root)
+    if conn is None:
+        raise ConnectionError("demon VoxBridge non demarre")
+    with conn:
+        conn.send((command, *args))
+        kind, payload = conn.recv()
+    if kind == "error":
+        raise RuntimeError(payload)
+    return payload
+
+
+class RemoteWorker:
+    """Meme interface que ``TranscriptionWorker`` (start/stop/join/is_alive/set_profiling/switch_device).
+
+    La session tourne dans le demon; ses evenements arrivent par ``on_event`` depuis
+    un thread lecteur, comme ceux d'un worker local.
+    """
+
+    def __init__(self, conn: Connection, options: dict[str, Any], on_event: Callable[[str, str], None]) -> None:
+        self.conn = conn
+        self.options = options
+        self.on_event = on_event
+        self.profiling = bool(options.get("profile"))
+        self._send_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._read, name="voxbridge-daemon-client", daemon=True)
+
+    def _send(self, *message: Any) -> None:
+        with self._send_lock:
+            try:
+                self.conn.send(message)
+            except OSError:
+                pass
+
+    def start(self) -> None:
+        self._send("start", self.options)
+        self._thread.start()
+
+    def _read(self) -> None:
+        try:
+            while True:
+                kind, payload = self.conn.recv()
+                if kind != "event":
+                    continue
+                event, message = payload
+                self.on_event(event, message)
+                if event == "stopped":
+                    return
+        except (EOFError, OSError):
+            self.on_event("error", "Connexion au demon VoxBridge perdue")
+            self.on_event("stopped", "")
+        finally:
+            self.conn.close()
+
+    def stop(self) -> None:
+        self._send("stop")
+
+    def set_profiling(self, enabled: bool) -> None:
+        self.profiling = enabled
+        self._send("profile", enabled)
+
+    def switch_device(self, index: int, name: str = "") -> None:
+        self._send("device", index, name)
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
@@ -1,21 +1,42 @@
 ﻿from __future__ import annotations
 
 import json
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field, fields
 from pathlib import Path
 
 
 @dataclass
 class AppConfig:
     mode: str = "traduction"  # transcription | traduction
-    source: str = "loopback"  # loopback | device
+    source: str = "loopback"  # loopback | device | monitor
     device_index: int = 0
+    device_name: str = ""  # prioritaire sur l'index, qui change quand un peripherique est branche
     model_name: str = ""
     use_cuda: bool = True
+    backend: str = "server"  # server | cli
+    capture_process: bool = False
+    vad: str = "energy"  # energy | peak
+    split_search_sec: float = 1.0
+    streaming: bool = False
+    translation: str = "process"  # process | thread
+    translation_workers: int = 1
+    trace: bool = False
+    model_target_latency_sec: float = 1.0  # "Tester les modeles": latence max par segment de 3 s
+    whisper_tuning: dict[str, dict] = field(default_factory=dict)  # par modele, ecrit par app.tuning
     show_transcription_with_translation: bool = False
     show_status_info: bool = True
 
 
+@dataclass
+class WhisperTuning:
+    threads: int  # threads par decodage (-t) pour le debit (batch, dossier surveille)
+    slots: int  # decodages simultanes
+    pin: bool = False  # un jeu de coeurs par decodage (Linux)
+    live_threads: int = 0  # threads pour un decodage seul (capture en direct)
+    throughput: float = 0.0  # secondes d'audio decodees par seconde
+    latency_p95: float = 0.0
+
+
 CONFIG_FILENAME = "app_config.json"
 
 
@@ -40,6 +61,25 @@ def load_config(project_root: Path) -> AppConfig:
     return base
 
 
+def tuning_for(cfg: AppConfig, model_name: str) -> WhisperTuning | None:
+    data = cfg.whisper_tuning.get(model_name)
+    if not isinstance(data, dict):
+        return None
+    known = {f.name for f in fields(WhisperTuning)}
+    try:
+        return WhisperTuning(**{k: v for k, v in data.items() if k in known})
+    except TypeError:
+        return None
+
+
+def live_threads(cfg: AppConfig, model_name: str) -> int:
+    """Threads whisper pour la capture en direct (un decodage a la fois); 0 sans reglage."""
+    tuning = tuning_for(cfg, model_name)
+    if tuning is None:
+        return 0
+    return tuning.live_threads or tuning.threads
+
+
 def save_config(project_root: Path, cfg: AppConfig) -> None:
     path = config_path(project_root)
     path.write_text(json.dumps(asdict(cfg), indent=2, ensure_ascii=True), encoding="utf-8")
@@ -1,40 +1,72 @@
 ﻿from __future__ import annotations
 
-import subprocess
+import os
+import shutil
 import threading
 import time
-import wave
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Callable
 
-import numpy as np
-import pyaudio
-
-
-CHUNK = 1024
-THRESHOLD = 300
-TRAILING_SILENCE_SEC = 0.20
-MAX_SEGMENT_SEC = 3.0
-OVERLAP_SEC = 0.35
-FORMAT = pyaudio.paInt16
-
-
-@dataclass
-class DeviceInfo:
-    index: int
-    name: str
-    max_input_channels: int
-    default_sample_rate: int
+from .adaptive import (
+    DEADLINE_SEC,
+    DROP_DEADLINE_SEC,
+    MAX_MERGED_SEC,
+    DeadlineStats,
+    SegmentController,
+    merge_segments,
+    segment_age,
+)
+from .audio import WHISPER_RATE, Resampler
+from .backends import CliWhisperBackend, ServerWhisperBackend, WhisperBackend, WhisperResult
+from .logsink import LOG_FILENAME, LogSink, stderr_tail
+from .merge import TranscriptMerger
+from .metrics import RTF_BUCKETS, Histogram, Metrics, MetricsServer
+from .pipeline import BoundedQueue, CaptureStats, PipelineStage, SourceStage, TextEvent
+from .ringbuffer import PcmRingBuffer
+from .segmenter import MAX_SEGMENT_SEC, OVERLAP_SEC, SPLIT_SEARCH_SEC, Segment, Segmenter
+from .sources import CHUNK, AudioSource, PyAudioDeviceSource, create_source
+from .streaming import STREAM_MIN_SEC, STREAM_STEP_SEC, LocalAgreement
+from .tracing import SamplingProfiler, Tracer
+from .translation import Flush, SentenceAggregator, TranslationService
+from .vad import create_vad
+
+
+RING_BUFFER_SEC = 60.0
+SEGMENT_QUEUE_SIZE = 16
+TEXT_QUEUE_SIZE = 64
+STATS_INTERVAL_SEC = 1.0
+METRICS_EVENT_SEC = 5.0
+DEVICE_RETRY_SEC = 2.0
+DEVICE_LOST_TIMEOUT_SEC = 30.0
 
 
 @dataclass
 class RunOptions:
     mode: str  # transcription | traduction
-    source: str  # loopback | device
+    source: str  # loopback | device | file | stdin | monitor
     device_index: int
     model_path: Path
     use_cuda: bool
+    backend: str = "server"  # server | cli
+    capture_process: bool = False
+    vad: str = "energy"  # energy | peak
+    split_search_sec: float = SPLIT_SEARCH_SEC
+    streaming: bool = False
+    translation: str = "process"  # process | thread
+    translation_workers: int = 1
+    metrics_port: int = 0  # 0: pas de point d'acces HTTP
+    trace: bool = False
+    profile: bool = False
+    input_path: str = ""  # fichier (file), pipe (stdin, "-" = stdin) ou peripherique (monitor)
+    input_rate: int = WHISPER_RATE  # PCM brut (stdin)
+    input_channels: int = 1
+    realtime: bool = True  # file: False = lecture au plus vite
+    adaptive: bool = True  # decoupe et file de segments pilotees par le RTF mesure
+    threads: int = 0  # threads whisper par decodage (-t), 0: defaut de whisper.cpp
+    device_name: str = ""  # device: retrouve le peripherique par son nom si son index a change
 
 
 def discover_models(project_root: Path) -> list[str]:
@@ -50,49 +82,77 @@ def discover_models(project_root: Path) -> list[str]:
     return names
 
 
-def build_whisper_cli_path(project_root: Path) -> Path:
+def _whisper_binary_candidates(project_root: Path, name: str) -> list[Path]:
     whisper_dir = project_root / "whisper.cpp"
-    candidates = [
-        whisper_dir / "build-cuda" / "bin" / "Release" / "whisper-cli.exe",
-        whisper_dir / "build" / "bin" / "Release" / "whisper-cli.exe",
-    ]
+    exe_name = f"{name}.exe" if os.name == "nt" else name
+    candidates = []
+    for build_dir in ("build-cuda", "build"):
+        candidates.append(whisper_dir / build_dir / "bin" / "Release" / exe_name)
+        candidates.append(whisper_dir / build_dir / "bin" / exe_name)
+    return candidates
+
+
+def _find_whisper_binary(project_root: Path, name: str) -> Path:
+    candidates = _whisper_binary_candidates(project_root, name)
     for candidate in candidates:
         if candidate.exists():
             return candidate
+    on_path = shutil.which(name)
+    if on_path:
+        return Path(on_path)
     return candidates[0]
 
 
-def list_input_devices() -> list[DeviceInfo]:
-    p = pyaudio.PyAudio()
-    devices: list[DeviceInfo] = []
+def build_whisper_cli_path(project_root: Path) -> Path:
+    return _find_whisper_binary(project_root, "whisper-cli")
+
+
+def build_whisper_server_path(project_root: Path) -> Path:
+    return _find_whisper_binary(project_root, "whisper-server")
+
+
+def create_backend(project_root: Path, options: RunOptions, work_file: Path | None = None) -> WhisperBackend:
+    if options.backend == "server":
+        return ServerWhisperBackend(
+            server_path=build_whisper_server_path(project_root),
+            model_path=options.model_path,
+            use_cuda=options.use_cuda,
+            log_path=project_root / "whisper_server.log",
+            threads=options.threads,
+        )
+    return CliWhisperBackend(
+        cli_path=build_whisper_cli_path(project_root),
+        model_path=options.model_path,
+        use_cuda=options.use_cuda,
+        work_file=work_file or project_root / "temp_audio_16k.wav",
+        threads=options.threads,
+    )
+
+
+def start_backend(
+    project_root: Path,
+    options: RunOptions,
+    emit: Callable[[str, str], None],
+    work_file: Path | None = None,
+) -> WhisperBackend | None:
+    """Demarre le backend demande, avec repli sur whisper-cli si le serveur ne demarre pas."""
+    backend = create_backend(project_root, options, work_file)
     try:
-        for i in range(p.get_device_count()):
-            d = p.get_device_info_by_index(i)
-            max_in = int(d.get("maxInputChannels", 0))
-            if max_in <= 0:
-                continue
-            devices.append(
-                DeviceInfo(
-                    index=i,
-                    name=str(d.get("name", "")),
-                    max_input_channels=max_in,
-                    default_sample_rate=int(d.get("defaultSampleRate", 44100)),
-                )
-            )
-    finally:
-        p.terminate()
-    return devices
-
-
-def build_translator() -> Callable[[str], str]:
-    import argostranslate.translate
-
-    installed_languages = argostranslate.translate.get_installed_languages()
-    from_lang = next((lang for lang in installed_languages if lang.code == "en"), None)
-    to_lang = next((lang for lang in installed_languages if lang.code == "fr"), None)
-    if from_lang and to_lang:
-        return from_lang.get_translation(to_lang).translate
-    return lambda text: text
+        backend.start()
+        return backend
+    except Exception as exc:
+        if options.backend == "cli":
+            emit("error", str(exc))
+            return None
+        emit("status", f"Backend serveur indisponible ({exc}), repli sur whisper-cli")
+
+    fallback = create_backend(project_root, replace(options, backend="cli"), work_file)
+    try:
+        fallback.start()
+    except Exception as exc:
+        emit("error", str(exc))
+        return None
+    return fallback
 
 
 class TranscriptionWorker(threading.Thread):
@@ -107,225 +167,797 @@ class TranscriptionWorker(threading.Thread):
         self.options = options
         self.on_event = on_event
         self.stop_event = threading.Event()
+        self.capture_stats = CaptureStats()
+        self.queues: list[BoundedQueue] = []
+        self.merger = TranscriptMerger()
+        self.agreement = LocalAgreement()
+        self._partial_pending = False
+        self._last_partial_end = 0
+        self.translator: TranslationService | None = None
+        self.aggregator = SentenceAggregator()
+        self.metrics = Metrics()
+        self.metrics_server: MetricsServer | None = None
+        self._stage_hists: dict[str, Histogram] = {}
+        self.tracer = Tracer(None)
+        self.log_sink = LogSink(project_root / LOG_FILENAME)
+        self.profiler: SamplingProfiler | None = None
+        self._profiler_lock = threading.Lock()
+        self._trace_ids = 0
+        self.startup_times: dict[str, float] = {}
+        self._reported_losses = (0, 0, 0)
+        self._read_pos = 0
+        # Debut des segments fermes dont l'audio n'a pas encore ete copie (reechantillonne).
+        self._pending_starts: deque[int] = deque()
+        self.ring: PcmRingBuffer | None = None
+        self.controller = SegmentController()
+        self.deadlines = DeadlineStats()
+        self._deadline_policy = False
+        self._reported_deadlines = DeadlineStats()
+        self._capture_lock = threading.Lock()
+        self._device_request: tuple[int, str] | None = None
+        self._retired_rings: list[PcmRingBuffer] = []
+        self._ring_first_segment = 0
+        self._device_lost_at: float | None = None
+        self._device_retry_at = 0.0
+        self.device_switches = 0
 
     def stop(self) -> None:
         self.stop_event.set()
 
+    def switch_device(self, index: int, name: str = "") -> None:
+        """Bascule la capture sur un autre peripherique; whisper et la traduction restent charges."""
+        self._device_request = (index, name)
+
     def emit(self, kind: str, message: str) -> None:
         self.on_event(kind, message)
 
-    def _get_loopback_backend(self):
+    @property
+    def profiling(self) -> bool:
+        return self.profiler is not None
+
+    def _start_backend(self) -> WhisperBackend | None:
+        return start_backend(self.project_root, self.options, self.emit)
+
+    def _release_backend(self, backend: WhisperBackend) -> None:
+        backend.close()
+
+    def _create_translator(self) -> TranslationService:
+        return TranslationService(self.options.translation, self.options.translation_workers)
+
+    def _release_translator(self, translator: TranslationService) -> None:
+        translator.close()
+
+    def _poll_ring(self) -> list[Segment]:
+        # Le tampon et le segmenteur peuvent etre remplaces par un changement de peripherique.
+        with self._capture_lock:
+            return self._read_ring()
+
+    def _read_ring(self) -> list[Segment]:
+        ring = self.ring
+        stats = self.capture_stats
+        written = ring.written
+        stats.captured_frames = written
+        stats.overflow_events = ring.overflow_events
+        if self._read_pos < ring.oldest:
+            stats.dropped_frames += ring.oldest - self._read_pos
+            self._read_pos = ring.oldest
+            self.segmenter.resync()
+
+        segments = []
+        while self._read_pos + CHUNK <= written:
+            segment = self.segmenter.feed(self._read_pos, self._read_pos + CHUNK)
+            self._read_pos += CHUNK
+            if segment is not None:
+                segments.append(segment)
+
+        # Instant de capture estime a partir du retard de lecture sur le tampon.
+        now = time.monotonic()
+        rate = self.segmenter.rate
+        for segment in segments:
+            segment.captured_at = now - (written - segment.end) / rate
+            self.metrics.observe("segment_wait_seconds", segment.closed_at - (now - (written - segment.start) / rate))
+        if self.tracer.enabled:
+            self._trace_capture(segments, written, rate)
+
+        if self.options.streaming and not self._partial_pending:
+            if self.segmenter.end - self._last_partial_end >= int(self.segmenter.rate * STREAM_STEP_SEC):
+                partial = self.segmenter.partial(int(self.segmenter.rate * STREAM_MIN_SEC))
+                if partial is not None:
+                    self._partial_pending = True
+                    self._last_partial_end = partial.end
+                    partial.captured_at = now - (written - partial.end) / rate
+                    segments.append(partial)
+        self._pending_starts.extend(segment.start for segment in segments)
+        return segments
+
+    def _resample_stage(self, segment: Segment) -> Segment | None:
+        resampler = self.resampler
+        if (segment.rate, segment.channels) != (resampler.src_rate, resampler.channels):
+            # Capture par le peripherique precedent, de format different.
+            resampler = Resampler(segment.rate, segment.channels)
         try:
-            import pyaudiowpatch as pa_lib  # type: ignore
-        except ImportError as exc:
-            raise RuntimeError("Loopback demande pyaudiowpatch: pip install pyaudiowpatch") from exc
-        return pa_lib
-
-    def _get_loopback_device(self, p, pa_lib):
-        if not hasattr(pa_lib, "paWASAPI"):
-            raise RuntimeError("Backend audio sans support WASAPI loopback")
-
-        wasapi = p.get_host_api_info_by_type(pa_lib.paWASAPI)
-        default_output_idx = int(wasapi["defaultOutputDevice"])
-        default_output = p.get_device_info_by_index(default_output_idx)
-
-        if default_output.get("isLoopbackDevice", False):
-            return default_output
-
-        if hasattr(p, "get_loopback_device_info_generator"):
-            default_name = str(default_output.get("name", ""))
-            for loop_dev in p.get_loopback_device_info_generator():
-                if default_name in str(loop_dev.get("name", "")):
-                    return loop_dev
-
-        raise RuntimeError("Impossible de trouver le device loopback WASAPI")
+            segment.samples = resampler.process(segment.pcm.reshape(-1))
+        finally:
+            self._pending_starts.popleft()
+        segment.pcm = segment.pcm[:0]
+        # Les segments d'un tampon retire (changement de peripherique) ne sont plus ecrases.
+        if segment.index >= self._ring_first_segment and not self.ring.is_valid(segment.start):
+            self.capture_stats.stale_segments += 1
+            if not segment.final:
+                self._partial_pending = False
+            return None
+        return segment
+
+    def _transcribe_stage(self, segment: Segment) -> list[TextEvent] | None:
+        if not segment.final:
+            self._partial_pending = False
+        if self._deadline_policy:
+            segment = self._apply_deadline(segment)
+            if segment is None:
+                return None
+        result = self._decode(segment)
+        if result is None:
+            if segment.final and self.options.streaming:
+                self.agreement.reset()
+                return [TextEvent("partial", "")]
+            return None
+
+        duplicate = self.merger.duplicate_count(result.text, result.words, segment.overlap_sec)
+        tokens = result.text.split()[duplicate:]
+        if not segment.final:
+            newly, pending = self.agreement.update(tokens)
+            events = []
+            if newly:
+                events.append(TextEvent("transcription", " ".join(newly), segment.captured_at, segment=segment.index))
+            events.append(TextEvent("partial", " ".join(pending)))
+            return events
+
+        self.merger.accept(result.text, duplicate)
+        events = []
+        if self.options.streaming:
+            tokens = self.agreement.finalize(tokens)
+        if tokens:
+            events.append(
+                TextEvent(
+                    "transcription",
+                    " ".join(tokens),
+                    segment.captured_at,
+                    pause=not segment.forced,
+                    segment=segment.index,
+                )
+            )
+        if self.options.streaming:
+            events.append(TextEvent("partial", ""))
+        return events or None
+
+    def _decode(self, segment: Segment) -> WhisperResult | None:
+        started = time.perf_counter()
+        result = self.backend.transcribe(segment.samples)
+        if result.timed_out:
+            self.metrics.inc("whisper_timeouts_total")
+            self.log_sink.write(self._whisper_record(segment, time.perf_counter() - started, result))
+            self.emit("error", "Whisper timeout")
+            return None
+        finished = time.perf_counter()
+        elapsed = finished - started
+        self.tracer.complete(
+            "whisper",
+            started,
+            finished,
+            "inference",
+            segment=segment.index,
+            final=segment.final,
+            audio_sec=round(segment.duration, 3),
+        )
+        self.metrics.inc("whisper_calls_total")
+        self.metrics.observe("whisper_seconds", elapsed)
+        if segment.duration > 0:
+            self.metrics.histogram("whisper_rtf", RTF_BUCKETS).observe(elapsed / segment.duration)
+        if result.ok:
+            self.controller.observe(segment.duration, elapsed)
+        self.log_sink.write(self._whisper_record(segment, elapsed, result))
+
+        if not result.ok:
+            self.metrics.inc("whisper_failures_total")
+            self.emit("error", f"Whisper error: {result.stderr.strip()}")
+            return None
+
+        if not result.text:
+            if segment.final:
+                self.emit("status", "Aucune transcription obtenue.")
+            return None
+        return result
+
+    def _apply_deadline(self, segment: Segment) -> Segment | None:
+        """Politique d'echeance: un segment en retard absorbe les segments finals deja en file
+        (un seul appel whisper), et il est abandonne au-dela de ``DROP_DEADLINE_SEC`` si d'autres attendent."""
+        age = segment_age(segment, time.monotonic())
+        if age <= DEADLINE_SEC:
+            return segment
+        if not segment.final:
+            self.deadlines.dropped_partials += 1
+            self.metrics.inc("deadline_dropped_partials_total")
+            return None
+        if age > DROP_DEADLINE_SEC and self.resampled_queue.qsize() > 0:
+            self.deadlines.dropped += 1
+            self.metrics.inc("deadline_dropped_segments_total")
+            return None
+        rate = segment.rate
+        while True:
+            start = segment.start
+            following = self.resampled_queue.take_if(lambda s: s.final and (s.end - start) / rate <= MAX_MERGED_SEC)
+            if following is None:
+                return segment
+            segment = merge_segments(segment, following)
+            self.deadlines.merged += 1
+            self.metrics.inc("deadline_merged_segments_total")
+
+    def _adapt(self) -> None:
+        """Applique les decisions du controleur et signale les actions de la politique d'echeance."""
+        backlog = self.queues[0].qsize() + self.resampled_queue.qsize()
+        plan = self.controller.decide(backlog) if self.options.adaptive else None
+        if plan is not None:
+            self.segmenter.configure(plan.max_segment_sec, plan.overlap_sec, plan.trailing_silence_sec)
+            self.emit(
+                "status",
+                f"Decoupe adaptative: RTF whisper {self.controller.rtf:.2f}, {backlog} segments en file -> "
+                f"{plan.describe()}",
+            )
+        if self.deadlines != self._reported_deadlines:
+            self._reported_deadlines = replace(self.deadlines)
+            self.emit("status", f"File en retard (> {DEADLINE_SEC:.0f}s): {self.deadlines.describe()}")
+
+    def _whisper_record(self, segment: Segment, elapsed: float, result: WhisperResult) -> dict:
+        record = {
+            "event": "whisper",
+            "backend": self.backend.name,
+            "segment": segment.index,
+            "final": segment.final,
+            "audio_sec": round(segment.duration, 3),
+            "elapsed": round(elapsed, 4),
+            "ok": result.ok,
+        }
+        if result.timed_out:
+            record["error"] = "timeout"
+            return record
+        record["returncode"] = result.returncode
+        record["chars"] = len(result.text)
+        if not result.ok:
+            # Sortie brute seulement en cas d'echec (le reste du temps: bandeau de chargement du modele).
+            record["stderr"] = stderr_tail(result.stderr)
+        return record
+
+    def _translation_event(self, flush: Flush) -> TextEvent:
+        kind = "interim" if flush.interim else "transcription"
+        future = self.translator.submit(flush.text)
+        if self.tracer.enabled:
+            self._trace_ids += 1
+            span_id, submitted = self._trace_ids, time.perf_counter()
+            future.add_done_callback(
+                lambda _: self.tracer.async_span(
+                    "traduction",
+                    span_id,
+                    submitted,
+                    time.perf_counter(),
+                    "translation",
+                    interim=flush.interim,
+                    words=len(flush.text.split()),
+                )
+            )
+        return TextEvent(kind, flush.text, flush.audio_end_at, translation=future)
+
+    def _translate_stage(self, event: TextEvent) -> TextEvent | None:
+        if event.kind != "transcription" or self.translator is None:
+            return event
+        # En traduction, la transcription est re-emise phrase par phrase avec sa traduction.
+        flush = self.aggregator.add(event.text, event.audio_end_at or time.monotonic(), pause=event.pause)
+        return self._translation_event(flush) if flush is not None else None
+
+    def _translate_idle(self) -> TextEvent | None:
+        if self.translator is None:
+            return None
+        flush = self.aggregator.poll(time.monotonic())
+        return self._translation_event(flush) if flush is not None else None
+
+    def _await_translation(self, future: Future) -> str | None:
+        while True:
+            try:
+                return future.result(timeout=0.1)
+            except FutureTimeout:
+                if self.stop_event.is_set():
+                    return None
+            except CancelledError:
+                return None
+            except Exception as exc:
+                self.metrics.inc("translation_failures_total")
+                self.emit("error", f"Erreur traduction: {exc}")
+                return None
+
+    def _emit_stage(self, event: TextEvent) -> None:
+        # Les evenements arrivent dans l'ordre des segments: attendre ici la
+        # traduction du plus ancien suffit a reassembler les resultats du pool.
+        translation = None
+        if event.translation is not None:
+            translation = self._await_translation(event.translation)
+            if translation is None and self.stop_event.is_set():
+                return
+            if event.kind == "interim":
+                if translation is not None:
+                    self.emit("interim", translation)
+                return
+        self.emit(event.kind, event.text)
+        if translation is not None:
+            self.emit("translation", translation)
+        if event.audio_end_at is not None and event.kind == "transcription":
+            self.metrics.observe("capture_to_text_seconds", time.monotonic() - event.audio_end_at)
+
+    def _on_stage_error(self, stage: str, exc: Exception) -> None:
+        self.metrics.inc(f'stage_errors_total{{stage="{stage}"}}')
+        self.emit("error", f"Erreur etage {stage}: {exc}")
+
+    def _timed(self, stage: str, handler: Callable):
+        hist = self._stage_hists[stage] = self.metrics.histogram(f'stage_seconds{{stage="{stage}"}}')
+        tracer = self.tracer
+
+        def timed(item):
+            started = time.perf_counter()
+            try:
+                return handler(item)
+            finally:
+                finished = time.perf_counter()
+                hist.observe(finished - started)
+                if tracer.enabled:
+                    segment = getattr(item, "index", getattr(item, "segment", None))
+                    tracer.complete(stage, started, finished, segment=segment)
+
+        return timed
+
+    def _trace_capture(self, segments: list[Segment], written: int, rate: int) -> None:
+        now = time.perf_counter()
+        self.tracer.counter("capture", written_frames=written, read_lag_frames=written - self._read_pos)
+        for segment in segments:
+            self._trace_ids += 1
+            self.tracer.async_span(
+                f"audio segment {segment.index}" + ("" if segment.final else " (partiel)"),
+                self._trace_ids,
+                now - (written - segment.start) / rate,
+                now - (written - segment.end) / rate,
+                "segment",
+                segment=segment.index,
+                forced=segment.forced,
+            )
+            if segment.final:
+                self.tracer.instant("segment_close", segment=segment.index, duration=round(segment.duration, 3))
+
+    def set_profiling(self, enabled: bool) -> None:
+        """Demarre/arrete l'echantillonneur de piles pendant la session."""
+        with self._profiler_lock:
+            if enabled and self.profiler is None:
+                self.profiler = SamplingProfiler()
+                self.profiler.start()
+                self.emit("status", "Profilage demarre")
+            elif not enabled and self.profiler is not None:
+                profiler, self.profiler = self.profiler, None
+                path = profiler.stop(self.project_root / f"voxbridge_profile_{time.strftime('%Y%m%d_%H%M%S')}.folded")
+                self.emit("status", f"Profil ({profiler.samples} echantillons): {path}")
+
+    def _ring_has_room(self) -> bool:
+        """Frein des sources lues plus vite que le temps reel: garde la moitie du tampon d'avance.
+
+        L'avance se mesure depuis l'audio le plus ancien encore necessaire: segment en file
+        pas encore reechantillonne, segment en cours ou lecture du segmenteur.
+        """
+        oldest = self._read_pos
+        start = self.segmenter.start
+        if start is not None:
+            oldest = min(oldest, start)
+        try:
+            oldest = min(oldest, self._pending_starts[0])
+        except IndexError:
+            pass
+        return self.ring.written - oldest < self.ring.capacity // 2
+
+    def _source_exhausted(self, source: AudioSource) -> bool:
+        return not source.is_active() and self._read_pos + CHUNK > self.ring.written
+
+    def _create_capture(self, source: AudioSource) -> None:
+        rate, channels = source.rate, source.channels
+        self.ring = PcmRingBuffer(
+            max(CHUNK, int(rate * RING_BUFFER_SEC)),
+            channels,
+            shared=source.shared_ring,
+        )
+        self.segmenter = Segmenter(
+            self.ring,
+            rate,
+            CHUNK,
+            create_vad(self.options.vad, rate),
+            split_search_sec=self.options.split_search_sec,
+        )
+        self.resampler = Resampler(rate, channels)
+
+    def _replace_capture(self, source: AudioSource) -> None:
+        """Tampon et segmenteur au format de ``source``; l'ancien tampon reste lisible par les segments en vol."""
+        old = self.segmenter
+        self._retired_rings.append(self.ring)
+        self._ring_first_segment = old.next_index + 1
+        self._create_capture(source)
+        segmenter = self.segmenter
+        segmenter.next_index = self._ring_first_segment
+        plan = self.controller.plan
+        segmenter.configure(plan.max_segment_sec, plan.overlap_sec, plan.trailing_silence_sec)
+        scale = segmenter.rate / old.rate
+        old.stats.decoded_frames = int(old.stats.decoded_frames * scale)
+        old.stats.overlap_frames = int(old.stats.overlap_frames * scale)
+        segmenter.stats = old.stats
+        segmenter.vad.accepted_segments += old.vad.accepted_segments
+        segmenter.vad.rejected_segments += old.vad.rejected_segments
+        self._read_pos = 0
+        self._last_partial_end = 0
+
+    def _switch_source(self, source: AudioSource, index: int, name: str) -> AudioSource:
+        """Remplace la source de capture sans toucher a whisper, a la traduction ni aux etages."""
+        # Fermer d'abord: PortAudio ne relit la liste des peripheriques qu'une fois toutes ses instances fermees.
+        source.close()
+        options = replace(self.options, device_index=index, device_name=name)
+        replacement = create_source(options)
+        replacement.preferred_format = (self.segmenter.rate, self.ring.channels)
+        replacement.open()
+        with self._capture_lock:
+            if (replacement.rate, replacement.channels) == replacement.preferred_format:
+                self.segmenter.resync()
+            else:
+                self._replace_capture(replacement)
+                self.emit("status", f"Format capture: {replacement.rate} Hz, {replacement.channels} canal(aux)")
+        try:
+            replacement.start(self.ring, self._ring_has_room)
+        except Exception:
+            replacement.close()
+            raise
+        self.options = options
+        self.device_switches += 1
+        return replacement
+
+    def _keep_capture(self, source: AudioSource) -> AudioSource | None:
+        """Changement de peripherique demande ou reconnexion d'un peripherique perdu; None: capture terminee."""
+        request, self._device_request = self._device_request, None
+        switchable = isinstance(source, PyAudioDeviceSource)
+        if request is not None and switchable and request[1] and request[1] == source.device_name:
+            # Meme peripherique renumerote par PortAudio: le flux ouvert reste valable.
+            request = None if source.is_active() else request
+        if request is not None and not switchable:
+            self.emit("status", f"Changement de peripherique ignore: {source.describe()}")
+        elif request is not None:
+            try:
+                source = self._switch_source(source, *request)
+            except Exception as exc:
+                self.emit("error", f"Changement de peripherique impossible: {exc}")
+            else:
+                self._device_lost_at = None
+                self.emit("status", f"Capture: {source.describe()}")
+        if source.is_active():
+            return source
+        if not switchable:
+            self.emit("error", "Flux audio interrompu")
+            return None
+
+        now = time.monotonic()
+        if self._device_lost_at is None:
+            self._device_lost_at = self._device_retry_at = now
+            self.emit(
+                "status",
+                f"Peripherique perdu ({source.describe()}): reconnexion tentee pendant {DEVICE_LOST_TIMEOUT_SEC:.0f}s",
+            )
+        elif now - self._device_lost_at > DEVICE_LOST_TIMEOUT_SEC:
+            self.emit("error", "Flux audio interrompu")
+            return None
+        elif now - self._device_retry_at >= DEVICE_RETRY_SEC:
+            self._device_retry_at = now
+            try:
+                source = self._switch_source(source, source.device_index, source.device_name)
+            except Exception:
+                return source
+            self._device_lost_at = None
+            self.emit("status", f"Peripherique reconnecte: {source.describe()}")
+        return source
+
+    def _build_stages(self, audio: AudioSource) -> list[PipelineStage]:
+        segment_queue = BoundedQueue("segments", SEGMENT_QUEUE_SIZE)
+        resampled_queue = BoundedQueue("resampled", SEGMENT_QUEUE_SIZE)
+        text_queue = BoundedQueue("text", TEXT_QUEUE_SIZE)
+        emit_queue = BoundedQueue("events", TEXT_QUEUE_SIZE)
+        self.queues = [segment_queue, resampled_queue, text_queue, emit_queue]
+        self.resampled_queue = resampled_queue
+        source = SourceStage(
+            "segment",
+            segment_queue,
+            self._poll_ring,
+            self.stop_event,
+            self._on_stage_error,
+            idle_sec=CHUNK / self.segmenter.rate / 2,
+            exhausted=(lambda: self._source_exhausted(audio)) if audio.finite else None,
+        )
+        layout = [
+            ("resample", segment_queue, resampled_queue, self._resample_stage, None),
+            ("transcribe", resampled_queue, text_queue, self._transcribe_stage, None),
+            ("translate", text_queue, emit_queue, self._translate_stage, self._translate_idle),
+            ("emit", emit_queue, None, self._emit_stage, None),
+        ]
+        return [source] + [
+            PipelineStage(
+                name,
+                inbox,
+                outbox,
+                self._timed(name, handler),
+                self.stop_event,
+                self._on_stage_error,
+                idle=idle,
+            )
+            for name, inbox, outbox, handler, idle in layout
+        ]
+
+    def _update_gauges(self) -> None:
+        metrics = self.metrics
+        for name, value in self.capture_stats.snapshot().items():
+            metrics.set(f"capture_{name}", value)
+        for q in self.queues:
+            metrics.set(f'queue_depth{{queue="{q.name}"}}', q.qsize())
+            metrics.set(f'queue_high_water{{queue="{q.name}"}}', q.high_water)
+            metrics.set(f'queue_dropped{{queue="{q.name}"}}', q.dropped)
+        metrics.set("log_dropped_records", self.log_sink.dropped)
+        metrics.set("capture_device_switches", self.device_switches)
+        metrics.set("segment_max_seconds", self.controller.plan.max_segment_sec)
+        metrics.set("whisper_rtf_smoothed", self.controller.rtf)
+
+    def metrics_summary(self) -> str:
+        m = self.metrics
+        e2e = m.histogram("capture_to_text_seconds")
+        whisper = m.histogram("whisper_seconds")
+        rtf = m.histogram("whisper_rtf", RTF_BUCKETS)
+        stage_p95 = ", ".join(f"{stage} {hist.quantile(0.95) * 1000:.0f}" for stage, hist in self._stage_hists.items())
+        depth = sum(int(v) for k, v in m.gauges.items() if k.startswith("queue_depth"))
+        return (
+            f"capture->texte p50 {e2e.quantile(0.5) * 1000:.0f} ms / p95 {e2e.quantile(0.95) * 1000:.0f} ms | "
+            f"whisper p95 {whisper.quantile(0.95) * 1000:.0f} ms, RTF {rtf.mean:.2f} | "
+            f"etages p95 ms: {stage_p95} | files {depth} | "
+            f"frames perdues {int(m.gauges.get('capture_dropped_frames', 0))} | "
+            f"echecs whisper {int(m.counters.get('whisper_failures_total', 0))}, "
+            f"timeouts {int(m.counters.get('whisper_timeouts_total', 0))}"
+        )
+
+    def _report_capture_losses(self) -> None:
+        snapshot = self.capture_stats.snapshot()
+        current = (snapshot["dropped_frames"], snapshot["overflow_events"], snapshot["stale_segments"])
+        if current != self._reported_losses:
+            self._reported_losses = current
+            self.emit(
+                "status",
+                f"Pertes capture: {snapshot['dropped_frames']} frames ignorees, "
+                f"{snapshot['overflow_events']} overflows, {snapshot['stale_segments']} segments perimes",
+            )
 
     def run(self) -> None:
-        whisper_cli = build_whisper_cli_path(self.project_root)
-        if not whisper_cli.exists():
-            self.emit("error", f"whisper-cli introuvable: {whisper_cli}")
-            self.emit("stopped", "")
-            return
-
         if not self.options.model_path.exists():
             self.emit("error", f"Modele introuvable: {self.options.model_path}")
             self.emit("stopped", "")
             return
 
-        translate_fn: Callable[[str], str] | None = None
+        self.log_sink.start()
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        if self.options.trace:
+            self.tracer = Tracer(self.project_root / f"voxbridge_trace_{stamp}.json")
+        if self.options.profile:
+            self.set_profiling(True)
+
+        # La traduction (argostranslate, process dedie) se charge pendant que whisper demarre.
+        self.translator = None
+        translator = None
+        translator_errors: list[Exception] = []
+        warmup = None
         if self.options.mode == "traduction":
-            try:
-                translate_fn = build_translator()
-            except Exception as exc:
-                self.emit("error", f"Erreur initialisation traduction: {exc}")
-                self.emit("stopped", "")
-                return
+            translator = self._create_translator()
+            warmup = threading.Thread(
+                target=self._start_translator,
+                args=(translator, translator_errors),
+                name="voxbridge-translation-warmup",
+                daemon=True,
+            )
+            warmup.start()
 
-        pa_lib = pyaudio
-        if self.options.source == "loopback":
-            try:
-                pa_lib = self._get_loopback_backend()
-            except Exception as exc:
-                self.emit("error", str(exc))
-                self.emit("stopped", "")
+        started = time.perf_counter()
+        source = create_source(self.options)
+        try:
+            source.open()
+        except Exception as exc:
+            self.emit("error", f"Erreur audio: {exc}")
+            self._abort_startup(warmup, translator)
+            return
+        self.startup_times["audio"] = time.perf_counter() - started
+
+        self.emit("status", "Chargement du modele whisper...")
+        started = time.perf_counter()
+        backend = self._start_backend()
+        if backend is None:
+            source.close()
+            self._abort_startup(warmup, translator)
+            return
+        self.startup_times["whisper"] = time.perf_counter() - started
+        self.backend = backend
+
+        if warmup is not None:
+            warmup.join()
+            if translator_errors:
+                self.emit("error", f"Erreur initialisation traduction: {translator_errors[0]}")
+                self._release_backend(backend)
+                source.close()
+                self._abort_startup(None, None)
                 return
+            self.translator = translator
+            self.metrics.register("translation_seconds", translator.latency)
 
-        p = pa_lib.PyAudio()
-        stream = None
-        channels = 2
-        rate = 44100
+        stages = []
 
         try:
-            if self.options.source == "loopback":
-                loop_dev = self._get_loopback_device(p, pa_lib)
-                channels = max(1, min(2, int(loop_dev.get("maxInputChannels", 2))))
-                rate = int(loop_dev.get("defaultSampleRate", 44100))
-                stream = p.open(
-                    format=pa_lib.paInt16,
-                    channels=channels,
-                    rate=rate,
-                    input=True,
-                    input_device_index=int(loop_dev["index"]),
-                    frames_per_buffer=CHUNK,
-                )
-                self.emit("status", f"Capture: {loop_dev.get('name', '')} (loopback)")
-            else:
-                info = p.get_device_info_by_index(int(self.options.device_index))
-                channels = max(1, min(2, int(info.get("maxInputChannels", 1))))
-                rate = int(info.get("defaultSampleRate", 44100))
-                stream = p.open(
-                    format=pa_lib.paInt16,
-                    channels=channels,
-                    rate=rate,
-                    input=True,
-                    input_device_index=int(self.options.device_index),
-                    frames_per_buffer=CHUNK,
-                )
-                self.emit("status", f"Capture: {info.get('name', '')} (index {self.options.device_index})")
+            rate, channels = source.rate, source.channels
+            self._create_capture(source)
+            # Lecture au plus vite: l'age des segments ne mesure pas un retard sur le direct.
+            self._deadline_policy = self.options.adaptive and getattr(source, "realtime", True)
+            stages = self._build_stages(source)
+            for stage in stages:
+                stage.start()
+            source.start(self.ring, self._ring_has_room)
+            self.emit("status", f"Capture: {source.describe()}")
         except Exception as exc:
             self.emit("error", f"Erreur audio: {exc}")
-            if stream is not None:
-                stream.close()
-            p.terminate()
-            self.emit("stopped", "")
+            self.stop_event.set()
+            source.close()
+            self._shutdown(stages, backend)
             return
 
-        log_file = self.project_root / "logs.txt"
-        wav_file = self.project_root / "temp_audio.wav"
-        wav_16k = self.project_root / "temp_audio_16k.wav"
-
-        max_segment_chunks = max(1, int(rate * MAX_SEGMENT_SEC / CHUNK))
-        overlap_chunks = max(0, int(rate * OVERLAP_SEC / CHUNK))
-        silence_chunks = max(1, int(rate * TRAILING_SILENCE_SEC / CHUNK))
-
-        self.emit("status", f"Whisper CLI: {whisper_cli}")
-        self.emit("status", f"Streaming: max {MAX_SEGMENT_SEC:.1f}s, overlap {OVERLAP_SEC:.2f}s")
+        self.emit("status", f"Whisper: {backend.describe()}")
+        if self.resampler.passthrough:
+            self.emit("status", f"Format capture: {WHISPER_RATE} Hz mono (sans reechantillonnage)")
+        else:
+            self.emit("status", f"Format capture: {rate} Hz, {channels} canal(aux) -> {WHISPER_RATE} Hz mono")
+        self.emit(
+            "status",
+            f"Streaming: max {MAX_SEGMENT_SEC:.1f}s, overlap {OVERLAP_SEC:.2f}s hors pause, "
+            f"recherche de coupe {self.options.split_search_sec:.1f}s"
+            + (", decoupe adaptative selon le RTF" if self.options.adaptive else ""),
+        )
+        self.emit("status", f"VAD: {self.segmenter.vad.describe()}")
+        if self.options.streaming:
+            self.emit("status", f"Mode streaming: hypotheses partielles toutes les {STREAM_STEP_SEC:.1f}s")
+        self.emit(
+            "status",
+            "Demarrage: " + ", ".join(f"{name} {sec:.2f}s" for name, sec in self.startup_times.items()),
+        )
+        if self.translator is not None:
+            self.emit(
+                "status",
+                f"Traduction: {self.translator.describe()}, par phrase "
+                f"(provisoire apres {self.aggregator.deadline_sec:.1f}s)",
+            )
+        if self.options.metrics_port:
+            self._start_metrics_server()
         self.emit("status", "Worker demarre")
 
-        carry_frames: list[bytes] = []
-        last_transcription = ""
-
+        last_metrics = time.monotonic()
         try:
-            while not self.stop_event.is_set():
-                frames: list[bytes] = carry_frames.copy()
-                carry_frames = []
-
-                heard_voice = False
-                silence_counter = 0
-                force_split = False
-
-                while not self.stop_event.is_set():
-                    data = stream.read(CHUNK, exception_on_overflow=False)
-                    audio_data = np.frombuffer(data, dtype=np.int16)
-                    amplitude = int(np.max(np.abs(audio_data))) if audio_data.size else 0
-                    is_voice = amplitude > THRESHOLD
-
-                    if is_voice:
-                        heard_voice = True
-                        silence_counter = 0
-                    elif heard_voice:
-                        silence_counter += 1
-
-                    if heard_voice or frames:
-                        frames.append(data)
-
-                    if len(frames) >= max_segment_chunks:
-                        force_split = True
-                        break
-
-                    if heard_voice and silence_counter >= silence_chunks:
-                        break
-
-                if self.stop_event.is_set():
+            while not self.stop_event.wait(STATS_INTERVAL_SEC):
+                self._report_capture_losses()
+                self._adapt()
+                self._update_gauges()
+                if time.monotonic() - last_metrics >= METRICS_EVENT_SEC:
+                    last_metrics = time.monotonic()
+                    self.emit("metrics", self.metrics_summary())
+                if source.finite and not any(stage.is_alive() for stage in stages):
+                    if source.error is not None:
+                        self.emit("error", f"Lecture audio interrompue: {source.error}")
+                    self.emit("status", "Fin de la source audio: pipeline vide")
                     break
-
-                if not heard_voice:
-                    continue
-
-                if force_split and overlap_chunks > 0 and len(frames) > overlap_chunks:
-                    carry_frames = frames[-overlap_chunks:]
-
-                with wave.open(str(wav_file), "wb") as wf:
-                    wf.setnchannels(channels)
-                    wf.setsampwidth(p.get_sample_size(pa_lib.paInt16))
-                    wf.setframerate(rate)
-                    wf.writeframes(b"".join(frames))
-
-                subprocess.run(
-                    ["ffmpeg", "-y", "-i", str(wav_file), "-ar", "16000", str(wav_16k)],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                    check=False,
-                )
-
-                whisper_command = [
-                    str(whisper_cli),
-                    "-m",
-                    str(self.options.model_path),
-                    "-f",
-                    str(wav_16k),
-                    "-l",
-                    "en",
-                    "-nt",
-                ]
-                if not self.options.use_cuda:
-                    whisper_command.append("-ng")
-
-                result = subprocess.run(whisper_command, capture_output=True, text=True, timeout=30)
-                with open(log_file, "a", encoding="utf-8") as f:
-                    f.write(result.stdout + "\n" + result.stderr + "\n")
-
-                if result.returncode != 0:
-                    self.emit("error", f"Whisper error: {result.stderr.strip()}")
-                    continue
-
-                transcription = " ".join(result.stdout.split())
-                if not transcription:
-                    self.emit("status", "Aucune transcription obtenue.")
-                    continue
-
-                if transcription == last_transcription:
-                    continue
-                last_transcription = transcription
-
-                self.emit("transcription", transcription)
-
-                if translate_fn is not None:
-                    try:
-                        translation = translate_fn(transcription)
-                        self.emit("translation", translation)
-                    except Exception as exc:
-                        self.emit("error", f"Erreur traduction: {exc}")
-
-                time.sleep(0.05)
+                if not source.finite:
+                    kept = self._keep_capture(source)
+                    if kept is None:
+                        break
+                    source = kept
         except Exception as exc:
             self.emit("error", f"Worker exception: {exc}")
         finally:
-            try:
-                if stream is not None:
-                    stream.stop_stream()
-                    stream.close()
-            except Exception:
-                pass
-            p.terminate()
-            self.emit("stopped", "")
+            self.stop_event.set()
+            source.close()
+            self._shutdown(stages, backend)
+
+    def _start_translator(self, translator: TranslationService, errors: list[Exception]) -> None:
+        started = time.perf_counter()
+        try:
+            translator.start()
+        except Exception as exc:
+            errors.append(exc)
+            return
+        self.startup_times["traduction (en parallele)"] = time.perf_counter() - started
+
+    def _abort_startup(self, warmup: threading.Thread | None, translator: TranslationService | None) -> None:
+        if warmup is not None:
+            warmup.join()
+        if translator is not None:
+            self._release_translator(translator)
+        self.set_profiling(False)
+        self.tracer.close()
+        self.log_sink.close()
+        self.emit("stopped", "")
+
+    def _close_translator(self) -> None:
+        if self.translator is not None:
+            self._release_translator(self.translator)
+
+    def _report_latency(self) -> None:
+        e2e = self.metrics.histogram("capture_to_text_seconds")
+        if e2e.count:
+            self.emit(
+                "status",
+                f"Latence capture -> texte: moyenne {e2e.mean * 1000:.0f} ms, "
+                f"p95 {e2e.quantile(0.95) * 1000:.0f} ms ({e2e.count} segments)",
+            )
+        self.emit("status", f"Metriques: {self.metrics_summary()}")
+        if self.translator is not None:
+            cache = self.translator.cache
+            mean_ms = self.translator.latency.mean * 1000
+            aggregator = self.aggregator
+            self.emit(
+                "status",
+                f"Traduction: {self.translator.calls} appels pour {aggregator.fragments} fragments "
+                f"({aggregator.interim_flushes} provisoires), moyenne {mean_ms:.0f} ms hors cache, "
+                f"cache {cache.hits}/{cache.hits + cache.misses} reutilisations",
+            )
+
+    def _start_metrics_server(self) -> None:
+        try:
+            self.metrics_server = MetricsServer(self.metrics, self.options.metrics_port)
+        except OSError as exc:
+            self.emit("error", f"Point d'acces metriques indisponible: {exc}")
+            return
+        self.metrics_server.start()
+        self.emit("status", f"Metriques: http://127.0.0.1:{self.metrics_server.port}/metrics")
+
+    def _shutdown(self, stages: list[threading.Thread], backend: WhisperBackend) -> None:
+        self._close_translator()
+        for stage in stages:
+            stage.join(timeout=backend.timeout + 5)
+        self._update_gauges()
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+        self.set_profiling(False)
+        trace_path = self.tracer.close()
+        if trace_path is not None:
+            self.emit("status", f"Trace ({self.tracer.dropped} evenements ignores): {trace_path}")
+        if stages:
+            vad = self.segmenter.vad
+            self.emit(
+                "status",
+                f"VAD: {vad.accepted_segments} segments envoyes a whisper, "
+                f"{vad.rejected_segments} rejetes (appels whisper evites)",
+            )
+            self.emit("status", f"Fusion: {self.merger.dropped_words} mots dupliques non re-emis")
+            if self.options.adaptive:
+                self.emit(
+                    "status",
+                    f"Decoupe adaptative: {self.controller.adjustments} ajustements, "
+                    f"final {self.controller.plan.describe()}; echeances: {self.deadlines.describe()}",
+                )
+            seg_stats = self.segmenter.stats
+            rate = self.segmenter.rate
+            self.emit(
+                "status",
+                f"Segmentation: {seg_stats.decoded_frames / rate:.1f}s decodees, "
+                f"{seg_stats.overlap_frames / rate:.1f}s de recouvrement, "
+                f"{seg_stats.pause_cuts}/{seg_stats.forced_cuts} coupes forcees dans une pause",
+            )
+            self._report_latency()
+        if self.ring is not None:
+            self.ring.close()
+        for ring in self._retired_rings:
+            ring.close()
+        self._release_backend(backend)
+        self.log_sink.close()
+        self.emit("stopped", "")
@@ -0,0 +1,359 @@
+﻿"""Demon VoxBridge: garde whisper et argostranslate charges entre les sessions (``python -m app.daemon``).
+
+La GUI et les CLI s'y attachent par socket Unix (named pipe sous Windows) s'il tourne;
+une nouvelle session reutilise le backend et le service de traduction deja demarres.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from dataclasses import asdict, fields
+from multiprocessing.connection import AuthenticationError, Client, Connection, Listener
+from pathlib import Path
+from typing import Any, Callable
+
+from .backends import WhisperBackend
+from .cli import resolve_model_path
+from .client import KEY_FILENAME, connect_daemon, daemon_address, write_authkey
+from .config import live_threads, load_config
+from .core import RunOptions, TranscriptionWorker, discover_models, start_backend
+from .devices import scan_devices
+from .translation import TranslationService
+
+
+SESSION_STOP_TIMEOUT_SEC = 15.0
+
+
+class WarmEngine:
+    """Backend whisper et service de traduction partages par les sessions successives.
+
+    Un seul de chaque reste charge: changer de modele (ou de mode de traduction)
+    libere le precedent.
+    """
+
+    def __init__(self, project_root: Path) -> None:
+        self.project_root = project_root
+        self._backend: WhisperBackend | None = None
+        self._backend_key: tuple | None = None
+        self._translator: TranslationService | None = None
+        self._translator_key: tuple | None = None
+        self._lock = threading.Lock()
+
+    def backend(self, options: RunOptions, emit: Callable[[str, str], None]) -> WhisperBackend | None:
+        key = (options.backend, str(options.model_path), options.use_cuda, options.threads)
+        with self._lock:
+            if self._backend is not None and self._backend_key == key and self._backend.is_alive():
+                emit("status", "Whisper deja charge (demon)")
+                return self._backend
+            if self._backend is not None:
+                self._backend.close()
+                self._backend = None
+            backend = start_backend(self.project_root, options, emit)
+            if backend is not None:
+                self._backend, self._backend_key = backend, key
+            return backend
+
+    def translator(self, options: RunOptions) -> TranslationService:
+        key = (options.translation, options.translation_workers)
+        with self._lock:
+            if self._translator is None or self._translator_key != key:
+                if self._translator is not None:
+                    self._translator.close()
+                self._translator = TranslationService(options.translation, options.translation_workers)
+                self._translator_key = key
+            return self._translator
+
+    def preload(self, options: RunOptions, emit: Callable[[str, str], None]) -> None:
+        started = time.perf_counter()
+        if self.backend(options, emit) is not None:
+            emit("status", f"Whisper precharge en {time.perf_counter() - started:.2f}s")
+        if options.mode == "traduction":
+            started = time.perf_counter()
+            try:
+                self.translator(options).start()
+            except Exception as exc:
+                emit("error", f"Prechargement traduction: {exc}")
+                return
+            emit("status", f"Traduction prechargee en {time.perf_counter() - started:.2f}s")
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "whisper": self._backend.describe() if self._backend is not None else "",
+            "model": self._backend_key[1] if self._backend_key else "",
+            "translation": self._translator.describe() if self._translator is not None else "",
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._backend is not None:
+                self._backend.close()
+                self._backend = None
+            if self._translator is not None:
+                self._translator.close()
+                self._translator = None
+
+
+class DaemonWorker(TranscriptionWorker):
+    """Session du demon: emprunte les ressources de ``WarmEngine`` au lieu de les creer et fermer."""
+
+    def __init__(self, engine: WarmEngine, project_root: Path, options: RunOptions, on_event) -> None:
+        super().__init__(project_root, options, on_event)
+        self.engine = engine
+
+    def _start_backend(self) -> WhisperBackend | None:
+        return self.engine.backend(self.options, self.emit)
+
+    def _release_backend(self, backend: WhisperBackend) -> None:
+        pass
+
+    def _create_translator(self) -> TranslationService:
+        return self.engine.translator(self.options)
+
+    def _release_translator(self, translator: TranslationService) -> None:
+        pass
+
+
+def run_options(data: dict[str, Any]) -> RunOptions:
+    known = {f.name for f in fields(RunOptions)}
+    values = {k: v for k, v in data.items() if k in known}
+    values["model_path"] = Path(values["model_path"])
+    return RunOptions(**values)
+
+
+class EngineDaemon:
+    """Accepte les clients, une session a la fois; les evenements vont a tous les clients attaches."""
+
+    def __init__(self, project_root: Path) -> None:
+        self.project_root = project_root
+        self.engine = WarmEngine(project_root)
+        self.session: DaemonWorker | None = None
+        self.owner: Connection | None = None
+        self.subscribers: dict[Connection, threading.Lock] = {}
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._key = b""
+
+    def log(self, kind: str, message: str) -> None:
+        if kind != "metrics":
+            print(f"{time.strftime('%H:%M:%S')} [{kind}] {message}", flush=True)
+
+    def _send(self, conn: Connection, *message: Any) -> bool:
+        lock = self.subscribers.get(conn) or threading.Lock()
+        with lock:
+            try:
+                conn.send(message)
+                return True
+            except OSError:
+                return False
+
+    def broadcast(self, kind: str, message: str) -> None:
+        if kind in ("status", "error"):
+            self.log(kind, message)
+        for conn in list(self.subscribers):
+            if not self._send(conn, "event", (kind, message)):
+                self.subscribers.pop(conn, None)
+
+    def stop_session(self) -> None:
+        session = self.session
+        if session is not None and session.is_alive():
+            session.stop()
+            session.join(timeout=SESSION_STOP_TIMEOUT_SEC)
+
+    def _start_session(self, conn: Connection, data: dict[str, Any]) -> None:
+        with self._lock:
+            self.stop_session()
+            try:
+                options = run_options(data)
+            except (KeyError, TypeError, ValueError) as exc:
+                self._send(conn, "event", ("error", f"Options invalides: {exc}"))
+                self._send(conn, "event", ("stopped", ""))
+                return
+            self.subscribers.setdefault(conn, threading.Lock())
+            self.owner = conn
+            self.session = DaemonWorker(self.engine, self.project_root, options, self.broadcast)
+            self.session.start()
+
+    def _status(self) -> dict[str, Any]:
+        session = self.session
+        running = session is not None and session.is_alive()
+        return {
+            "pid": os.getpid(),
+            "session": {**asdict(session.options), "model_path": str(session.options.model_path)} if running else None,
+            "clients": len(self.subscribers),
+            **self.engine.describe(),
+        }
+
+    def _handle(self, conn: Connection, command: str, args: tuple) -> bool:
+        """Traite une commande; False pour fermer la connexion."""
+        if command == "start":
+            self._start_session(conn, args[0])
+        elif command == "stop":
+            if self.session is not None:
+                self.session.stop()
+        elif command == "profile":
+            if self.session is not None and self.session.is_alive():
+                self.session.set_profiling(bool(args[0]))
+        elif command == "device":
+            if self.session is not None and self.session.is_alive():
+                self.session.switch_device(int(args[0]), str(args[1]))
+        elif command == "attach":
+            self.subscribers.setdefault(conn, threading.Lock())
+        elif command == "models":
+            self._send(conn, "models", discover_models(self.project_root))
+        elif command == "devices":
+            try:
+                # Process neuf: la session en cours garde PortAudio ouvert et sa liste figee.
+                self._send(conn, "devices", [asdict(d) for d in scan_devices()])
+            except Exception as exc:
+                self._send(conn, "error", f"Initialisation audio: {exc}")
+        elif command == "status":
+            self._send(conn, "status", self._status())
+        elif command == "shutdown":
+            self._send(conn, "status", self._status())
+            self.shutdown()
+            return False
+        else:
+            self._send(conn, "error", f"commande inconnue: {command}")
+        return True
+
+    def _serve_client(self, conn: Connection) -> None:
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    break
+                if not self._handle(conn, message[0], tuple(message[1:])):
+                    break
+        finally:
+            self.subscribers.pop(conn, None)
+            # Un client qui disparait (Ctrl+C, fermeture de la GUI) arrete sa session.
+            if self.owner is conn:
+                self.owner = None
+                if self.session is not None:
+                    self.session.stop()
+            conn.close()
+
+    def serve_forever(self) -> None:
+        address = daemon_address()
+        if sys.platform != "win32" and os.path.exists(address):
+            os.unlink(address)
+        self._key = write_authkey(self.project_root)
+        with Listener(address, authkey=self._key) as listener:
+            self.log("status", f"Demon VoxBridge a l'ecoute sur {address}")
+            while not self.stop_event.is_set():
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError, AuthenticationError) as exc:
+                    # Cle invalide ou client interrompu pendant la poignee de main.
+                    self.log("error", f"Connexion refusee: {exc}")
+                    continue
+                if self.stop_event.is_set():
+                    conn.close()
+                    break
+                threading.Thread(
+                    target=self._serve_client,
+                    args=(conn,),
+                    name="voxbridge-daemon-client",
+                    daemon=True,
+                ).start()
+
+    def shutdown(self) -> None:
+        """Arret demande par un client: reveille ``accept`` avec une connexion vide."""
+        if self.stop_event.is_set():
+            return
+        self.stop_event.set()
+        self.stop_session()
+        try:
+            Client(daemon_address(), authkey=self._key).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+
+    def remove_key(self) -> None:
+        try:
+            (self.project_root / KEY_FILENAME).unlink()
+        except OSError:
+            pass
+
+
+def parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="VoxBridge: demon qui garde whisper et la traduction charges")
+    parser.add_argument("--model", default="", help="Modele a precharger (defaut: premier modele trouve)")
+    parser.add_argument("--backend", choices=["server", "cli"], default="server", help="Backend whisper")
+    parser.add_argument("--no-gpu", action="store_true", help="Desactive CUDA")
+    parser.add_argument("--translate", action="store_true", help="Precharge aussi argostranslate")
+    parser.add_argument("--translation", choices=["process", "thread"], default="process")
+    parser.add_argument("--translation-workers", type=int, default=1)
+    parser.add_argument("--no-preload", action="store_true", help="Charge whisper a la premiere session")
+    parser.add_argument("--status", action="store_true", help="Affiche l'etat du demon en cours et quitte")
+    parser.add_argument("--shutdown", action="store_true", help="Arrete le demon en cours")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None, project_root: Path | None = None) -> int:
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    args = parse_args(argv)
+    project_root = project_root or Path(__file__).resolve().parents[1]
+
+    running = connect_daemon(project_root)
+    if args.status or args.shutdown:
+        if running is None:
+            print("Demon VoxBridge non demarre")
+            return 1
+        with running:
+            running.send(("shutdown",) if args.shutdown else ("status",))
+            _, status = running.recv()
+        for key, value in status.items():
+            print(f"{key}: {value}")
+        return 0
+    if running is not None:
+        running.close()
+        print(f"Un demon VoxBridge tourne deja ({daemon_address()})")
+        return 1
+
+    daemon = EngineDaemon(project_root)
+    if not args.no_preload:
+        model_path = resolve_model_path(project_root, args.model)
+        if model_path is None:
+            print("Erreur: aucun modele Whisper trouve dans whisper.cpp/models/")
+            return 1
+        options = RunOptions(
+            mode="traduction" if args.translate else "transcription",
+            source="device",
+            device_index=0,
+            model_path=model_path,
+            use_cuda=not args.no_gpu,
+            backend=args.backend,
+            translation=args.translation,
+            translation_workers=args.translation_workers,
+            threads=live_threads(load_config(project_root), model_path.name),
+        )
+        threading.Thread(
+            target=daemon.engine.preload,
+            args=(options, daemon.log),
+            name="voxbridge-daemon-preload",
+            daemon=True,
+        ).start()
+
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop_event.set()
+        daemon.stop_session()
+        daemon.engine.close()
+        daemon.remove_key()
+    daemon.log("status", "Demon arrete")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+﻿"""Peripheriques d'entree: enumeration hors du thread Tk et detection des branchements.
+
+PortAudio ne relit la liste des peripheriques qu'a son initialisation, qui n'a pas lieu
+tant qu'un flux est ouvert dans le process: ``DeviceMonitor`` enumere donc dans un
+process Python neuf (``python -m app.devices --json``), seulement quand une empreinte
+peu couteuse du materiel change (Linux: /proc/asound, Windows: WinMM). Module sans
+numpy ni pyaudio.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+
+WATCH_INTERVAL_SEC = 1.0  # relecture de l'empreinte materielle
+SCAN_INTERVAL_SEC = 60.0  # enumeration complete quand le systeme n'offre pas d'empreinte
+IDLE_SCAN_SEC = 300.0  # enumeration complete de securite (peripheriques hors empreinte)
+SCAN_TIMEOUT_SEC = 20.0
+
+
+@dataclass
+class DeviceInfo:
+    index: int
+    name: str
+    max_input_channels: int
+    default_sample_rate: int
+
+
+def list_input_devices() -> list[DeviceInfo]:
+    """Enumeration dans ce process (liste figee tant qu'une instance PyAudio y reste ouverte)."""
+    import pyaudio
+
+    p = pyaudio.PyAudio()
+    devices: list[DeviceInfo] = []
+    try:
+        for i in range(p.get_device_count()):
+            d = p.get_device_info_by_index(i)
+            max_in = int(d.get("maxInputChannels", 0))
+            if max_in <= 0:
+                continue
+            devices.append(
+                DeviceInfo(
+                    index=i,
+                    name=str(d.get("name", "")),
+                    max_input_channels=max_in,
+                    default_sample_rate=int(d.get("defaultSampleRate", 44100)),
+                )
+            )
+    finally:
+        p.terminate()
+    return devices
+
+
+def scan_devices(timeout: float = SCAN_TIMEOUT_SEC) -> list[DeviceInfo]:
+    """Enumeration dans un process neuf: voit les peripheriques branches depuis le demarrage."""
+    proc = subprocess.run(
+        [sys.executable, "-m", "app.devices", "--json"],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError((proc.stderr.strip().splitlines() or ["enumeration impossible"])[-1])
+    return [DeviceInfo(**d) for d in json.loads(lines[-1])]
+
+
+def _winmm_signature() -> str | None:
+    """Noms des entrees WinMM: la liste suit les branchements sans reinitialiser PortAudio."""
+    import ctypes
+    from ctypes import wintypes
+
+    class WaveInCaps(ctypes.Structure):
+        _fields_ = [
+            ("wMid", wintypes.WORD),
+            ("wPid", wintypes.WORD),
+            ("vDriverVersion", wintypes.UINT),
+            ("szPname", wintypes.WCHAR * 32),
+            ("dwFormats", wintypes.DWORD),
+            ("wChannels", wintypes.WORD),
+            ("wReserved1", wintypes.WORD),
+        ]
+
+    try:
+        winmm = ctypes.WinDLL("winmm")
+    except OSError:
+        return None
+    names = []
+    for i in range(winmm.waveInGetNumDevs()):
+        caps = WaveInCaps()
+        if winmm.waveInGetDevCapsW(i, ctypes.byref(caps), ctypes.sizeof(caps)) == 0:
+            names.append(caps.szPname)
+    return "\n".join(names)
+
+
+def hardware_signature() -> str | None:
+    """Empreinte peu couteuse des entrees audio (Linux: /proc/asound, /dev/snd; Windows: WinMM), None ailleurs."""
+    if sys.platform == "win32":
+        return _winmm_signature()
+    try:
+        cards = Path("/proc/asound/cards").read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+    try:
+        nodes = sorted(os.listdir("/dev/snd"))
+    except OSError:
+        nodes = []
+    return cards + "\n".join(nodes)
+
+
+class DeviceMonitor(threading.Thread):
+    """Garde la liste des peripheriques d'entree a jour et appelle ``on_change`` quand elle differe.
+
+    L'empreinte materielle est relue chaque seconde et declenche une enumeration des qu'elle
+    change; sans empreinte (macOS), l'enumeration est periodique. ``set_active(False)`` endort
+    le moniteur (fenetre reduite, capture en cours hors peripherique), ``refresh`` force une
+    enumeration (liste deroulee), meme endormi.
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[list[DeviceInfo]], None],
+        devices: list[DeviceInfo] | None = None,
+        on_error: Callable[[str], None] | None = None,
+        scan: Callable[[], list[DeviceInfo]] = scan_devices,
+        signature: Callable[[], str | None] = hardware_signature,
+    ) -> None:
+        super().__init__(name="voxbridge-devices", daemon=True)
+        self.on_change = on_change
+        self.on_error = on_error
+        self.devices = devices
+        self.scan = scan
+        self.signature = signature
+        self.scans = 0
+        self.active = True
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._refresh = False
+        self._last_error = ""
+
+    def refresh(self) -> None:
+        self._refresh = True
+        self._wake.set()
+
+    def set_active(self, active: bool) -> None:
+        self.active = active
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake.set()
+
+    def run(self) -> None:
+        signature = self.signature()
+        last_scan = time.monotonic() if self.devices is not None else float("-inf")
+        while not self._stop_event.is_set():
+            self._wake.clear()
+            if self.active or self._refresh:
+                current = self.signature()
+                interval = SCAN_INTERVAL_SEC if current is None else IDLE_SCAN_SEC
+                if self._refresh or current != signature or time.monotonic() - last_scan >= interval:
+                    self._refresh = False
+                    signature = current
+                    self._scan()
+                    last_scan = time.monotonic()
+            self._wake.wait(WATCH_INTERVAL_SEC if self.active else None)
+
+    def _scan(self) -> None:
+        try:
+            devices = self.scan()
+        except Exception as exc:
+            message = str(exc) or exc.__class__.__name__
+            if message != self._last_error and self.on_error is not None:
+                self.on_error(message)
+            self._last_error = message
+            return
+        self._last_error = ""
+        self.scans += 1
+        if devices != self.devices:
+            self.devices = devices
+            self.on_change(devices)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="VoxBridge: peripheriques d'entree audio")
+    parser.add_argument("--json", action="store_true", help="Une ligne JSON (utilise par DeviceMonitor)")
+    args = parser.parse_args(argv)
+    devices = list_input_devices()
+    if args.json:
+        print(json.dumps([asdict(d) for d in devices]))
+        return 0
+    for d in devices:
+        print(f"{d.index:>5} | {d.max_input_channels:>2} in | {d.default_sample_rate:>6} Hz | {d.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+﻿from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+LOG_FILENAME = "logs.jsonl"
+MAX_LOG_BYTES = 5 * 1024 * 1024
+MAX_LOG_AGE_SEC = 24 * 3600.0
+LOG_BACKUPS = 5
+LOG_QUEUE_SIZE = 1024
+STDERR_TAIL_CHARS = 4000
+
+
+class LogSink:
+    """Journal JSONL ecrit par un thread dedie, avec rotation par taille et par age.
+
+    ``write`` ne fait qu'un ``put_nowait``: si le disque ne suit pas, l'enregistrement
+    est compte dans ``dropped`` plutot que de ralentir la capture ou l'inference.
+    Rotation: ``logs.jsonl`` -> ``logs.jsonl.1`` ... ``logs.jsonl.N`` (le plus ancien supprime).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_bytes: int = MAX_LOG_BYTES,
+        max_age_sec: float = MAX_LOG_AGE_SEC,
+        backups: int = LOG_BACKUPS,
+        queue_size: int = LOG_QUEUE_SIZE,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_sec = max_age_sec
+        self.backups = backups
+        self.dropped = 0
+        self.written = 0
+        self.rotations = 0
+        self._queue: queue.Queue[dict | None] = queue.Queue(maxsize=queue_size)
+        self._thread: threading.Thread | None = None
+        self._file = None
+        self._opened_at = 0.0
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="voxbridge-log", daemon=True)
+            self._thread.start()
+
+    def write(self, record: dict[str, Any]) -> bool:
+        record.setdefault("ts", round(time.time(), 3))
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _open(self) -> None:
+        try:
+            stat = self.path.stat()
+            if stat.st_size >= self.max_bytes or time.time() - stat.st_mtime >= self.max_age_sec:
+                self._rotate_files()
+        except FileNotFoundError:
+            pass
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.time()
+
+    def _rotate_files(self) -> None:
+        rotate_files(self.path, self.backups)
+        self.rotations += 1
+
+    def _maybe_rotate(self) -> None:
+        if self._file.tell() < self.max_bytes and time.time() - self._opened_at < self.max_age_sec:
+            return
+        self._file.close()
+        self._rotate_files()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.time()
+
+    def _run(self) -> None:
+        try:
+            self._open()
+        except OSError:
+            self._file = None
+        try:
+            while True:
+                record = self._queue.get()
+                batch = [record]
+                # Tout ce qui est deja en file part dans la meme ecriture.
+                while record is not None:
+                    try:
+                        record = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    batch.append(record)
+                records = [r for r in batch if r is not None]
+                if records and self._file is not None:
+                    try:
+                        self._file.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+                        self._file.flush()
+                        self.written += len(records)
+                        self._maybe_rotate()
+                    except OSError:
+                        self.dropped += len(records)
+                if None in batch:
+                    return
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def stderr_tail(stderr: str) -> str:
+    """Fin de la sortie d'erreur (le bandeau de chargement du modele est en tete)."""
+    stderr = stderr.strip()
+    return stderr[-STDERR_TAIL_CHARS:]
+
+
+def rotate_files(path: Path, backups: int) -> None:
+    """``path`` -> ``path.1`` ... ``path.N`` (le plus ancien supprime)."""
+    for i in range(backups - 1, 0, -1):
+        older = path.with_name(f"{path.name}.{i}")
+        if older.exists():
+            os.replace(older, path.with_name(f"{path.name}.{i + 1}"))
+    if backups > 0:
+        os.replace(path, path.with_name(f"{path.name}.1"))
+    else:
+        path.unlink()
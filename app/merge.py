@@ -0,0 +1,84 @@
+﻿from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+
+MAX_OVERLAP_WORDS = 12
+MISMATCH_PER_WORDS = 4
+
+_NORMALIZE = re.compile(r"[^\w']+")
+
+
+@dataclass
+class Word:
+    text: str
+    start: float
+    end: float
+
+
+def normalize_word(word: str) -> str:
+    return _NORMALIZE.sub("", word.lower())
+
+
+def group_words(pieces: list[tuple[str, float, float]]) -> list[Word]:
+    """Regroupe des tokens whisper (texte, debut, fin) en mots separes par des espaces."""
+    words: list[Word] = []
+    for text, start, end in pieces:
+        if not text or text.startswith("[_"):
+            continue
+        if words and not text[0].isspace():
+            words[-1].text += text
+            words[-1].end = end
+            continue
+        stripped = text.strip()
+        if stripped:
+            words.append(Word(stripped, start, end))
+    return words
+
+
+class TranscriptMerger:
+    """Aligne la fin de l'hypothese precedente avec le debut de la nouvelle.
+
+    Seuls les mots qui ne recouvrent pas deja le texte emis sont renvoyes.
+    Les timestamps de mots, quand whisper les fournit, servent de repli si
+    aucun alignement textuel n'est trouve dans la zone de recouvrement audio.
+    """
+
+    def __init__(self, max_overlap_words: int = MAX_OVERLAP_WORDS) -> None:
+        self.max_overlap_words = max_overlap_words
+        self.tail: list[str] = []
+        self.last_text = ""
+        self.dropped_words = 0
+
+    def _align(self, tokens: list[str]) -> int:
+        tail = self.tail
+        longest = min(len(tail), len(tokens), self.max_overlap_words)
+        for k in range(longest, 0, -1):
+            mismatches = sum(1 for a, b in zip(tail[-k:], tokens[:k]) if a != b)
+            if mismatches <= k // MISMATCH_PER_WORDS and tail[-1] == tokens[k - 1]:
+                return k
+        return 0
+
+    def duplicate_count(self, text: str, words: list[Word] | None = None, overlap_sec: float = 0.0) -> int:
+        """Nombre de mots en tete de ``text`` deja emis (sans modifier l'etat)."""
+        raw_tokens = text.split()
+        if not raw_tokens:
+            return 0
+        if overlap_sec <= 0:
+            return len(raw_tokens) if text == self.last_text else 0
+
+        duplicate = self._align([normalize_word(t) for t in raw_tokens])
+        if duplicate == 0 and words:
+            duplicate = sum(1 for w in words if (w.start + w.end) / 2 < overlap_sec)
+        return min(duplicate, len(raw_tokens))
+
+    def accept(self, text: str, duplicate: int) -> None:
+        self.last_text = text
+        self.tail = [normalize_word(t) for t in text.split()][-self.max_overlap_words :]
+        self.dropped_words += duplicate
+
+    def merge(self, text: str, words: list[Word] | None = None, overlap_sec: float = 0.0) -> str:
+        duplicate = self.duplicate_count(text, words, overlap_sec)
+        self.accept(text, duplicate)
+        return " ".join(text.split()[duplicate:])
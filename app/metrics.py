@@ -0,0 +1,182 @@
+﻿from __future__ import annotations
+
+import json
+import threading
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 4.0)
+QUANTILE_WINDOW = 1000
+PREFIX = "voxbridge_"
+
+
+def _split_name(name: str) -> tuple[str, str]:
+    """``stage_seconds{stage="x"}`` -> (``stage_seconds``, ``stage="x"``)."""
+    if name.endswith("}") and "{" in name:
+        base, labels = name[:-1].split("{", 1)
+        return base, labels
+    return name, ""
+
+
+def _with_label(base: str, labels: str, extra: str = "") -> str:
+    parts = ",".join(p for p in (labels, extra) if p)
+    return f"{base}{{{parts}}}" if parts else base
+
+
+class Histogram:
+    """Compteurs cumulatifs par bucket (Prometheus) + fenetre recente pour les quantiles."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS, window: int = QUANTILE_WINDOW) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.recent.append(value)
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            values = sorted(self.recent)
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(len(values) * q))]
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """Compteurs, jauges et histogrammes du worker, lisibles depuis n'importe quel thread."""
+
+    def __init__(self) -> None:
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0.0) + value
+
+    def set(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def histogram(self, name: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram(buckets)
+            return hist
+
+    def register(self, name: str, hist: Histogram) -> None:
+        with self._lock:
+            self.histograms[name] = hist
+
+    def observe(self, name: str, value: float) -> None:
+        self.histogram(name).observe(value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = dict(self.histograms)
+        return {
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": {name: hist.snapshot() for name, hist in histograms.items()},
+        }
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items())
+        lines = []
+        typed: set[str] = set()
+
+        def declare(base: str, kind: str) -> None:
+            if base not in typed:
+                typed.add(base)
+                lines.append(f"# TYPE {PREFIX}{base} {kind}")
+
+        for name, value in counters:
+            declare(_split_name(name)[0], "counter")
+            lines.append(f"{PREFIX}{name} {value:.10g}")
+        for name, value in gauges:
+            declare(_split_name(name)[0], "gauge")
+            lines.append(f"{PREFIX}{name} {value:.10g}")
+        for name, hist in histograms:
+            base, labels = _split_name(name)
+            declare(base, "histogram")
+            with hist._lock:
+                counts = list(hist.counts)
+                total, count = hist.sum, hist.count
+            cumulative = 0
+            for bound, bucket in zip(list(hist.buckets) + ["+Inf"], counts):
+                cumulative += bucket
+                le = f'le="{bound:g}"' if bound != "+Inf" else 'le="+Inf"'
+                lines.append(f"{PREFIX}{_with_label(base + '_bucket', labels, le)} {cumulative}")
+            lines.append(f"{PREFIX}{_with_label(base + '_sum', labels)} {total:.10g}")
+            lines.append(f"{PREFIX}{_with_label(base + '_count', labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Point d'acces HTTP local: ``/metrics`` (format Prometheus) et ``/metrics.json``."""
+
+    def __init__(self, metrics: Metrics, port: int, host: str = "127.0.0.1") -> None:
+        self.metrics = metrics
+        registry = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path.startswith("/metrics.json"):
+                    body = json.dumps(registry.snapshot(), indent=2).encode("utf-8")
+                    content_type = "application/json"
+                elif self.path.startswith("/metrics"):
+                    body = registry.render_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:  # noqa: A002
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="voxbridge-metrics", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
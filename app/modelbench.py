@@ -0,0 +1,357 @@
+﻿"""Banc d'essai des modeles whisper sur cette machine: ``python -m app.modelbench``.
+
+Chaque modele de ``whisper.cpp/models`` est charge puis decode un extrait de reference;
+les mesures sont gardees dans ``.voxbridge_modelbench.json``, invalidees si le fichier
+du modele change (taille, date, empreinte).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from .audio import WHISPER_RATE
+from .backends import WARMUP_SEC, WhisperBackend
+from .batch import load_audio
+from .config import load_config, save_config
+from .core import RunOptions, discover_models, start_backend
+from .merge import normalize_word
+from .segmenter import MAX_SEGMENT_SEC
+
+
+CACHE_FILENAME = ".voxbridge_modelbench.json"
+REFERENCE_CLIP = Path("whisper.cpp") / "samples" / "jfk.wav"
+REFERENCE_TEXT = (
+    "And so my fellow Americans, ask not what your country can do for you, ask what you can do for your country."
+)
+DEFAULT_TARGET_LATENCY_SEC = 1.0
+DEFAULT_RUNS = 2
+HASH_BLOCK = 1 << 20
+TIERS = (("tiny", 1), ("base", 2), ("small", 3), ("medium", 4), ("large", 5))
+QUANTIZED_PENALTY = 0.25
+
+
+@dataclass
+class ModelResult:
+    model: str
+    ok: bool
+    backend: str = ""
+    load_sec: float = 0.0
+    rtf: float = 0.0
+    latency_p95: float = 0.0  # decodage d'un segment de MAX_SEGMENT_SEC
+    rss_mb: float = 0.0  # 0: non mesure (whisper-cli, hors Linux)
+    wer: float | None = None
+    text: str = ""
+    error: str = ""
+    measured_at: float = 0.0
+
+    def describe(self) -> str:
+        if not self.ok:
+            return f"echec: {self.error}"
+        parts = [
+            f"chargement {self.load_sec:.1f}s",
+            f"RTF {self.rtf:.2f}",
+            f"latence segment {self.latency_p95:.2f}s",
+        ]
+        if self.rss_mb:
+            parts.append(f"{self.rss_mb:.0f} Mo")
+        if self.wer is not None:
+            parts.append(f"WER {self.wer:.0%}")
+        return ", ".join(parts)
+
+
+def model_rank(name: str) -> float:
+    """Precision attendue d'apres le nom (tiny < base < ... < large; quantifie un peu moins)."""
+    name = name.lower()
+    rank = next((value for tier, value in TIERS if tier in name), 0)
+    if "turbo" in name:
+        rank -= 0.5
+    if "-q" in name:
+        rank -= QUANTIZED_PENALTY
+    return rank
+
+
+def file_fingerprint(path: Path) -> dict:
+    """Taille, date et empreinte du premier et du dernier Mo (un modele large fait plusieurs Go)."""
+    stat = path.stat()
+    digest = hashlib.sha256(str(stat.st_size).encode("ascii"))
+    with open(path, "rb") as f:
+        digest.update(f.read(HASH_BLOCK))
+        if stat.st_size > 2 * HASH_BLOCK:
+            f.seek(-HASH_BLOCK, 2)
+            digest.update(f.read(HASH_BLOCK))
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref = [w for w in map(normalize_word, reference.split()) if w]
+    hyp = [w for w in map(normalize_word, hypothesis.split()) if w]
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def _cache_key(model: str, backend: str, use_cuda: bool) -> str:
+    return f"{model}|{backend}|{'cuda' if use_cuda else 'cpu'}"
+
+
+def load_cache(project_root: Path) -> dict:
+    try:
+        return json.loads((project_root / CACHE_FILENAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(project_root: Path, cache: dict) -> None:
+    path = project_root / CACHE_FILENAME
+    path.write_text(json.dumps(cache, indent=2, ensure_ascii=True), encoding="utf-8")
+
+
+def _result_from(data: dict) -> ModelResult:
+    known = {f.name for f in fields(ModelResult)}
+    return ModelResult(**{k: v for k, v in data.items() if k in known})
+
+
+def cached_result(
+    project_root: Path,
+    cache: dict,
+    model: str,
+    backend: str,
+    use_cuda: bool,
+    clip: dict | None = None,
+) -> ModelResult | None:
+    """Mesure en cache si le modele (et l'extrait, si donne) n'ont pas change depuis."""
+    entry = cache.get(_cache_key(model, backend, use_cuda))
+    path = project_root / "whisper.cpp" / "models" / model
+    if entry is None or not path.exists():
+        return None
+    stat = path.stat()
+    saved = entry.get("model", {})
+    if saved.get("size") != stat.st_size or saved.get("mtime_ns") != stat.st_mtime_ns:
+        # Date changee (copie, restauration): l'empreinte tranche.
+        if saved.get("size") != stat.st_size or saved.get("sha256") != file_fingerprint(path)["sha256"]:
+            return None
+    if clip is not None and entry.get("clip") != clip:
+        return None
+    return _result_from(entry["result"])
+
+
+def _peak_rss_mb(backend: WhisperBackend) -> float:
+    process = getattr(backend, "process", None)
+    if process is None:
+        return 0.0
+    try:
+        for line in Path(f"/proc/{process.pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024.0
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0.0
+
+
+def benchmark_model(
+    project_root: Path,
+    options: RunOptions,
+    clip: np.ndarray,
+    reference: str = "",
+    runs: int = DEFAULT_RUNS,
+) -> ModelResult:
+    """Charge le modele, decode l'extrait entier (RTF, WER) puis par segments de MAX_SEGMENT_SEC (latence)."""
+    model = options.model_path.name
+    errors: list[str] = []
+
+    def on_backend_event(kind: str, message: str) -> None:
+        # Le repli serveur -> whisper-cli n'est qu'un status; le backend retenu est note dans le resultat.
+        if kind == "error":
+            errors.append(message)
+
+    started = time.perf_counter()
+    backend = start_backend(project_root, options, on_backend_event)
+    if backend is None:
+        return ModelResult(model, False, options.backend, error="; ".join(errors), measured_at=time.time())
+    try:
+        if backend.name == "cli":
+            # whisper-cli recharge le modele a chaque appel: le premier decodage court en donne le cout.
+            backend.transcribe(np.zeros(int(WHISPER_RATE * WARMUP_SEC), dtype=np.float32))
+        load_sec = time.perf_counter() - started
+
+        audio_sec = clip.size / WHISPER_RATE
+        timings = []
+        text = ""
+        for _ in range(max(1, runs)):
+            t0 = time.perf_counter()
+            result = backend.transcribe(clip)
+            timings.append(time.perf_counter() - t0)
+            if not result.ok:
+                return ModelResult(model, False, backend.name, error=result.stderr.strip(), measured_at=time.time())
+            text = result.text
+
+        step = int(WHISPER_RATE * MAX_SEGMENT_SEC)
+        latencies = []
+        for pos in range(0, clip.size, step):
+            t0 = time.perf_counter()
+            result = backend.transcribe(clip[pos : pos + step])
+            latencies.append(time.perf_counter() - t0)
+            if not result.ok:
+                return ModelResult(model, False, backend.name, error=result.stderr.strip(), measured_at=time.time())
+        latencies.sort()
+        return ModelResult(
+            model,
+            True,
+            backend.name,
+            load_sec=round(load_sec, 3),
+            rtf=round(sorted(timings)[len(timings) // 2] / audio_sec, 4),
+            latency_p95=round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4),
+            rss_mb=round(_peak_rss_mb(backend), 1),
+            wer=round(word_error_rate(reference, text), 4) if reference else None,
+            text=text,
+            measured_at=time.time(),
+        )
+    finally:
+        backend.close()
+
+
+def run_benchmark(
+    project_root: Path,
+    models: list[str],
+    options: RunOptions,
+    clip_path: Path,
+    reference: str = "",
+    runs: int = DEFAULT_RUNS,
+    force: bool = False,
+    progress: Callable[[ModelResult, bool], None] | None = None,
+) -> list[ModelResult]:
+    """Mesure chaque modele (ou reprend le cache); ``progress(resultat, depuis_le_cache)``."""
+    clip_info = file_fingerprint(clip_path)
+    clip = None
+    cache = load_cache(project_root)
+    results = []
+    for model in models:
+        result = None
+        if not force:
+            result = cached_result(project_root, cache, model, options.backend, options.use_cuda, clip_info)
+        from_cache = result is not None
+        if result is None:
+            if clip is None:
+                clip = load_audio(clip_path).astype(np.float32) / 32768.0
+            path = project_root / "whisper.cpp" / "models" / model
+            result = benchmark_model(project_root, replace(options, model_path=path), clip, reference, runs)
+            if result.ok:
+                cache[_cache_key(model, options.backend, options.use_cuda)] = {
+                    "model": file_fingerprint(path),
+                    "clip": clip_info,
+                    "result": asdict(result),
+                }
+                save_cache(project_root, cache)
+        results.append(result)
+        if progress is not None:
+            progress(result, from_cache)
+    return results
+
+
+def recommend(results: list[ModelResult], target_latency: float) -> tuple[ModelResult | None, bool]:
+    """Modele le plus precis dont la latence tient la cible; sinon le plus rapide (False)."""
+    ok = [r for r in results if r.ok]
+    if not ok:
+        return None, False
+    eligible = [r for r in ok if r.latency_p95 <= target_latency]
+    if not eligible:
+        return min(ok, key=lambda r: r.latency_p95), False
+
+    def accuracy(r: ModelResult) -> tuple:
+        return (r.wer if r.wer is not None else 0.0, -model_rank(r.model), r.latency_p95)
+
+    return min(eligible, key=accuracy), True
+
+
+def default_clip(project_root: Path) -> tuple[Path, str]:
+    return project_root / REFERENCE_CLIP, REFERENCE_TEXT
+
+
+def parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="VoxBridge: mesure les modeles whisper et choisit le plus adapte")
+    parser.add_argument("models", nargs="*", help="Modeles a mesurer (defaut: tous ceux de whisper.cpp/models)")
+    parser.add_argument("--clip", type=Path, default=None, help=f"Extrait de reference (defaut: {REFERENCE_CLIP})")
+    parser.add_argument("--reference", default=None, help="Texte attendu de l'extrait (active le WER)")
+    parser.add_argument("--backend", choices=["server", "cli"], default="server", help="Backend whisper")
+    parser.add_argument("--no-gpu", action="store_true", help="Desactive CUDA")
+    parser.add_argument(
+        "--target-latency",
+        type=float,
+        default=DEFAULT_TARGET_LATENCY_SEC,
+        help=f"Latence max (s) pour decoder un segment de {MAX_SEGMENT_SEC:.0f} s",
+    )
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Decodages de l'extrait entier par modele")
+    parser.add_argument("--force", action="store_true", help="Ignore les mesures en cache")
+    parser.add_argument("--apply", action="store_true", help="Enregistre le modele recommande dans app_config.json")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None, project_root: Path | None = None) -> int:
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    args = parse_args(argv)
+    project_root = project_root or Path(__file__).resolve().parents[1]
+    available = discover_models(project_root)
+    models = args.models or available
+    missing = [m for m in models if m not in available]
+    if not models or missing:
+        print(f"Erreur: modele introuvable dans whisper.cpp/models/: {', '.join(missing) or 'aucun modele'}")
+        return 1
+    clip_path, reference = default_clip(project_root)
+    if args.clip is not None:
+        clip_path, reference = args.clip, ""
+    if args.reference is not None:
+        reference = args.reference
+    if not clip_path.exists():
+        print(f"Erreur: extrait de reference introuvable: {clip_path} (--clip)")
+        return 1
+
+    options = RunOptions(
+        mode="transcription",
+        source="file",
+        device_index=0,
+        model_path=project_root / "whisper.cpp" / "models" / models[0],
+        use_cuda=not args.no_gpu,
+        backend=args.backend,
+    )
+    print(f"Extrait: {clip_path}, cible {args.target_latency:.2f}s par segment de {MAX_SEGMENT_SEC:.0f} s")
+
+    def progress(result: ModelResult, from_cache: bool) -> None:
+        print(f"{result.model}: {result.describe()}" + (" (cache)" if from_cache else ""), flush=True)
+
+    try:
+        results = run_benchmark(project_root, models, options, clip_path, reference, args.runs, args.force, progress)
+    except (RuntimeError, OSError, EOFError, ValueError) as exc:
+        print(f"Erreur audio: {exc}")
+        return 1
+    best, meets = recommend(results, args.target_latency)
+    if best is None:
+        print("Aucun modele n'a pu etre mesure")
+        return 1
+    if meets:
+        print(f"Recommande: {best.model} (le plus precis sous {args.target_latency:.2f}s)")
+    else:
+        print(f"Aucun modele sous {args.target_latency:.2f}s; le plus rapide: {best.model}")
+    if args.apply:
+        cfg = load_config(project_root)
+        save_config(project_root, replace(cfg, model_name=best.model))
+        print(f"app_config.json: model_name = {best.model}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
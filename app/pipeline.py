@@ -0,0 +1,204 @@
+﻿from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+
+STOP = object()
+
+
+class BoundedQueue:
+    def __init__(self, name: str, maxsize: int) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.high_water = 0
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def _track(self) -> None:
+        size = self._queue.qsize()
+        if size > self.high_water:
+            self.high_water = size
+
+    def put_nowait(self, item: Any) -> bool:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self._track()
+        return True
+
+    def put(self, item: Any, stop_event: threading.Event) -> bool:
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+            except queue.Full:
+                if stop_event.is_set():
+                    self.dropped += 1
+                    return False
+                continue
+            self._track()
+            return True
+
+    def put_stop(self, stop_event: threading.Event) -> None:
+        """Marqueur de fin: attend une place en fin de flux, n'evince des elements que sur arret demande."""
+        while True:
+            try:
+                self._queue.put(STOP, timeout=0.1)
+                return
+            except queue.Full:
+                if not stop_event.is_set():
+                    continue
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float | None = None) -> Any:
+        return self._queue.get(timeout=timeout)
+
+    def take_if(self, predicate: Callable[[Any], bool]) -> Any | None:
+        """Retire la tete de file si ``predicate`` l'accepte (sans attendre), sinon None."""
+        q = self._queue
+        with q.mutex:
+            if not q.queue or q.queue[0] is STOP or not predicate(q.queue[0]):
+                return None
+            item = q.queue.popleft()
+            q.not_full.notify()
+        return item
+
+
+@dataclass
+class CaptureStats:
+    captured_frames: int = 0
+    dropped_frames: int = 0
+    overflow_events: int = 0
+    stale_segments: int = 0
+
+    def snapshot(self) -> dict[str, int]:
+        return asdict(self)
+
+
+@dataclass
+class TextEvent:
+    kind: str
+    text: str
+    audio_end_at: float | None = None
+    translation: Future | None = None
+    pause: bool = False
+    segment: int | None = None
+
+
+class SourceStage(threading.Thread):
+    """Appelle ``poll`` en boucle et pousse les elements produits dans ``outbox``.
+
+    Si ``exhausted`` renvoie True alors que ``poll`` ne produit plus rien (source finie),
+    STOP est propage: les etages suivants terminent leur travail puis s'arretent.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        outbox: BoundedQueue,
+        poll: Callable[[], list[Any]],
+        stop_event: threading.Event,
+        on_error: Callable[[str, Exception], None],
+        idle_sec: float,
+        exhausted: Callable[[], bool] | None = None,
+    ) -> None:
+        super().__init__(name=f"voxbridge-{name}", daemon=True)
+        self.stage_name = name
+        self.outbox = outbox
+        self.poll = poll
+        self.exhausted = exhausted
+        self.stop_event = stop_event
+        self.on_error = on_error
+        self.idle_sec = idle_sec
+        self.processed = 0
+
+    def run(self) -> None:
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    items = self.poll()
+                except Exception as exc:
+                    self.on_error(self.stage_name, exc)
+                    items = []
+                if not items:
+                    if self.exhausted is not None and self.exhausted():
+                        return
+                    self.stop_event.wait(self.idle_sec)
+                    continue
+                for item in items:
+                    self.processed += 1
+                    self.outbox.put(item, self.stop_event)
+        finally:
+            self.outbox.put_stop(self.stop_event)
+
+
+class PipelineStage(threading.Thread):
+    """Consomme ``inbox``, applique ``handler`` et pousse le resultat dans ``outbox``.
+
+    ``handler`` peut renvoyer None (rien a transmettre) ou une liste d'elements.
+    ``idle``, s'il est fourni, est appele quand ``inbox`` reste vide (echeances).
+    Le marqueur STOP est propage a l'etage suivant puis le thread se termine.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        inbox: BoundedQueue,
+        outbox: BoundedQueue | None,
+        handler: Callable[[Any], Any],
+        stop_event: threading.Event,
+        on_error: Callable[[str, Exception], None],
+        idle: Callable[[], Any] | None = None,
+    ) -> None:
+        super().__init__(name=f"voxbridge-{name}", daemon=True)
+        self.stage_name = name
+        self.inbox = inbox
+        self.outbox = outbox
+        self.handler = handler
+        self.stop_event = stop_event
+        self.on_error = on_error
+        self.idle = idle
+        self.processed = 0
+
+    def _forward(self, result: Any) -> None:
+        if result is None or self.outbox is None:
+            return
+        for out in result if isinstance(result, list) else [result]:
+            self.outbox.put(out, self.stop_event)
+
+    def run(self) -> None:
+        while True:
+            try:
+                item = self.inbox.get(timeout=0.1)
+            except queue.Empty:
+                if self.idle is not None and not self.stop_event.is_set():
+                    try:
+                        self._forward(self.idle())
+                    except Exception as exc:
+                        self.on_error(self.stage_name, exc)
+                continue
+            if item is STOP:
+                if self.outbox is not None:
+                    self.outbox.put_stop(self.stop_event)
+                return
+            if self.stop_event.is_set():
+                continue
+
+            try:
+                result = self.handler(item)
+            except Exception as exc:
+                self.on_error(self.stage_name, exc)
+                continue
+            self.processed += 1
+            self._forward(result)
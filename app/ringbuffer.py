@@ -0,0 +1,111 @@
+﻿from __future__ import annotations
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+HEADER_SLOTS = 4
+SLOT_WRITTEN = 0
+SLOT_OVERFLOWS = 1
+
+
+class PcmRingBuffer:
+    """Tampon circulaire int16 preallouee, eventuellement en memoire partagee.
+
+    Les donnees sont ecrites deux fois (position ``i`` et ``i + capacity``) pour
+    que toute fenetre de moins de ``capacity`` frames soit contigue: ``view``
+    renvoie donc toujours une vue NumPy sans copie. Un seul ecrivain est suppose;
+    le compteur ``written`` est publie apres les donnees.
+    """
+
+    def __init__(self, capacity: int, channels: int, shared: bool = False, name: str | None = None) -> None:
+        self.capacity = capacity
+        self.channels = channels
+        self._shm: shared_memory.SharedMemory | None = None
+        self._owner = False
+
+        data_bytes = 2 * capacity * channels * np.dtype(np.int16).itemsize
+        header_bytes = HEADER_SLOTS * np.dtype(np.int64).itemsize
+        if shared or name is not None:
+            if name is None:
+                self._shm = shared_memory.SharedMemory(create=True, size=header_bytes + data_bytes)
+                self._owner = True
+            else:
+                self._shm = shared_memory.SharedMemory(name=name)
+            raw = self._shm.buf
+            self._header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=raw)
+            self._data = np.ndarray((2 * capacity, channels), dtype=np.int16, buffer=raw, offset=header_bytes)
+            if self._owner:
+                self._header[:] = 0
+        else:
+            self._header = np.zeros(HEADER_SLOTS, dtype=np.int64)
+            self._data = np.zeros((2 * capacity, channels), dtype=np.int16)
+
+    @classmethod
+    def attach(cls, name: str, capacity: int, channels: int) -> PcmRingBuffer:
+        return cls(capacity, channels, name=name)
+
+    @property
+    def name(self) -> str | None:
+        return self._shm.name if self._shm is not None else None
+
+    @property
+    def written(self) -> int:
+        return int(self._header[SLOT_WRITTEN])
+
+    @property
+    def overflow_events(self) -> int:
+        return int(self._header[SLOT_OVERFLOWS])
+
+    def add_overflow(self) -> None:
+        self._header[SLOT_OVERFLOWS] += 1
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.written - self.capacity)
+
+    def write(self, data: bytes | np.ndarray) -> None:
+        frames = np.frombuffer(data, dtype=np.int16) if not isinstance(data, np.ndarray) else data
+        frames = frames.reshape(-1, self.channels)
+        total = frames.shape[0]
+        written = self.written
+        if total > self.capacity:
+            # Seule la fin tient dans le tampon, mais le compteur avance de tout le bloc (temps reel).
+            frames = frames[-self.capacity :]
+            written += total - self.capacity
+        count = frames.shape[0]
+        pos = written % self.capacity
+
+        first = min(count, self.capacity - pos)
+        self._data[pos : pos + first] = frames[:first]
+        self._data[pos + self.capacity : pos + self.capacity + first] = frames[:first]
+        rest = count - first
+        if rest:
+            self._data[:rest] = frames[first:]
+            self._data[self.capacity : self.capacity + rest] = frames[first:]
+        self._header[SLOT_WRITTEN] = written + count
+
+    def is_valid(self, start: int) -> bool:
+        return start >= self.oldest
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        if end - start > self.capacity:
+            raise ValueError("Fenetre plus grande que le tampon circulaire")
+        if not self.is_valid(start) or end > self.written:
+            raise IndexError(f"Frames [{start}, {end}) hors du tampon")
+        pos = start % self.capacity
+        return self._data[pos : pos + end - start]
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self._header = np.zeros(HEADER_SLOTS, dtype=np.int64)
+        self._data = np.zeros((0, self.channels), dtype=np.int16)
+        try:
+            self._shm.close()
+        except BufferError:
+            pass
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
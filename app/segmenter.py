@@ -0,0 +1,180 @@
+﻿from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .ringbuffer import PcmRingBuffer
+from .vad import Vad, frame_energies_db
+
+
+TRAILING_SILENCE_SEC = 0.20
+MAX_SEGMENT_SEC = 3.0
+OVERLAP_SEC = 0.35
+SPLIT_SEARCH_SEC = 1.0
+SPLIT_FRAME_SEC = 0.010
+SPLIT_SMOOTH_FRAMES = 3
+
+
+@dataclass
+class SegmenterStats:
+    decoded_frames: int = 0
+    overlap_frames: int = 0
+    forced_cuts: int = 0
+    pause_cuts: int = 0
+
+
+@dataclass
+class Segment:
+    index: int
+    start: int
+    end: int
+    pcm: np.ndarray
+    rate: int
+    channels: int
+    closed_at: float = field(default_factory=time.monotonic)
+    forced: bool = False
+    final: bool = True
+    overlap: int = 0
+    samples: np.ndarray | None = None
+    captured_at: float | None = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start) / self.rate
+
+    @property
+    def overlap_sec(self) -> float:
+        return self.overlap / self.rate
+
+
+class Segmenter:
+    def __init__(
+        self,
+        ring: PcmRingBuffer,
+        rate: int,
+        chunk: int,
+        vad: Vad,
+        split_search_sec: float = SPLIT_SEARCH_SEC,
+    ) -> None:
+        self.ring = ring
+        self.rate = rate
+        self.chunk = chunk
+        self.vad = vad
+        self.stats = SegmenterStats()
+        self.preroll_frames = int(rate * vad.preroll_sec)
+        self.split_search_frames = int(rate * split_search_sec)
+        self.split_frame = max(1, int(rate * SPLIT_FRAME_SEC))
+        self.configure(MAX_SEGMENT_SEC, OVERLAP_SEC, TRAILING_SILENCE_SEC)
+        self.next_index = 0
+        self._last_end = 0
+        self._carry_start: int | None = None
+        self._reset()
+
+    def configure(self, max_segment_sec: float, overlap_sec: float, trailing_silence_sec: float) -> None:
+        """Longueurs de decoupe (arrondies au bloc); modifiables en cours de capture."""
+        rate, chunk = self.rate, self.chunk
+        self.max_segment_frames = max(1, int(rate * max_segment_sec / chunk)) * chunk
+        self.overlap_frames = max(0, int(rate * overlap_sec / chunk)) * chunk
+        self.silence_chunks = max(1, int(rate * trailing_silence_sec / chunk))
+
+    def _reset(self) -> None:
+        self.start: int | None = self._carry_start
+        self.end = self.start if self.start is not None else 0
+        self._carry_start = None
+        self.heard_voice = False
+        self.silence_counter = 0
+
+    def resync(self) -> None:
+        self._carry_start = None
+        self._reset()
+
+    def feed(self, start: int, end: int) -> Segment | None:
+        is_voice = self.vad.is_speech(self.ring.view(start, end))
+
+        if is_voice:
+            self.heard_voice = True
+            self.silence_counter = 0
+        elif self.heard_voice:
+            self.silence_counter += 1
+
+        if self.heard_voice or self.start is not None:
+            if self.start is None:
+                self.start = max(start - self.preroll_frames, self._last_end, self.ring.oldest)
+            self.end = end
+
+        if self.start is not None and self.end - self.start >= self.max_segment_frames:
+            return self._close(force_split=True)
+        if self.heard_voice and self.silence_counter >= self.silence_chunks:
+            return self._close(force_split=False)
+        return None
+
+    def find_split(self, start: int, end: int) -> tuple[int, bool]:
+        """Point d'energie minimale dans la fin du segment, et s'il tombe dans une pause."""
+        # Fenetre bornee au tiers du segment: un segment court ne reporte pas la moitie de son audio.
+        lo = max(start + 2 * (end - start) // 3, end - self.split_search_frames)
+        energies = frame_energies_db(self.ring.view(lo, end), self.split_frame)
+        if energies.size == 0:
+            return end, False
+        if energies.size >= SPLIT_SMOOTH_FRAMES:
+            kernel = np.ones(SPLIT_SMOOTH_FRAMES, dtype=np.float32) / SPLIT_SMOOTH_FRAMES
+            energies = np.convolve(energies, kernel, mode="same")
+        valley = int(np.argmin(energies))
+        cut = lo + valley * self.split_frame + self.split_frame // 2
+        return cut, self.vad.is_pause(float(energies[valley]))
+
+    def partial(self, min_frames: int) -> Segment | None:
+        """Vue provisoire du segment en cours (fenetre croissante, bornee par la longueur max)."""
+        if not self.heard_voice or self.start is None or self.end - self.start < min_frames:
+            return None
+        return Segment(
+            index=self.next_index,
+            start=self.start,
+            end=self.end,
+            pcm=self.ring.view(self.start, self.end),
+            rate=self.rate,
+            channels=self.ring.channels,
+            final=False,
+            overlap=max(0, self._last_end - self.start),
+        )
+
+    def finish(self) -> Segment | None:
+        """Fin de la source: ferme le segment en cours."""
+        return self._close(force_split=False)
+
+    def _close(self, force_split: bool) -> Segment | None:
+        start, end = self.start, self.end
+        heard_voice = self.heard_voice
+        tail_end = end
+        overlap = max(0, self._last_end - start) if start is not None else 0
+        if heard_voice and force_split and start is not None:
+            end, pause = self.find_split(start, end)
+            overlap = 0 if pause else min(self.overlap_frames, end - start - 1)
+            self._carry_start = end - overlap
+            self.stats.forced_cuts += 1
+            self.stats.pause_cuts += int(pause)
+            self.stats.overlap_frames += overlap
+        self._last_end = end
+        self._reset()
+        if self.start is not None:
+            self.end = tail_end
+            self.heard_voice = tail_end > end
+        if not heard_voice or start is None:
+            return None
+        if not self.vad.accept_segment(self.ring.view(start, end)):
+            return None
+        self.stats.decoded_frames += end - start
+
+        segment = Segment(
+            index=self.next_index,
+            start=start,
+            end=end,
+            pcm=self.ring.view(start, end),
+            rate=self.rate,
+            channels=self.ring.channels,
+            forced=force_split,
+            overlap=overlap,
+        )
+        self.next_index += 1
+        return segment
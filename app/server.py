@@ -0,0 +1,492 @@
+﻿"""Serveur multi-sessions: plusieurs postes partagent un pool de backends whisper (``python -m app.server``).
+
+Protocole TCP, une connexion par session:
+
+- client -> serveur: une ligne JSON ``{"rate": 48000, "channels": 1, "translate": false, "name": "poste-3"}``
+  puis du PCM16 little-endian entrelace. Fermer l'envoi (EOF) termine la session.
+- serveur -> client: une ligne JSON par evenement ``{"kind", "text", "translation", "audio_end", "latency"}``;
+  le dernier evenement est ``{"kind": "end", ...}`` avec les statistiques de la session.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .audio import Resampler
+from .backends import WhisperBackend, WhisperResult
+from .cli import resolve_model_path
+from .core import RunOptions, start_backend
+from .merge import TranscriptMerger
+from .metrics import RTF_BUCKETS, Histogram, Metrics, MetricsServer
+from .ringbuffer import PcmRingBuffer
+from .segmenter import Segment, Segmenter
+from .sources import CHUNK, END_PADDING_SEC
+from .translation import SentenceAggregator, TranslationService
+from .vad import create_vad
+
+
+DEFAULT_PORT = 8765
+DEFAULT_BACKENDS = 2
+SESSION_BACKLOG = 4  # segments en attente par session; au-dela, le plus ancien est abandonne
+SESSION_RING_SEC = 30.0
+HEADER_TIMEOUT_SEC = 10.0
+MAX_RATE = 192000
+MAX_CHANNELS = 8
+IDLE_POLL_SEC = 0.25
+
+
+@dataclass
+class OutEvent:
+    kind: str
+    text: str
+    audio_end: float
+    captured_at: float | None = None
+    translation: asyncio.Future | None = None
+    extra: dict = field(default_factory=dict)
+
+
+class Session:
+    """Etat d'une connexion: segmentation locale, fusion des recouvrements, file d'envoi ordonnee."""
+
+    def __init__(self, sid: int, name: str, rate: int, channels: int, translate: bool, vad: str, split_sec: float):
+        self.sid = sid
+        self.name = name
+        self.rate = rate
+        self.channels = channels
+        self.ring = PcmRingBuffer(int(rate * SESSION_RING_SEC), channels)
+        self.segmenter = Segmenter(self.ring, rate, CHUNK, create_vad(vad, rate), split_sec)
+        self.resampler = Resampler(rate, channels)
+        self.merger = TranscriptMerger()
+        self.aggregator = SentenceAggregator() if translate else None
+        self.pending: deque[Segment] = deque()
+        self.busy = False
+        self.outbox: asyncio.Queue[OutEvent | None] = asyncio.Queue()
+        self.latency = Histogram()
+        self.started = time.monotonic()
+        self.segments = 0
+        self.dropped = 0
+        self.failures = 0
+        self.last_audio_end = 0.0
+        self._read_pos = 0
+        self._partial = b""
+
+    @property
+    def frame_bytes(self) -> int:
+        return 2 * self.channels
+
+    @property
+    def audio_sec(self) -> float:
+        return self.ring.written / self.rate
+
+    @property
+    def idle(self) -> bool:
+        return not self.pending and not self.busy
+
+    def feed(self, data: bytes) -> list[Segment]:
+        """Ecrit le PCM recu dans le tampon et renvoie les segments fermes (VAD/segmenter du pipeline local).
+
+        Appele dans un thread de l'executeur, un appel a la fois par session.
+        """
+        data = self._partial + data
+        usable = len(data) - len(data) % self.frame_bytes
+        self._partial = data[usable:]
+        if usable:
+            self.ring.write(data[:usable])
+        segments = []
+        now = time.monotonic()
+        while self._read_pos + CHUNK <= self.ring.written:
+            segment = self.segmenter.feed(self._read_pos, self._read_pos + CHUNK)
+            self._read_pos += CHUNK
+            if segment is not None:
+                segment.captured_at = now
+                segment.samples = self.resampler.process(segment.pcm.reshape(-1))
+                segment.pcm = segment.pcm[:0]
+                segments.append(segment)
+        return segments
+
+    def finish(self) -> list[Segment]:
+        """Fin du flux: silence de fin pour clore le dernier segment, comme ``ReaderSource``."""
+        padding = int(self.rate * END_PADDING_SEC)
+        padding += (-(self.ring.written + padding)) % CHUNK
+        return self.feed(bytes(padding * self.frame_bytes))
+
+    def stats(self) -> dict:
+        return {
+            "session": self.sid,
+            "name": self.name,
+            "audio_sec": round(self.audio_sec, 3),
+            "wall_sec": round(time.monotonic() - self.started, 3),
+            "segments": self.segments,
+            "dropped_segments": self.dropped,
+            "whisper_failures": self.failures,
+            "latency_p50": round(self.latency.quantile(0.50), 3),
+            "latency_p95": round(self.latency.quantile(0.95), 3),
+            "latency_max": round(max(self.latency.recent, default=0.0), 3),
+        }
+
+
+class FairScheduler:
+    """Tourniquet entre sessions: chaque backend libre prend le segment le plus ancien de la session suivante.
+
+    Une session n'a jamais plus d'un segment en decodage (le texte reste dans l'ordre
+    et une session bavarde ne peut pas monopoliser le pool); ses segments en attente
+    sont bornes a ``backlog``, le plus ancien etant abandonne comme en capture locale.
+    """
+
+    def __init__(self, backlog: int = SESSION_BACKLOG) -> None:
+        self.backlog = backlog
+        self.sessions: deque[Session] = deque()
+        self._changed = asyncio.Condition()
+
+    async def add(self, session: Session) -> None:
+        async with self._changed:
+            self.sessions.append(session)
+
+    async def remove(self, session: Session) -> None:
+        async with self._changed:
+            if session in self.sessions:
+                self.sessions.remove(session)
+            session.pending.clear()
+            self._changed.notify_all()
+
+    async def put(self, session: Session, segment: Segment) -> bool:
+        async with self._changed:
+            dropped = len(session.pending) >= self.backlog
+            if dropped:
+                session.pending.popleft()
+                session.dropped += 1
+            session.pending.append(segment)
+            self._changed.notify_all()
+            return not dropped
+
+    def _pick(self) -> tuple[Session, Segment] | None:
+        for _ in range(len(self.sessions)):
+            session = self.sessions[0]
+            self.sessions.rotate(-1)
+            if session.pending and not session.busy:
+                session.busy = True
+                return session, session.pending.popleft()
+        return None
+
+    async def get(self) -> tuple[Session, Segment]:
+        async with self._changed:
+            while True:
+                picked = self._pick()
+                if picked is not None:
+                    return picked
+                await self._changed.wait()
+
+    async def done(self, session: Session) -> None:
+        async with self._changed:
+            session.busy = False
+            self._changed.notify_all()
+
+    async def wait_idle(self, session: Session) -> None:
+        async with self._changed:
+            await self._changed.wait_for(lambda: session.idle)
+
+    @property
+    def queued(self) -> int:
+        return sum(len(s.pending) for s in self.sessions)
+
+
+class VoxServer:
+    def __init__(self, project_root: Path, options: RunOptions, args: argparse.Namespace) -> None:
+        self.project_root = project_root
+        self.options = options
+        self.args = args
+        self.metrics = Metrics()
+        self.scheduler = FairScheduler(args.backlog)
+        self.backends: list[WhisperBackend] = []
+        self.translator: TranslationService | None = None
+        self.metrics_server: MetricsServer | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._ids = itertools.count(1)
+        self._active: set[Session] = set()
+        self._tasks: list[asyncio.Task] = []
+        self.port = 0
+
+    def log(self, message: str) -> None:
+        print(f"{time.strftime('%H:%M:%S')} {message}", flush=True)
+
+    def _start_backends(self) -> list[WhisperBackend]:
+        """Demarre les backends en parallele (chargement du modele); un slot qui echoue est ignore."""
+        def start(slot: int) -> WhisperBackend | None:
+            work_file = self.project_root / f"temp_audio_16k_{slot}.wav"
+            return start_backend(self.project_root, self.options, lambda kind, msg: self.log(msg), work_file)
+
+        with ThreadPoolExecutor(max_workers=self.args.backends) as pool:
+            started = list(pool.map(start, range(self.args.backends)))
+        return [b for b in started if b is not None]
+
+    async def start(self) -> asyncio.AbstractServer:
+        loop = asyncio.get_running_loop()
+        self.backends = await loop.run_in_executor(None, self._start_backends)
+        if not self.backends:
+            raise RuntimeError("aucun backend whisper n'a demarre")
+        if self.args.translate:
+            self.translator = TranslationService(self.args.translation, self.args.translation_workers)
+            await loop.run_in_executor(None, self.translator.start)
+        if self.args.metrics_port:
+            self.metrics_server = MetricsServer(self.metrics, self.args.metrics_port)
+            self.metrics_server.start()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.backends), thread_name_prefix="voxbridge-whisper")
+        self._tasks = [asyncio.create_task(self._decode_loop(b)) for b in self.backends]
+        server = await asyncio.start_server(self._serve, self.args.host, self.args.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.metrics.set("backends", len(self.backends))
+        self.log(
+            f"Ecoute sur {self.args.host}:{self.port}, {len(self.backends)} backends "
+            f"{self.backends[0].describe()}" + (f", traduction {self.translator.describe()}" if self.translator else "")
+        )
+        return server
+
+    def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        for backend in self.backends:
+            backend.close()
+        if self.translator is not None:
+            self.translator.close()
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+
+    def _transcribe(self, backend: WhisperBackend, segment: Segment) -> tuple[WhisperResult, float]:
+        started = time.perf_counter()
+        result = backend.transcribe(segment.samples)
+        return result, time.perf_counter() - started
+
+    async def _decode_loop(self, backend: WhisperBackend) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            session, segment = await self.scheduler.get()
+            self.metrics.set("queued_segments", self.scheduler.queued)
+            try:
+                result, elapsed = await loop.run_in_executor(self._executor, self._transcribe, backend, segment)
+                self._on_result(session, segment, result, elapsed)
+            finally:
+                await self.scheduler.done(session)
+
+    def _on_result(self, session: Session, segment: Segment, result: WhisperResult, elapsed: float) -> None:
+        session.segments += 1
+        if result.timed_out:
+            session.failures += 1
+            self.metrics.inc("whisper_timeouts_total")
+            session.outbox.put_nowait(OutEvent("error", "Whisper timeout", segment.end / session.rate))
+            return
+        self.metrics.inc("whisper_calls_total")
+        self.metrics.observe("whisper_seconds", elapsed)
+        if segment.duration > 0:
+            self.metrics.histogram("whisper_rtf", RTF_BUCKETS).observe(elapsed / segment.duration)
+        if not result.ok:
+            session.failures += 1
+            self.metrics.inc("whisper_failures_total")
+            message = f"Whisper error: {result.stderr.strip()}"
+            session.outbox.put_nowait(OutEvent("error", message, segment.end / session.rate))
+            return
+        duplicate = session.merger.duplicate_count(result.text, result.words, segment.overlap_sec)
+        session.merger.accept(result.text, duplicate)
+        text = " ".join(result.text.split()[duplicate:])
+        if not text:
+            return
+        audio_end = segment.end / session.rate
+        session.last_audio_end = audio_end
+        if session.aggregator is None:
+            session.outbox.put_nowait(OutEvent("transcription", text, audio_end, segment.captured_at))
+            return
+        flush = session.aggregator.add(text, segment.captured_at, pause=not segment.forced)
+        if flush is not None:
+            self._queue_translation(session, flush.text, flush.audio_end_at, "transcription")
+
+    def _queue_translation(self, session: Session, text: str, captured_at: float, kind: str) -> None:
+        future = asyncio.wrap_future(self.translator.submit(text))
+        session.outbox.put_nowait(OutEvent(kind, text, session.last_audio_end, captured_at, future))
+
+    async def _send_loop(self, session: Session, writer: asyncio.StreamWriter) -> None:
+        while True:
+            try:
+                event = await asyncio.wait_for(session.outbox.get(), IDLE_POLL_SEC)
+            except asyncio.TimeoutError:
+                flush = session.aggregator.poll(time.monotonic()) if session.aggregator else None
+                if flush is not None:
+                    self._queue_translation(session, flush.text, flush.audio_end_at, "interim")
+                continue
+            if event is None:
+                return
+            message = {"kind": event.kind, "text": event.text, "audio_end": round(event.audio_end, 3), **event.extra}
+            if event.translation is not None:
+                try:
+                    message["translation"] = await event.translation
+                except Exception as exc:
+                    self.metrics.inc("translation_failures_total")
+                    message["translation"] = ""
+                    message["error"] = f"Erreur traduction: {exc}"
+            if event.captured_at is not None and event.kind == "transcription":
+                latency = time.monotonic() - event.captured_at
+                message["latency"] = round(latency, 3)
+                session.latency.observe(latency)
+                self.metrics.observe("capture_to_text_seconds", latency)
+            writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+            await writer.drain()
+
+    async def _read_header(self, reader: asyncio.StreamReader) -> dict:
+        line = await asyncio.wait_for(reader.readline(), HEADER_TIMEOUT_SEC)
+        header = json.loads(line.decode("utf-8") or "{}")
+        if not isinstance(header, dict):
+            raise ValueError("objet JSON attendu")
+        try:
+            rate, channels = int(header.get("rate", 16000)), int(header.get("channels", 1))
+        except TypeError as exc:
+            raise ValueError(f"rate/channels: {exc}") from None
+        if not 8000 <= rate <= MAX_RATE or not 1 <= channels <= MAX_CHANNELS:
+            raise ValueError(f"format audio non supporte: {rate} Hz, {channels} canaux")
+        return header
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        sid = next(self._ids)
+        peer = writer.get_extra_info("peername")
+        try:
+            header = await self._read_header(reader)
+        except (ValueError, asyncio.TimeoutError) as exc:
+            writer.write((json.dumps({"kind": "error", "text": f"En-tete invalide: {exc}"}) + "\n").encode("utf-8"))
+            writer.close()
+            return
+        translate = bool(header.get("translate")) and self.translator is not None
+        name = str(header.get("name") or (f"{peer[0]}:{peer[1]}" if peer else f"session-{sid}"))
+        session = Session(
+            sid,
+            name,
+            int(header.get("rate", 16000)),
+            int(header.get("channels", 1)),
+            translate,
+            self.options.vad,
+            self.options.split_search_sec,
+        )
+        if header.get("translate") and not translate:
+            session.outbox.put_nowait(OutEvent("error", "Traduction desactivee sur ce serveur", 0.0))
+        self._active.add(session)
+        self.metrics.set("sessions", len(self._active))
+        await self.scheduler.add(session)
+        sender = asyncio.create_task(self._send_loop(session, writer))
+        self.log(f"Session {sid} ouverte: {session.name} ({session.rate} Hz, {session.channels} canaux)")
+        completed = False
+        loop = asyncio.get_running_loop()
+        try:
+            read_size = CHUNK * session.frame_bytes * 4
+            while True:
+                data = await reader.read(read_size)
+                # VAD, segmentation et reechantillonnage hors de la boucle: les autres sessions continuent.
+                work = functools.partial(session.feed, data) if data else session.finish
+                segments = await loop.run_in_executor(None, work)
+                for segment in segments:
+                    if not await self.scheduler.put(session, segment):
+                        self.metrics.inc("dropped_segments_total")
+                if not data:
+                    break
+            await self.scheduler.wait_idle(session)
+            if session.aggregator is not None:
+                flush = session.aggregator.add("", time.monotonic(), pause=True)
+                if flush is not None:
+                    self._queue_translation(session, flush.text, flush.audio_end_at, "transcription")
+            session.outbox.put_nowait(OutEvent("end", "", session.audio_sec, extra=session.stats()))
+            session.outbox.put_nowait(None)
+            await sender
+            completed = True
+        except (ConnectionError, asyncio.IncompleteReadError) as exc:
+            self.log(f"Session {sid}: connexion perdue ({exc})")
+        finally:
+            await self.scheduler.remove(session)
+            if not sender.done():
+                sender.cancel()
+            self._active.discard(session)
+            self.metrics.set("sessions", len(self._active))
+            writer.close()
+        stats = session.stats()
+        self.log(
+            f"Session {sid} {'terminee' if completed else 'interrompue'}: {stats['audio_sec']:.1f}s d'audio, "
+            f"{stats['segments']} segments, latence p50 {stats['latency_p50']:.2f}s p95 {stats['latency_p95']:.2f}s, "
+            f"{stats['dropped_segments']} abandonnes"
+        )
+
+
+def parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="VoxBridge: serveur de transcription multi-sessions (PCM sur TCP)")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse d'ecoute (0.0.0.0: tout le reseau)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port TCP (0: libre)")
+    parser.add_argument("--backends", type=int, default=DEFAULT_BACKENDS, help="Backends whisper partages")
+    parser.add_argument("--backlog", type=int, default=SESSION_BACKLOG, help="Segments en attente par session")
+    parser.add_argument("--model", default="", help="Nom du modele dans whisper.cpp/models")
+    parser.add_argument("--backend", choices=["server", "cli"], default="server", help="Backend whisper")
+    parser.add_argument("--no-gpu", action="store_true", help="Desactive CUDA")
+    parser.add_argument("--vad", choices=["energy", "peak"], default="energy", help="Detection de parole")
+    parser.add_argument("--translate", action="store_true", help="Autorise la traduction EN -> FR par session")
+    parser.add_argument("--translation", choices=["process", "thread"], default="process")
+    parser.add_argument("--translation-workers", type=int, default=1)
+    parser.add_argument("--metrics-port", type=int, default=0, help="Expose /metrics (Prometheus) sur ce port")
+    args = parser.parse_args(argv)
+    args.backends = max(1, args.backends)
+    args.backlog = max(1, args.backlog)
+    return args
+
+
+async def serve(server: VoxServer) -> None:
+    listener = await server.start()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, getattr(signal, "SIGTERM", None)):
+        if sig is not None:
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass
+    async with listener:
+        await stop.wait()
+
+
+def main(argv: list[str] | None = None, project_root: Path | None = None) -> int:
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    args = parse_args(argv)
+    project_root = project_root or Path(__file__).resolve().parents[1]
+    model_path = resolve_model_path(project_root, args.model)
+    if model_path is None:
+        print("Erreur: aucun modele Whisper trouve dans whisper.cpp/models/")
+        return 1
+    options = RunOptions(
+        mode="transcription",
+        source="stdin",
+        device_index=0,
+        model_path=model_path,
+        use_cuda=not args.no_gpu,
+        backend=args.backend,
+        vad=args.vad,
+    )
+    server = VoxServer(project_root, options, args)
+    try:
+        asyncio.run(serve(server))
+    except RuntimeError as exc:
+        print(f"Erreur: {exc}")
+        return 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    server.log("Arret")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
@@ -0,0 +1,471 @@
+﻿from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+
+import numpy as np
+
+from .audio import WHISPER_RATE
+from .capture import CaptureProcess, make_ring_callback
+from .ringbuffer import PcmRingBuffer
+
+
+CHUNK = 1024
+END_PADDING_SEC = 0.5
+BACKPRESSURE_WAIT_SEC = 0.01
+DEFAULT_MONITOR = "@DEFAULT_MONITOR@"
+
+
+def import_pyaudio():
+    import pyaudio
+
+    return pyaudio
+
+
+def import_pyaudiowpatch():
+    try:
+        import pyaudiowpatch as pa_lib  # type: ignore
+    except ImportError as exc:
+        raise RuntimeError("Loopback demande pyaudiowpatch: pip install pyaudiowpatch") from exc
+    return pa_lib
+
+
+class AudioSource:
+    """Source PCM int16 qui alimente un ``PcmRingBuffer``.
+
+    ``open`` fixe ``rate``/``channels`` (avant la creation du tampon), ``start``
+    commence l'ecriture. Une source ``finite`` (fichier, pipe) s'arrete d'elle-meme:
+    le worker vide alors le pipeline au lieu de signaler une interruption.
+    """
+
+    name = "base"
+    finite = False
+    shared_ring = False
+    preferred_format: tuple[int, int] | None = None  # (rate, canaux) a essayer d'abord
+
+    def __init__(self) -> None:
+        self.rate = WHISPER_RATE
+        self.channels = 1
+        self.label = self.name
+        self.error: Exception | None = None
+
+    def open(self) -> None:
+        pass
+
+    def start(self, ring: PcmRingBuffer, ready: Callable[[], bool] | None = None) -> None:
+        raise NotImplementedError
+
+    def is_active(self) -> bool:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def describe(self) -> str:
+        return self.label
+
+
+class PyAudioDeviceSource(AudioSource):
+    """Peripherique d'entree PyAudio, en callback ou dans un process dedie."""
+
+    name = "device"
+    loopback = False
+
+    def __init__(
+        self,
+        device_index: int,
+        capture_process: bool = False,
+        chunk: int = CHUNK,
+        device_name: str = "",
+    ) -> None:
+        super().__init__()
+        self.device_index = device_index
+        self.device_name = device_name
+        self.capture_process = capture_process
+        self.shared_ring = capture_process
+        self.chunk = chunk
+        self._pa_lib = None
+        self._p = None
+        self._info: dict = {}
+        self._stream = None
+
+    def _load_library(self):
+        return import_pyaudio()
+
+    def _find_device(self, p, pa_lib) -> dict:
+        count = p.get_device_count()
+        if not self.device_name:
+            return p.get_device_info_by_index(int(self.device_index))
+        if 0 <= int(self.device_index) < count:
+            info = p.get_device_info_by_index(int(self.device_index))
+            if str(info.get("name", "")) == self.device_name:
+                return info
+        # Index decale par un branchement: le meme peripherique est retrouve par son nom.
+        for i in range(count):
+            info = p.get_device_info_by_index(i)
+            if str(info.get("name", "")) == self.device_name and int(info.get("maxInputChannels", 0)) > 0:
+                self.device_index = i
+                return info
+        raise RuntimeError(f"Peripherique introuvable: {self.device_name}")
+
+    def _negotiate_format(self, p, pa_lib, info) -> tuple[int, int]:
+        channels = max(1, min(2, int(info.get("maxInputChannels", 1))))
+        rate = int(info.get("defaultSampleRate", 44100))
+        wanted = [self.preferred_format] if self.preferred_format else []
+        for want_rate, want_channels in wanted + [(WHISPER_RATE, 1)]:
+            try:
+                if p.is_format_supported(
+                    want_rate,
+                    input_device=int(info["index"]),
+                    input_channels=want_channels,
+                    input_format=pa_lib.paInt16,
+                ):
+                    return want_channels, want_rate
+            except (ValueError, AttributeError, KeyError):
+                pass
+        return channels, rate
+
+    def _describe_device(self, info: dict) -> str:
+        return f"{info.get('name', '')} (index {self.device_index})"
+
+    def open(self) -> None:
+        self._pa_lib = self._load_library()
+        self._p = self._pa_lib.PyAudio()
+        try:
+            self._info = self._find_device(self._p, self._pa_lib)
+            self.channels, self.rate = self._negotiate_format(self._p, self._pa_lib, self._info)
+        except Exception:
+            self.close()
+            raise
+        # Reconnexion par le nom: l'index peut changer quand un peripherique est branche.
+        self.device_name = self.device_name or str(self._info.get("name", ""))
+        self.label = self._describe_device(self._info)
+
+    def start(self, ring: PcmRingBuffer, ready: Callable[[], bool] | None = None) -> None:
+        pa_lib = self._pa_lib
+        if self.capture_process:
+            self._stream = CaptureProcess(
+                ring,
+                self.rate,
+                int(self._info["index"]),
+                loopback=self.loopback,
+                chunk=self.chunk,
+            )
+            self._stream.start()
+            self._p.terminate()
+            self._p = None
+            self.label += " [process dedie]"
+            return
+        self._stream = self._p.open(
+            format=pa_lib.paInt16,
+            channels=self.channels,
+            rate=self.rate,
+            input=True,
+            input_device_index=int(self._info["index"]),
+            frames_per_buffer=self.chunk,
+            stream_callback=make_ring_callback(ring, pa_lib.paContinue, getattr(pa_lib, "paInputOverflow", 0x2)),
+        )
+
+    def is_active(self) -> bool:
+        return self._stream is not None and self._stream.is_active()
+
+    def close(self) -> None:
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+        if self._p is not None:
+            self._p.terminate()
+            self._p = None
+
+
+class WasapiLoopbackSource(PyAudioDeviceSource):
+    """Sortie par defaut capturee en WASAPI loopback (Windows, pyaudiowpatch)."""
+
+    name = "loopback"
+    loopback = True
+
+    def __init__(self, capture_process: bool = False, chunk: int = CHUNK) -> None:
+        super().__init__(-1, capture_process, chunk)
+
+    def _load_library(self):
+        return import_pyaudiowpatch()
+
+    def _find_device(self, p, pa_lib) -> dict:
+        if not hasattr(pa_lib, "paWASAPI"):
+            raise RuntimeError("Backend audio sans support WASAPI loopback")
+
+        wasapi = p.get_host_api_info_by_type(pa_lib.paWASAPI)
+        default_output_idx = int(wasapi["defaultOutputDevice"])
+        default_output = p.get_device_info_by_index(default_output_idx)
+
+        if default_output.get("isLoopbackDevice", False):
+            return default_output
+
+        if hasattr(p, "get_loopback_device_info_generator"):
+            default_name = str(default_output.get("name", ""))
+            for loop_dev in p.get_loopback_device_info_generator():
+                if default_name in str(loop_dev.get("name", "")):
+                    return loop_dev
+
+        raise RuntimeError("Impossible de trouver le device loopback WASAPI")
+
+    def _negotiate_format(self, p, pa_lib, info) -> tuple[int, int]:
+        return max(1, min(2, int(info.get("maxInputChannels", 2)))), int(info.get("defaultSampleRate", 44100))
+
+    def _describe_device(self, info: dict) -> str:
+        return f"{info.get('name', '')} (loopback)"
+
+
+class ReaderSource(AudioSource):
+    """Source lue par un thread (fichier, pipe): ``_read`` renvoie des octets PCM16, ``b""`` en fin de flux.
+
+    En fin de flux, ``END_PADDING_SEC`` de silence sont ajoutes pour clore le dernier
+    segment. ``ready`` (fourni par le worker) freine la lecture tant que le pipeline
+    n'a pas consomme le tampon: une lecture plus rapide que le temps reel ne perd rien.
+    Une source en direct (``finite = False``) ignore ce frein: le tampon est ecrase et
+    les frames perdues sont comptees par le worker, comme pour un peripherique.
+    """
+
+    finite = True
+
+    def __init__(self, realtime: bool, chunk: int = CHUNK) -> None:
+        super().__init__()
+        self.realtime = realtime
+        self.chunk = chunk
+        self.frames_read = 0
+        self._stop_event = threading.Event()
+        self._done = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _read(self, frames: int) -> bytes:
+        raise NotImplementedError
+
+    def start(self, ring: PcmRingBuffer, ready: Callable[[], bool] | None = None) -> None:
+        self._thread = threading.Thread(
+            target=self._run,
+            # Attendre un direct remplirait le tube: le serveur de son jetterait l'audio sans le compter.
+            args=(ring, ready if self.finite else None),
+            name=f"voxbridge-source-{self.name}",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run(self, ring: PcmRingBuffer, ready: Callable[[], bool] | None) -> None:
+        frame_bytes = 2 * self.channels
+        pending = b""
+        deadline = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                while ready is not None and not ready() and not self._stop_event.is_set():
+                    time.sleep(BACKPRESSURE_WAIT_SEC)
+                data = self._read(self.chunk)
+                if not data:
+                    break
+                data = pending + data
+                usable = len(data) - len(data) % frame_bytes
+                pending = data[usable:]
+                if not usable:
+                    continue
+                ring.write(data[:usable])
+                frames = usable // frame_bytes
+                self.frames_read += frames
+                if self.realtime:
+                    deadline += frames / self.rate
+                    delay = deadline - time.perf_counter()
+                    if delay > 0:
+                        self._stop_event.wait(delay)
+            if not self._stop_event.is_set():
+                ring.write(np.zeros((int(self.rate * END_PADDING_SEC), self.channels), dtype=np.int16))
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self._done.set()
+
+    def is_active(self) -> bool:
+        return not self._done.is_set()
+
+    def close(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+
+class FileSource(ReaderSource):
+    """Fichier WAV PCM16 (module ``wave``) ou FLAC (``soundfile``, optionnel)."""
+
+    name = "file"
+
+    def __init__(self, path: Path, realtime: bool = True, chunk: int = CHUNK) -> None:
+        super().__init__(realtime, chunk)
+        self.path = path
+        self._wave: wave.Wave_read | None = None
+        self._sound = None
+
+    def open(self) -> None:
+        if not self.path.exists():
+            raise RuntimeError(f"Fichier audio introuvable: {self.path}")
+        if self.path.suffix.lower() == ".flac":
+            try:
+                import soundfile  # type: ignore
+            except ImportError as exc:
+                raise RuntimeError("Lecture FLAC: pip install soundfile") from exc
+            self._sound = soundfile.SoundFile(str(self.path))
+            self.rate, self.channels = int(self._sound.samplerate), int(self._sound.channels)
+        else:
+            self._wave = wave.open(str(self.path), "rb")
+            if self._wave.getsampwidth() != 2:
+                self._wave.close()
+                raise RuntimeError(f"{self.path.name}: seul le PCM 16 bits est supporte")
+            self.rate, self.channels = self._wave.getframerate(), self._wave.getnchannels()
+        pace = "temps reel" if self.realtime else "au plus vite"
+        self.label = f"{self.path.name} ({self.rate} Hz, {self.channels} canal(aux), {pace})"
+
+    def blocks(self, frames: int) -> Iterator[np.ndarray]:
+        """Lecture directe hors pipeline: blocs int16 ``(frames, channels)`` jusqu'a la fin du fichier."""
+        while True:
+            data = self._read(frames)
+            if not data:
+                return
+            yield np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)
+
+    def _read(self, frames: int) -> bytes:
+        if self._wave is not None:
+            return self._wave.readframes(frames)
+        return self._sound.read(frames, dtype="int16", always_2d=True).tobytes()
+
+    def close(self) -> None:
+        super().close()
+        if self._wave is not None:
+            self._wave.close()
+            self._wave = None
+        if self._sound is not None:
+            self._sound.close()
+            self._sound = None
+
+
+class PipeSource(ReaderSource):
+    """PCM16 little-endian brut sur stdin, un pipe nomme ou la sortie d'un autre process."""
+
+    name = "stdin"
+
+    def __init__(
+        self,
+        rate: int = WHISPER_RATE,
+        channels: int = 1,
+        path: str = "",
+        stream: BinaryIO | None = None,
+        chunk: int = CHUNK,
+    ) -> None:
+        super().__init__(realtime=False, chunk=chunk)
+        self.rate = rate
+        self.channels = channels
+        self.path = path
+        self._stream = stream
+        self._owned = False
+
+    def open(self) -> None:
+        if self._stream is None:
+            if self.path and self.path != "-":
+                self._stream = open(self.path, "rb")
+                self._owned = True
+            else:
+                self._stream = sys.stdin.buffer
+        origin = self.path if self.path and self.path != "-" else "stdin"
+        self.label = f"PCM brut {origin} ({self.rate} Hz, {self.channels} canal(aux))"
+
+    def _read(self, frames: int) -> bytes:
+        return self._stream.read(frames * 2 * self.channels)
+
+    def close(self) -> None:
+        self._stop_event.set()
+        if self._owned and self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        super().close()
+
+
+class MonitorSource(PipeSource):
+    """Moniteur PulseAudio/PipeWire (ce qui sort des haut-parleurs), via ``parec`` ou ``pw-record``.
+
+    Le serveur de son reechantillonne directement en 16 kHz mono: pas de conversion cote Python.
+    """
+
+    name = "monitor"
+    finite = False
+
+    def __init__(self, device: str = "", chunk: int = CHUNK) -> None:
+        super().__init__(WHISPER_RATE, 1, chunk=chunk)
+        self.device = device or DEFAULT_MONITOR
+        self.process: subprocess.Popen | None = None
+
+    def build_command(self) -> list[str]:
+        parec = shutil.which("parec")
+        if parec:
+            return [
+                parec,
+                f"--device={self.device}",
+                "--format=s16le",
+                f"--rate={self.rate}",
+                f"--channels={self.channels}",
+                "--raw",
+                "--latency-msec=50",
+            ]
+        pw_record = shutil.which("pw-record")
+        if pw_record:
+            command = [pw_record, "--format", "s16", "--rate", str(self.rate), "--channels", str(self.channels)]
+            if self.device == DEFAULT_MONITOR:
+                command += ["-P", "{ stream.capture.sink=true }"]
+            else:
+                command += ["--target", self.device]
+            return command + ["-"]
+        raise RuntimeError("Source monitor: parec (pulseaudio-utils) ou pw-record (pipewire) introuvable")
+
+    def open(self) -> None:
+        command = self.build_command()
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._stream = self.process.stdout
+        self.label = f"moniteur {self.device} via {Path(command[0]).name} ({self.rate} Hz mono)"
+
+    def is_active(self) -> bool:
+        return super().is_active() and self.process is not None and self.process.poll() is None
+
+    def close(self) -> None:
+        self._stop_event.set()
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.terminate()
+                try:
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+            self.process = None
+        super().close()
+
+
+def create_source(options) -> AudioSource:
+    """Source audio decrite par ``RunOptions`` (``source``, ``input_path``, ...)."""
+    if options.source == "loopback":
+        return WasapiLoopbackSource(options.capture_process)
+    if options.source == "file":
+        return FileSource(Path(options.input_path), realtime=options.realtime)
+    if options.source == "stdin":
+        return PipeSource(options.input_rate, options.input_channels, options.input_path)
+    if options.source == "monitor":
+        return MonitorSource(options.input_path)
+    return PyAudioDeviceSource(options.device_index, options.capture_process, device_name=options.device_name)
@@ -0,0 +1,49 @@
+﻿from __future__ import annotations
+
+from .merge import normalize_word
+
+
+STREAM_STEP_SEC = 0.5
+STREAM_MIN_SEC = 0.8
+
+
+def _common_prefix(a: list[str], b: list[str]) -> int:
+    n = 0
+    for x, y in zip(a, b):
+        if normalize_word(x) != normalize_word(y):
+            break
+        n += 1
+    return n
+
+
+class LocalAgreement:
+    """Politique local-agreement-2: un mot est valide quand deux decodages consecutifs
+    de la fenetre courante s'accordent sur lui (prefixe commun)."""
+
+    def __init__(self) -> None:
+        self.committed: list[str] = []
+        self.previous: list[str] = []
+
+    def update(self, tokens: list[str]) -> tuple[list[str], list[str]]:
+        """Renvoie (mots nouvellement valides, mots encore provisoires)."""
+        agreed = _common_prefix(self.previous, tokens)
+        start = len(self.committed)
+        newly = tokens[start:agreed] if agreed > start else []
+        self.committed.extend(newly)
+        self.previous = tokens
+        return newly, tokens[len(self.committed) :]
+
+    def finalize(self, tokens: list[str]) -> list[str]:
+        """Decodage final du segment: renvoie les mots pas encore valides et repart a zero."""
+        start = len(self.committed)
+        if _common_prefix(self.committed, tokens) < start:
+            anchor = normalize_word(self.committed[-1]) if self.committed else ""
+            matches = [i for i, t in enumerate(tokens) if normalize_word(t) == anchor]
+            start = matches[-1] + 1 if matches else start
+        rest = tokens[start:]
+        self.reset()
+        return rest
+
+    def reset(self) -> None:
+        self.committed = []
+        self.previous = []
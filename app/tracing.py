@@ -0,0 +1,155 @@
+﻿from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+
+MAX_TRACE_EVENTS = 2_000_000
+PROFILE_INTERVAL_SEC = 0.005
+PROFILE_MAX_DEPTH = 64
+
+
+class Tracer:
+    """Enregistre des spans au format Chrome trace (chrome://tracing, ui.perfetto.dev).
+
+    Les evenements sont stockes bruts en memoire (un ``list.append`` par evenement)
+    et ne sont convertis en JSON qu'a la fermeture. Les horodatages passes en
+    argument sont des ``time.perf_counter()``.
+    """
+
+    def __init__(self, path: Path | None, max_events: int = MAX_TRACE_EVENTS) -> None:
+        self.path = path
+        self.enabled = path is not None
+        self.max_events = max_events
+        self.dropped = 0
+        self._events: list[tuple] = []
+        self._threads: dict[int, str] = {}
+        self._t0 = time.perf_counter()
+        self._pid = os.getpid()
+
+    def _add(self, event: tuple) -> None:
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        tid = event[4]
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self._events.append(event)
+
+    def complete(self, name: str, start: float, end: float, cat: str = "stage", **args: Any) -> None:
+        if self.enabled:
+            self._add(("X", name, cat, start, threading.get_ident(), end - start, args))
+
+    @contextmanager
+    def span(self, name: str, cat: str = "stage", **args: Any) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.complete(name, start, time.perf_counter(), cat, **args)
+
+    def instant(self, name: str, cat: str = "event", **args: Any) -> None:
+        if self.enabled:
+            self._add(("i", name, cat, time.perf_counter(), threading.get_ident(), 0.0, args))
+
+    def counter(self, name: str, **values: float) -> None:
+        if self.enabled:
+            self._add(("C", name, "counter", time.perf_counter(), threading.get_ident(), 0.0, values))
+
+    def async_span(self, name: str, span_id: int, start: float, end: float, cat: str = "async", **args: Any) -> None:
+        """Span pouvant chevaucher les autres (segments audio, traductions en vol)."""
+        if self.enabled:
+            tid = threading.get_ident()
+            self._add(("b", name, cat, start, tid, span_id, args))
+            self._add(("e", name, cat, end, tid, span_id, {}))
+
+    def close(self) -> Path | None:
+        if not self.enabled or self.path is None:
+            return None
+        self.enabled = False
+        events: list[dict[str, Any]] = [
+            {"ph": "M", "name": "process_name", "pid": self._pid, "args": {"name": "voxbridge"}},
+        ]
+        for tid, name in self._threads.items():
+            events.append({"ph": "M", "name": "thread_name", "pid": self._pid, "tid": tid, "args": {"name": name}})
+        for ph, name, cat, ts, tid, extra, args in self._events:
+            event = {
+                "ph": ph,
+                "name": name,
+                "cat": cat,
+                "ts": round((ts - self._t0) * 1e6, 1),
+                "pid": self._pid,
+                "tid": tid,
+                "args": args,
+            }
+            if ph == "X":
+                event["dur"] = round(extra * 1e6, 1)
+            elif ph in ("b", "e"):
+                event["id"] = extra
+            elif ph == "i":
+                event["s"] = "t"
+            events.append(event)
+        self.path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+        self._events.clear()
+        return self.path
+
+
+class SamplingProfiler:
+    """Echantillonne la pile de tous les threads a intervalle fixe (sys._current_frames).
+
+    Ecrit des piles repliees (``thread;module:fonction;...  N``), lisibles par
+    speedscope ou flamegraph.pl. Peut etre demarre/arrete pendant une session.
+    """
+
+    def __init__(self, interval_sec: float = PROFILE_INTERVAL_SEC) -> None:
+        self.interval_sec = interval_sec
+        self.samples = 0
+        self._stacks: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="voxbridge-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop_event.wait(self.interval_sec):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self, path: Path) -> Path:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        lines = [f"{stack} {count}" for stack, count in self._stacks.most_common()]
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        self._stacks.clear()
+        return path
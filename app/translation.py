@@ -0,0 +1,222 @@
+﻿from __future__ import annotations
+
+import multiprocessing as mp
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from .metrics import Histogram
+
+
+CACHE_SIZE = 512
+WARMUP_TIMEOUT_SEC = 180.0
+WARMUP_TEXT = "Hello."
+SENTENCE_DEADLINE_SEC = 4.0
+MAX_PENDING_WORDS = 60
+
+_SENTENCE_END = re.compile(r"[.!?\u2026]+[\"')\]]*(?=\s|$)")
+
+
+def build_translator() -> Callable[[str], str]:
+    import argostranslate.translate
+
+    installed_languages = argostranslate.translate.get_installed_languages()
+    from_lang = next((lang for lang in installed_languages if lang.code == "en"), None)
+    to_lang = next((lang for lang in installed_languages if lang.code == "fr"), None)
+    if from_lang and to_lang:
+        return from_lang.get_translation(to_lang).translate
+    return lambda text: text
+
+
+_worker_translate: Callable[[str], str] | None = None
+
+
+def _init_worker() -> None:
+    global _worker_translate
+    import logging
+
+    logging.getLogger("stanza").setLevel(logging.ERROR)
+    _worker_translate = build_translator()
+
+
+def _translate_in_worker(text: str) -> str:
+    if _worker_translate is None:
+        _init_worker()
+    return _worker_translate(text)
+
+
+def normalize_source(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+class LruCache:
+    def __init__(self, maxsize: int = CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class TranslationService:
+    """Traduction hors du thread de transcription, avec cache LRU.
+
+    ``mode="process"`` isole argostranslate/CTranslate2 dans des process dedies
+    (pas de concurrence sur le GIL avec la capture); ``mode="thread"`` utilise
+    un pool de threads dans le process courant.
+    """
+
+    def __init__(self, mode: str = "process", workers: int = 1, cache_size: int = CACHE_SIZE) -> None:
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.cache = LruCache(cache_size)
+        self.latency = Histogram()
+        self.calls = 0
+        self._executor: Executor | None = None
+        self._translate: Callable[[str], str] | None = None
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        else:
+            self._translate = build_translator()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="voxbridge-translate")
+        try:
+            self._run(WARMUP_TEXT).result(timeout=WARMUP_TIMEOUT_SEC)
+        except Exception:
+            self.close()
+            raise
+
+    def _run(self, text: str) -> Future:
+        if self._executor is None:
+            raise RuntimeError("Service de traduction non demarre")
+        if self.mode == "process":
+            return self._executor.submit(_translate_in_worker, text)
+        return self._executor.submit(self._translate, text)
+
+    def submit(self, text: str) -> Future:
+        key = normalize_source(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            done: Future = Future()
+            done.set_result(cached)
+            return done
+
+        started = time.monotonic()
+        self.calls += 1
+        future = self._run(text)
+
+        def _store(f: Future) -> None:
+            if f.cancelled() or f.exception() is not None:
+                return
+            self.cache.put(key, f.result())
+            self.latency.observe(time.monotonic() - started)
+
+        future.add_done_callback(_store)
+        return future
+
+    def describe(self) -> str:
+        return f"{self.mode} x{self.workers}, cache {self.cache.maxsize}"
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def split_sentences(text: str) -> tuple[list[str], str]:
+    """Phrases terminees par une ponctuation, et le reste incomplet."""
+    sentences = []
+    pos = 0
+    for match in _SENTENCE_END.finditer(text):
+        sentence = text[pos : match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        pos = match.end()
+    return sentences, text[pos:].strip()
+
+
+@dataclass
+class Flush:
+    sentences: list[str]
+    audio_end_at: float
+    interim: bool = False
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.sentences)
+
+
+class SentenceAggregator:
+    """Regroupe les fragments transcrits en phrases avant traduction.
+
+    Les phrases completes (ponctuation ou pause) partent en un seul lot; si un
+    fragment attend plus de ``deadline_sec``, une traduction provisoire est
+    produite sans vider le tampon.
+    """
+
+    def __init__(self, deadline_sec: float = SENTENCE_DEADLINE_SEC, max_words: int = MAX_PENDING_WORDS) -> None:
+        self.deadline_sec = deadline_sec
+        self.max_words = max_words
+        self.pending = ""
+        self.pending_since: float | None = None
+        self._interim_text = ""
+        self.fragments = 0
+        self.flushes = 0
+        self.interim_flushes = 0
+
+    def add(self, text: str, now: float, pause: bool = False) -> Flush | None:
+        self.fragments += 1
+        pending = f"{self.pending} {text}".strip()
+        sentences, rest = split_sentences(pending)
+        if pause or len(rest.split()) >= self.max_words:
+            if rest:
+                sentences.append(rest)
+            rest = ""
+
+        if rest and (self.pending_since is None or sentences):
+            self.pending_since = now
+        self.pending = rest
+        if not rest:
+            self.pending_since = None
+            self._interim_text = ""
+        if not sentences:
+            return None
+        self.flushes += 1
+        return Flush(sentences, now)
+
+    def poll(self, now: float) -> Flush | None:
+        if not self.pending or self.pending_since is None:
+            return None
+        if now - self.pending_since < self.deadline_sec or self.pending == self._interim_text:
+            return None
+        self._interim_text = self.pending
+        self.interim_flushes += 1
+        return Flush([self.pending], now, interim=True)
@@ -0,0 +1,257 @@
+﻿"""Reglage threads / decodages simultanes de whisper pour un modele: ``python -m app.tuning``.
+
+Chaque combinaison (threads par decodage, decodages simultanes, coeurs epingles ou non)
+decode l'extrait de reference par segments de MAX_SEGMENT_SEC pendant ``--duration`` s;
+la plus rapide en debit dont la latence p95 tient la cible est enregistree pour ce modele
+dans ``app_config.json`` (``whisper_tuning``), puis reprise par le worker, ``app.batch``
+et ``app.watch``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+
+import numpy as np
+
+from .audio import WHISPER_RATE
+from .batch import available_cpus, cpu_sets, load_audio
+from .cli import resolve_model_path
+from .config import WhisperTuning, load_config, save_config
+from .core import RunOptions, start_backend
+from .modelbench import DEFAULT_TARGET_LATENCY_SEC, default_clip
+from .segmenter import MAX_SEGMENT_SEC
+
+
+DEFAULT_DURATION_SEC = 8.0
+
+
+@dataclass
+class TuneResult:
+    threads: int
+    slots: int
+    pin: bool
+    ok: bool = True
+    throughput: float = 0.0  # secondes d'audio decodees par seconde
+    latency_p95: float = 0.0
+    decodes: int = 0
+    error: str = ""
+
+    def label(self) -> str:
+        return f"{self.threads} threads x {self.slots}" + (" epingle" if self.pin else "")
+
+
+def candidates(cpus: int, threads: list[int] | None, slots: list[int] | None, pin: bool) -> list[tuple[int, int, bool]]:
+    """Combinaisons qui n'utilisent pas plus de coeurs que disponibles (puissances de 2 par defaut)."""
+    powers = [n for n in (1, 2, 4, 8, 16, 32) if n < cpus] + [cpus]
+    combos = []
+    for s in slots or powers:
+        for t in threads or powers:
+            if t * s > cpus:
+                continue
+            combos.append((t, s, False))
+            if pin and s > 1:
+                combos.append((t, s, True))
+    return combos
+
+
+def measure(
+    project_root: Path,
+    options: RunOptions,
+    pieces: list[np.ndarray],
+    slots: int,
+    pin: bool,
+    duration: float,
+) -> TuneResult:
+    """``slots`` backends decodent en boucle, chacun dans son thread (et sur ses coeurs si ``pin``)."""
+    result = TuneResult(options.threads, slots, pin)
+    sets = cpu_sets(slots, options.threads) if pin else None
+    latencies: list[float] = []
+    audio_sec = [0.0]
+    errors: list[str] = []
+    lock = threading.Lock()
+    window = [0.0, 0.0]
+
+    def open_window() -> None:
+        window[0] = time.perf_counter()
+        window[1] = window[0] + duration
+
+    # Chronometre lance quand tous les backends sont charges.
+    ready = threading.Barrier(slots + 1, action=open_window)
+
+    def on_backend_event(kind: str, message: str) -> None:
+        # Le repli serveur -> whisper-cli n'est qu'un status: seules les erreurs arretent la mesure.
+        if kind == "error":
+            errors.append(message)
+
+    def slot(index: int) -> None:
+        backend = None
+        try:
+            if sets:
+                # Affinite du thread: le process whisper lance ensuite en herite.
+                os.sched_setaffinity(0, sets[index])
+            backend = start_backend(project_root, options, on_backend_event, work_dir / f"tune_{index}.wav")
+        except OSError as exc:
+            errors.append(str(exc))
+        finally:
+            ready.wait()
+        if backend is None:
+            return
+        try:
+            i = index
+            while time.perf_counter() < window[1] and not errors:
+                piece = pieces[i % len(pieces)]
+                i += 1
+                t0 = time.perf_counter()
+                decoded = backend.transcribe(piece)
+                elapsed = time.perf_counter() - t0
+                if not decoded.ok:
+                    errors.append(decoded.stderr.strip())
+                    return
+                with lock:
+                    latencies.append(elapsed)
+                    audio_sec[0] += piece.size / WHISPER_RATE
+        finally:
+            backend.close()
+
+    with tempfile.TemporaryDirectory(prefix="voxbridge-tuning-") as tmp:
+        work_dir = Path(tmp)
+        threads = [threading.Thread(target=slot, args=(i,), daemon=True) for i in range(slots)]
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        for thread in threads:
+            thread.join()
+    wall = time.perf_counter() - window[0]
+    if errors or not latencies:
+        result.ok = False
+        result.error = errors[0] if errors else "aucun decodage"
+        return result
+    latencies.sort()
+    result.throughput = round(audio_sec[0] / wall, 3)
+    result.latency_p95 = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4)
+    result.decodes = len(latencies)
+    return result
+
+
+def choose(results: list[TuneResult], target_latency: float) -> tuple[TuneResult | None, TuneResult | None]:
+    """(meilleur debit sous la cible de latence, meilleur decodage seul pour le direct)."""
+    ok = [r for r in results if r.ok]
+    if not ok:
+        return None, None
+    eligible = [r for r in ok if r.latency_p95 <= target_latency] or [min(ok, key=lambda r: r.latency_p95)]
+    best = max(eligible, key=lambda r: (r.throughput, -r.latency_p95))
+    single = [r for r in ok if r.slots == 1]
+    live = min(single, key=lambda r: (r.latency_p95, r.threads)) if single else None
+    return best, live
+
+
+def _int_list(text: str) -> list[int]:
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="VoxBridge: regle threads et decodages simultanes de whisper")
+    parser.add_argument("--model", default="", help="Nom du modele dans whisper.cpp/models")
+    parser.add_argument("--backend", choices=["server", "cli"], default="server", help="Backend whisper")
+    parser.add_argument("--no-gpu", action="store_true", help="Desactive CUDA")
+    parser.add_argument("--clip", type=Path, default=None, help="Extrait de reference (defaut: jfk.wav de whisper.cpp)")
+    parser.add_argument("--threads", type=_int_list, default=None, help="Threads a essayer, ex. 2,4,8")
+    parser.add_argument("--slots", type=_int_list, default=None, help="Decodages simultanes a essayer, ex. 1,2")
+    parser.add_argument(
+        "--pin",
+        action="store_true",
+        help="Essaie aussi chaque decodage sur des coeurs dedies (Linux)",
+    )
+    parser.add_argument(
+        "--target-latency",
+        type=float,
+        default=DEFAULT_TARGET_LATENCY_SEC,
+        help=f"Latence p95 max (s) d'un decodage de {MAX_SEGMENT_SEC:.0f} s",
+    )
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION_SEC, help="Mesure par combinaison (s)")
+    parser.add_argument("--no-save", action="store_true", help="N'enregistre pas le reglage dans app_config.json")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None, project_root: Path | None = None) -> int:
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    args = parse_args(argv)
+    project_root = project_root or Path(__file__).resolve().parents[1]
+    model_path = resolve_model_path(project_root, args.model or load_config(project_root).model_name)
+    if model_path is None:
+        print("Erreur: aucun modele Whisper trouve dans whisper.cpp/models/")
+        return 1
+    clip_path = args.clip or default_clip(project_root)[0]
+    try:
+        clip = load_audio(clip_path).astype(np.float32) / 32768.0
+    except (RuntimeError, OSError, EOFError, ValueError) as exc:
+        print(f"Erreur audio ({clip_path}): {exc}")
+        return 1
+    step = int(WHISPER_RATE * MAX_SEGMENT_SEC)
+    pieces = [clip[pos : pos + step] for pos in range(0, clip.size, step) if clip.size - pos >= step // 2]
+    if not pieces:
+        print(f"Erreur: extrait trop court ({clip_path})")
+        return 1
+
+    cpus = len(available_cpus())
+    pin = args.pin and hasattr(os, "sched_setaffinity")
+    if args.pin and not pin:
+        print("Epinglage des coeurs indisponible sur ce systeme: ignore")
+    combos = candidates(cpus, args.threads, args.slots, pin)
+    options = RunOptions(
+        mode="transcription",
+        source="file",
+        device_index=0,
+        model_path=model_path,
+        use_cuda=not args.no_gpu,
+        backend=args.backend,
+    )
+    print(f"{model_path.name}: {len(combos)} combinaisons sur {cpus} coeurs, {args.duration:.0f}s chacune")
+    print("threads x decodages        | audio s/s | p95 s | decodages")
+    results = []
+    for threads, slots, pinned in combos:
+        result = measure(project_root, replace(options, threads=threads), pieces, slots, pinned, args.duration)
+        results.append(result)
+        if result.ok:
+            print(
+                f"{result.label():<26} | {result.throughput:>9.2f} | {result.latency_p95:>5.2f} | {result.decodes:>9}",
+                flush=True,
+            )
+        else:
+            print(f"{result.label():<26} | echec: {result.error}", flush=True)
+
+    best, live = choose(results, args.target_latency)
+    if best is None:
+        print("Aucune combinaison n'a pu etre mesuree")
+        return 1
+    if best.latency_p95 > args.target_latency:
+        print(f"Aucune combinaison sous {args.target_latency:.2f}s: la plus reactive est retenue")
+    tuning = WhisperTuning(
+        threads=best.threads,
+        slots=best.slots,
+        pin=best.pin,
+        live_threads=live.threads if live is not None else best.threads,
+        throughput=best.throughput,
+        latency_p95=best.latency_p95,
+    )
+    print(
+        f"Retenu: {best.label()} ({best.throughput:.2f}s d'audio/s, p95 {best.latency_p95:.2f}s); "
+        f"direct: {tuning.live_threads} threads"
+    )
+    if not args.no_save:
+        cfg = load_config(project_root)
+        cfg.whisper_tuning[model_path.name] = asdict(tuning)
+        save_config(project_root, cfg)
+        print(f"app_config.json: whisper_tuning[{model_path.name}]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,133 @@
 ﻿from __future__ import annotations
 
 import queue
+import threading
+import time
 import tkinter as tk
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
 from tkinter import messagebox, ttk
 from tkinter.scrolledtext import ScrolledText
+from typing import TYPE_CHECKING
 
-from .config import AppConfig, load_config, save_config
-from .core import RunOptions, TranscriptionWorker, discover_models, list_input_devices
+from .client import RemoteWorker, connect_daemon, request
+from .config import live_threads, load_config, save_config
+from .devices import DeviceMonitor
+from .metrics import Histogram
+
+if TYPE_CHECKING:
+    from .core import RunOptions, TranscriptionWorker
+    from .devices import DeviceInfo
+    from .modelbench import ModelResult
+
+
+WAKEUP_EVENT = "<<VoxBridgeEvents>>"
+SAFETY_POLL_MS = 1000
+UNTHREADED_POLL_MS = 50
+MAX_EVENTS_PER_DRAIN = 200
+MAX_LOG_LINES = 5000
+TRIM_LOG_LINES = 500
+
+
+@dataclass
+class UiEvent:
+    kind: str
+    message: str
+    at: float = field(default_factory=time.monotonic)
 
 
 class TranslatorAppUI:
-    def __init__(self, root: tk.Tk, project_root: Path) -> None:
+    def __init__(self, root: tk.Tk, project_root: Path, started_at: float | None = None) -> None:
         self.root = root
         self.project_root = project_root
+        self.started_at = started_at if started_at is not None else time.perf_counter()
         self.root.title("VoxBridge - Desktop")
         self.root.geometry("1000x760")
 
         self.cfg = load_config(project_root)
-        self.event_queue: queue.Queue[tuple[str, str]] = queue.Queue()
-        self.worker: TranscriptionWorker | None = None
-
-        self.models = discover_models(project_root)
-        self.devices = list_input_devices()
+        self.event_queue: queue.Queue[UiEvent] = queue.Queue()
+        self.ui_latency = Histogram()
+        self.log_trimmed_lines = 0
+        self._log_batch: list[str] = []
+        self._flush_scheduled = False
+        self._wakeup_pending = False
+        self._wakeup_lock = threading.Lock()
+        # event_generate depuis un autre thread n'est sur qu'avec un Tcl compile avec threads.
+        self._threaded_tcl = bool(root.tk.getboolean(root.tk.call("info", "exists", "tcl_platform(threaded)")))
+        self._poll_ms = SAFETY_POLL_MS if self._threaded_tcl else UNTHREADED_POLL_MS
+        self.worker: TranscriptionWorker | RemoteWorker | None = None
+        self.worker_source = ""
+        self.daemon = False
+
+        # Rempli par _warm_up: numpy/pyaudio/argostranslate ne bloquent pas l'ouverture de la fenetre.
+        self.models: list[str] = []
+        self.devices: list[DeviceInfo] = []
+        self.ready = False
+        self._warm_result: tuple[list[str], list[DeviceInfo]] | None = None
+        # Liste tenue a jour hors du thread Tk (branchement / debranchement).
+        self.device_monitor: DeviceMonitor | None = None
+        self._device_update: list[DeviceInfo] | None = None
+        self.selected_device_name = ""
+        self.bench_results: dict[str, ModelResult] = {}
+        self._bench_result: tuple[list[ModelResult], ModelResult | None, bool] | None = None
 
         self.pending_transcription: str | None = None
 
         self._build_ui()
         self._load_config_to_form()
         self._refresh_dynamic_controls()
+        self.start_btn.configure(state="disabled")
 
-        self.root.after(120, self._poll_events)
+        self.root.bind(WAKEUP_EVENT, self._drain_events)
+        self.root.bind("<Map>", self._on_window_visibility)
+        self.root.bind("<Unmap>", self._on_window_visibility)
+        self.root.after(self._poll_ms, self._safety_poll)
+        threading.Thread(target=self._warm_up, name="voxbridge-warmup", daemon=True).start()
+
+    def _warm_up(self) -> None:
+        window_sec = time.perf_counter() - self.started_at
+        phases = []
+        models: list[str] = []
+        devices: list[DeviceInfo] = []
+        try:
+            t0 = time.perf_counter()
+            from .core import discover_models
+            from .devices import DeviceInfo, list_input_devices
+
+            phases.append(f"moteur {time.perf_counter() - t0:.2f}s")
+            models = discover_models(self.project_root)
+            self._load_bench_results(models)
+            t0 = time.perf_counter()
+            try:
+                # Demon lance: pyaudio et whisper y sont deja charges.
+                devices = [DeviceInfo(**d) for d in request(self.project_root, "devices")]
+                self.daemon = True
+                phases.append(f"peripheriques (demon) {time.perf_counter() - t0:.2f}s")
+            except ConnectionError:
+                devices = list_input_devices()
+                phases.append(f"peripheriques {time.perf_counter() - t0:.2f}s")
+        except Exception as exc:
+            self._queue_event("error", f"Initialisation audio: {exc}")
+        self._warm_result = (models, devices)
+        self._queue_event("ready", f"Demarrage: fenetre {window_sec:.2f}s, " + ", ".join(phases))
+
+        if self.cfg.mode == "traduction" and not self.daemon:
+            t0 = time.perf_counter()
+            try:
+                import argostranslate.translate  # noqa: F401
+            except Exception:
+                return
+            self._queue_event("status", f"Prechargement argostranslate: {time.perf_counter() - t0:.2f}s")
+
+    def _load_bench_results(self, models: list[str]) -> None:
+        from .modelbench import cached_result, load_cache
+
+        cache = load_cache(self.project_root)
+        backend, use_cuda = self.cfg.backend, bool(self.cfg.use_cuda)
+        for model in models:
+            result = cached_result(self.project_root, cache, model, backend, use_cuda)
+            if result is not None:
+                self.bench_results[model] = result
 
     def _build_ui(self) -> None:
         top = ttk.Frame(self.root, padding=12)
@@ -54,7 +151,7 @@ class TranslatorAppUI:
             top,
             textvariable=self.source_var,
             state="readonly",
-            values=["loopback", "device"],
+            values=["loopback", "device", "monitor"],
             width=18,
         )
         self.source_combo.grid(row=1, column=1, padx=(0, 12), sticky="we")
@@ -62,15 +159,33 @@ class TranslatorAppUI:
 
         ttk.Label(top, text="Peripherique (si source=device)").grid(row=0, column=2, sticky="w")
         self.device_var = tk.StringVar()
-        self.device_combo = ttk.Combobox(top, textvariable=self.device_var, state="readonly", width=48)
+        self.device_combo = ttk.Combobox(
+            top,
+            textvariable=self.device_var,
+            state="readonly",
+            width=48,
+            postcommand=self._refresh_devices,
+        )
         self.device_combo.grid(row=1, column=2, padx=(0, 12), sticky="we")
+        self.device_combo.bind("<<ComboboxSelected>>", lambda _: self._on_device_selected())
 
         ttk.Label(top, text="Modele Whisper").grid(row=2, column=0, sticky="w", pady=(12, 0))
         self.model_var = tk.StringVar()
         self.model_combo = ttk.Combobox(top, textvariable=self.model_var, state="readonly", width=48)
-        self.model_combo.grid(row=3, column=0, columnspan=3, sticky="we")
+        self.model_combo.grid(row=3, column=0, columnspan=2, padx=(0, 12), sticky="we")
         self.model_combo.bind("<<ComboboxSelected>>", lambda _: self._refresh_model_help())
 
+        ttk.Label(top, text="Backend Whisper").grid(row=2, column=2, sticky="w", pady=(12, 0))
+        self.backend_var = tk.StringVar(value="server")
+        self.backend_combo = ttk.Combobox(
+            top,
+            textvariable=self.backend_var,
+            state="readonly",
+            values=["server", "cli"],
+            width=18,
+        )
+        self.backend_combo.grid(row=3, column=2, sticky="w")
+
         self.model_help_var = tk.StringVar(value="")
         self.model_help = ttk.Label(
             top,
@@ -90,6 +205,35 @@ class TranslatorAppUI:
         self.cuda_check = ttk.Checkbutton(opts, text="Utiliser GPU (CUDA)", variable=self.cuda_var)
         self.cuda_check.pack(side="left")
 
+        self.capture_process_var = tk.BooleanVar(value=False)
+        self.capture_process_check = ttk.Checkbutton(
+            opts,
+            text="Capture dans un process dedie",
+            variable=self.capture_process_var,
+        )
+        self.capture_process_check.pack(side="left", padx=(16, 0))
+
+        self.streaming_var = tk.BooleanVar(value=False)
+        self.streaming_check = ttk.Checkbutton(
+            opts,
+            text="Streaming (texte provisoire)",
+            variable=self.streaming_var,
+        )
+        self.streaming_check.pack(side="left", padx=(16, 0))
+
+        self.trace_var = tk.BooleanVar(value=False)
+        self.trace_check = ttk.Checkbutton(opts, text="Trace (Perfetto)", variable=self.trace_var)
+        self.trace_check.pack(side="left", padx=(16, 0))
+
+        self.profile_var = tk.BooleanVar(value=False)
+        self.profile_check = ttk.Checkbutton(
+            opts,
+            text="Profiler",
+            variable=self.profile_var,
+            command=self._toggle_profiling,
+        )
+        self.profile_check.pack(side="left", padx=(16, 0))
+
         self.show_status_var = tk.BooleanVar(value=True)
         self.show_status_check = ttk.Checkbutton(
             opts,
@@ -110,6 +254,8 @@ class TranslatorAppUI:
         self.start_btn.pack(side="right")
         self.stop_btn = ttk.Button(opts, text="Stop", command=self.stop_worker, state="disabled")
         self.stop_btn.pack(side="right", padx=(0, 8))
+        self.bench_btn = ttk.Button(opts, text="Tester les modeles", command=self.benchmark_models, state="disabled")
+        self.bench_btn.pack(side="right", padx=(0, 8))
 
         log_wrap = ttk.Frame(self.root, padding=12)
         log_wrap.pack(fill="both", expand=True)
@@ -118,11 +264,36 @@ class TranslatorAppUI:
         self.log.pack(fill="both", expand=True)
         self.log.configure(state="disabled")
 
+        self.partial_var = tk.StringVar(value="")
+        self.partial_label = ttk.Label(
+            log_wrap,
+            textvariable=self.partial_var,
+            justify="left",
+            wraplength=940,
+            foreground="#808080",
+        )
+        self.partial_label.pack(fill="x", pady=(6, 0))
+
+        self.metrics_var = tk.StringVar(value="")
+        self.metrics_label = ttk.Label(
+            log_wrap,
+            textvariable=self.metrics_var,
+            justify="left",
+            wraplength=940,
+            foreground="#505050",
+        )
+        self.metrics_label.pack(fill="x", pady=(4, 0))
+
+    @staticmethod
+    def _device_label(d: DeviceInfo) -> str:
+        return f"{d.index} - {d.name} ({d.max_input_channels} in, {d.default_sample_rate} Hz)"
+
     def _device_labels(self) -> list[str]:
-        labels = []
-        for d in self.devices:
-            labels.append(f"{d.index} - {d.name} ({d.max_input_channels} in, {d.default_sample_rate} Hz)")
-        return labels
+        return [self._device_label(d) for d in self.devices]
+
+    def _selected_device(self) -> DeviceInfo | None:
+        label = self.device_var.get().strip()
+        return next((d for d in self.devices if self._device_label(d) == label), None)
 
     def _model_explanation(self, model_name: str) -> str:
         if not model_name:
@@ -149,6 +320,9 @@ class TranslatorAppUI:
         size_mb = model_path.stat().st_size / (1024 * 1024) if model_path.exists() else 0.0
         size_info = f"Taille approx: {size_mb:.1f} MB"
 
+        measured = self.bench_results.get(model_name)
+        if measured is not None and measured.ok:
+            return f"{tier}. {lang}. {quant}. {size_info}. Mesure sur cette machine: {measured.describe()}."
         return f"{tier}. {lang}. {quant}. {size_info}."
 
     def _refresh_model_help(self) -> None:
@@ -158,29 +332,44 @@ class TranslatorAppUI:
         self.mode_var.set(self.cfg.mode)
         self.source_var.set(self.cfg.source)
         self.cuda_var.set(bool(self.cfg.use_cuda))
+        self.backend_var.set(self.cfg.backend if self.cfg.backend in ("server", "cli") else "server")
+        self.capture_process_var.set(bool(self.cfg.capture_process))
+        self.streaming_var.set(bool(self.cfg.streaming))
+        self.trace_var.set(bool(self.cfg.trace))
         self.show_status_var.set(bool(self.cfg.show_status_info))
         self.show_transcription_var.set(bool(self.cfg.show_transcription_with_translation))
+        self._fill_model_and_device_lists()
 
-        model_values = self.models if self.models else ["Aucun modele detecte"]
+    def _fill_model_and_device_lists(self) -> None:
+        loading = "Chargement..."
+        model_values = self.models if self.models else ["Aucun modele detecte" if self.ready else loading]
         self.model_combo["values"] = model_values
         if self.cfg.model_name in self.models:
             self.model_var.set(self.cfg.model_name)
         elif self.models:
             self.model_var.set(self.models[0])
 
-        device_values = self._device_labels() if self.devices else ["Aucun device input detecte"]
+        device_values = self._device_labels()
+        if not device_values:
+            device_values = ["Aucun device input detecte" if self.ready else loading]
         self.device_combo["values"] = device_values
 
         preferred_idx = self.cfg.device_index
         selected = None
+        for d in self.devices:
+            if d.name == self.cfg.device_name:
+                selected = self._device_label(d)
+                break
         for label in device_values:
-            if label.startswith(f"{preferred_idx} -"):
+            if selected is None and label.startswith(f"{preferred_idx} -"):
                 selected = label
                 break
         if selected is None and device_values:
             selected = device_values[0]
         if selected:
             self.device_var.set(selected)
+        device = self._selected_device()
+        self.selected_device_name = device.name if device is not None else ""
 
         self._refresh_model_help()
 
@@ -189,6 +378,7 @@ class TranslatorAppUI:
             self.device_combo.configure(state="readonly")
         else:
             self.device_combo.configure(state="disabled")
+        self._update_device_monitor()
 
         if self.mode_var.get() == "traduction":
             self.show_transcription_check.configure(state="normal")
@@ -196,8 +386,25 @@ class TranslatorAppUI:
             self.show_transcription_check.configure(state="disabled")
 
     def _append_log(self, text: str) -> None:
+        """Ligne ajoutee au prochain rafraichissement: un seul insert Tk par lot d'evenements."""
+        self._log_batch.append(text)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.root.after_idle(self._flush_log)
+
+    def _flush_log(self) -> None:
+        self._flush_scheduled = False
+        if not self._log_batch:
+            return
+        text = "\n".join(self._log_batch) + "\n"
+        self._log_batch.clear()
         self.log.configure(state="normal")
-        self.log.insert("end", text + "\n")
+        self.log.insert("end", text)
+        lines = int(self.log.index("end-1c").split(".")[0])
+        if lines > MAX_LOG_LINES:
+            # Coupe par blocs: le widget reste borne sans un delete a chaque ligne.
+            self.log.delete("1.0", f"{lines - MAX_LOG_LINES + TRIM_LOG_LINES}.0")
+            self.log_trimmed_lines += lines - MAX_LOG_LINES + TRIM_LOG_LINES - 1
         self.log.see("end")
         self.log.configure(state="disabled")
 
@@ -205,51 +412,129 @@ class TranslatorAppUI:
         if bool(self.show_status_var.get()):
             self._append_log(f"[status] {text}")
 
-    def _poll_events(self) -> None:
+    def _queue_event(self, kind: str, msg: str) -> None:
+        """Appele depuis les threads worker: une seule demande de reveil Tk par lot."""
+        self.event_queue.put(UiEvent(kind, msg))
+        if not self._threaded_tcl:
+            # Tcl sans threads: seule la scrutation (_safety_poll, resserree) lit la file.
+            return
+        with self._wakeup_lock:
+            if self._wakeup_pending:
+                return
+            self._wakeup_pending = True
         try:
-            while True:
-                kind, msg = self.event_queue.get_nowait()
-
-                if kind == "status":
-                    self._append_status(msg)
-                    continue
-
-                if kind == "error":
-                    self._append_log(f"[error] {msg}")
-                    continue
-
-                if kind == "stopped":
-                    self.start_btn.configure(state="normal")
-                    self.stop_btn.configure(state="disabled")
-                    self._append_status("worker stopped")
-                    self.pending_transcription = None
-                    self.worker = None
-                    continue
-
-                mode = self.mode_var.get().strip()
-                show_both = bool(self.show_transcription_var.get())
-
-                if kind == "transcription":
-                    self.pending_transcription = msg
-                    if mode == "transcription":
-                        self._append_log(msg)
-                    continue
-
-                if kind == "translation":
-                    if mode != "traduction":
-                        continue
-
-                    if show_both and self.pending_transcription:
-                        self._append_log(self.pending_transcription)
-                        self._append_log(msg)
-                        self._append_log("")
-                    else:
-                        self._append_log(msg)
-                    self.pending_transcription = None
-        except queue.Empty:
-            pass
-        finally:
-            self.root.after(120, self._poll_events)
+            self.root.event_generate(WAKEUP_EVENT, when="tail")
+        except (RuntimeError, tk.TclError):
+            # Boucle Tk pas encore demarree (ou fermee): la scrutation de secours prendra le relais.
+            with self._wakeup_lock:
+                self._wakeup_pending = False
+
+    def _safety_poll(self) -> None:
+        if not self.event_queue.empty():
+            self._drain_events()
+        self.root.after(self._poll_ms, self._safety_poll)
+
+    def _drain_events(self, _event: tk.Event | None = None) -> None:
+        with self._wakeup_lock:
+            self._wakeup_pending = False
+        received = []
+        for _ in range(MAX_EVENTS_PER_DRAIN):
+            try:
+                event = self.event_queue.get_nowait()
+            except queue.Empty:
+                break
+            received.append(event.at)
+            self._handle_event(event.kind, event.message)
+        else:
+            # Rafale: rendre la main a Tk (dessin, clics) avant le lot suivant.
+            self.root.after_idle(self._drain_events)
+        self._flush_log()
+        shown = time.monotonic()
+        for at in received:
+            self.ui_latency.observe(shown - at)
+
+    def _ui_summary(self) -> str:
+        lines = int(self.log.index("end-1c").split(".")[0])
+        return (
+            f"UI: evenement -> affichage p50 {self.ui_latency.quantile(0.5) * 1000:.0f} ms / "
+            f"p95 {self.ui_latency.quantile(0.95) * 1000:.0f} ms, journal {lines} lignes "
+            f"({self.log_trimmed_lines} anciennes retirees, max {MAX_LOG_LINES})"
+        )
+
+    def _handle_event(self, kind: str, msg: str) -> None:
+        if kind == "status":
+            self._append_status(msg)
+            return
+
+        if kind == "error":
+            self._append_log(f"[error] {msg}")
+            return
+
+        if kind == "ready":
+            self.models, self.devices = self._warm_result or ([], [])
+            self.ready = True
+            self._fill_model_and_device_lists()
+            if self.worker is None:
+                self.start_btn.configure(state="normal")
+                self.bench_btn.configure(state="normal" if self.models else "disabled")
+            self._append_status(msg)
+            self._start_device_monitor()
+            return
+
+        if kind == "devices":
+            self._apply_devices()
+            return
+
+        if kind == "benchmark":
+            self._finish_benchmark(msg)
+            return
+
+        if kind == "partial":
+            self.partial_var.set(f"... {msg}" if msg else "")
+            return
+
+        if kind == "metrics":
+            self.metrics_var.set(msg if bool(self.show_status_var.get()) else "")
+            return
+
+        if kind == "interim":
+            self.partial_var.set(f"FR ... {msg}" if msg else "")
+            return
+
+        if kind == "stopped":
+            self.start_btn.configure(state="normal")
+            self.bench_btn.configure(state="normal" if self.models else "disabled")
+            self.stop_btn.configure(state="disabled")
+            self._append_status("worker stopped")
+            self._append_status(self._ui_summary())
+            self.pending_transcription = None
+            self.partial_var.set("")
+            self.worker = None
+            self.worker_source = ""
+            self._update_device_monitor()
+            return
+
+        mode = self.mode_var.get().strip()
+        show_both = bool(self.show_transcription_var.get())
+
+        if kind == "transcription":
+            self.pending_transcription = msg
+            if mode == "transcription":
+                self._append_log(msg)
+            return
+
+        if kind == "translation":
+            if mode != "traduction":
+                return
+
+            self.partial_var.set("")
+            if show_both and self.pending_transcription:
+                self._append_log(self.pending_transcription)
+                self._append_log(msg)
+                self._append_log("")
+            else:
+                self._append_log(msg)
+            self.pending_transcription = None
 
     def _parse_selected_device_index(self) -> int:
         label = self.device_var.get().strip()
@@ -261,6 +546,10 @@ class TranslatorAppUI:
             return 0
 
     def _build_run_options(self) -> RunOptions | None:
+        from .core import RunOptions
+
+        if not self.ready:
+            return None
         if not self.models:
             messagebox.showerror("Modele manquant", "Aucun modele ggml*.bin detecte dans whisper.cpp/models")
             return None
@@ -278,21 +567,38 @@ class TranslatorAppUI:
             mode=mode,
             source=source,
             device_index=device_index,
+            device_name=self.selected_device_name,
             model_path=self.project_root / "whisper.cpp" / "models" / model_name,
             use_cuda=bool(self.cuda_var.get()),
+            backend=self.backend_var.get().strip(),
+            capture_process=bool(self.capture_process_var.get()),
+            vad=self.cfg.vad,
+            split_search_sec=float(self.cfg.split_search_sec),
+            streaming=bool(self.streaming_var.get()),
+            trace=bool(self.trace_var.get()),
+            profile=bool(self.profile_var.get()),
+            translation=self.cfg.translation,
+            translation_workers=int(self.cfg.translation_workers),
+            threads=live_threads(self.cfg, model_name),
         )
 
     def _save_current_config(self) -> None:
-        cfg = AppConfig(
+        self.cfg = replace(
+            self.cfg,
             mode=self.mode_var.get().strip(),
             source=self.source_var.get().strip(),
             device_index=self._parse_selected_device_index(),
+            device_name=self.selected_device_name,
             model_name=self.model_var.get().strip(),
             use_cuda=bool(self.cuda_var.get()),
+            backend=self.backend_var.get().strip(),
+            capture_process=bool(self.capture_process_var.get()),
+            streaming=bool(self.streaming_var.get()),
+            trace=bool(self.trace_var.get()),
             show_transcription_with_translation=bool(self.show_transcription_var.get()),
             show_status_info=bool(self.show_status_var.get()),
         )
-        save_config(self.project_root, cfg)
+        save_config(self.project_root, self.cfg)
 
     def start_worker(self) -> None:
         if self.worker is not None:
@@ -305,16 +611,161 @@ class TranslatorAppUI:
         self._save_current_config()
 
         self.start_btn.configure(state="disabled")
+        self.bench_btn.configure(state="disabled")
         self.stop_btn.configure(state="normal")
         self.pending_transcription = None
         self._append_status("starting worker...")
 
-        self.worker = TranscriptionWorker(
-            project_root=self.project_root,
-            options=options,
-            on_event=lambda kind, msg: self.event_queue.put((kind, msg)),
-        )
+        conn = connect_daemon(self.project_root) if self.daemon else None
+        if conn is not None:
+            self._append_status("session dans le demon VoxBridge")
+            self.worker = RemoteWorker(conn, asdict(options), self._queue_event)
+        else:
+            from .core import TranscriptionWorker
+
+            self.worker = TranscriptionWorker(project_root=self.project_root, options=options, on_event=self._queue_event)
+        self.worker_source = options.source
         self.worker.start()
+        self._update_device_monitor()
+
+    def _start_device_monitor(self) -> None:
+        if self.device_monitor is not None:
+            return
+        self.device_monitor = DeviceMonitor(
+            self._on_devices_changed,
+            list(self.devices),
+            on_error=lambda message: self._queue_event("error", f"Enumeration peripheriques: {message}"),
+        )
+        self._update_device_monitor()
+        self.device_monitor.start()
+
+    def _update_device_monitor(self) -> None:
+        """Le moniteur ne tourne que si le choix du peripherique est visible ou la capture arretee."""
+        if self.device_monitor is None:
+            return
+        shown = self.root.state() not in ("iconic", "withdrawn")
+        picker = self.source_var.get() == "device"
+        self.device_monitor.set_active(shown and (picker or self.worker is None))
+
+    def _on_window_visibility(self, event: tk.Event) -> None:
+        if event.widget is self.root:
+            self._update_device_monitor()
+
+    def _refresh_devices(self) -> None:
+        """Liste deroulee: enumeration immediate, meme moniteur endormi."""
+        if self.device_monitor is not None:
+            self.device_monitor.refresh()
+
+    def _on_devices_changed(self, devices: list[DeviceInfo]) -> None:
+        """Thread du moniteur: la liste est appliquee par le thread Tk."""
+        self._device_update = devices
+        self._queue_event("devices", "")
+
+    def _apply_devices(self) -> None:
+        devices, self._device_update = self._device_update, None
+        if devices is None:
+            return
+        previous = self._selected_device()
+        before = {d.name for d in self.devices}
+        after = {d.name for d in devices}
+        for name in sorted(after - before):
+            self._append_status(f"Peripherique branche: {name}")
+        for name in sorted(before - after):
+            self._append_status(f"Peripherique debranche: {name}")
+        self.devices = devices
+        self.device_combo["values"] = self._device_labels() or ["Aucun device input detecte"]
+
+        match = next((d for d in devices if d.name == self.selected_device_name), None)
+        if match is None:
+            # Peripherique choisi absent: le choix est garde pour son retour.
+            return
+        self.device_var.set(self._device_label(match))
+        if previous is None or previous.index != match.index:
+            self._switch_worker_device(match)
+
+    def _on_device_selected(self) -> None:
+        device = self._selected_device()
+        if device is None:
+            return
+        self.selected_device_name = device.name
+        if self._switch_worker_device(device):
+            self._append_status(f"Capture basculee sur: {device.name}")
+
+    def _switch_worker_device(self, device: DeviceInfo) -> bool:
+        if self.worker is None or self.worker_source != "device":
+            return False
+        self.worker.switch_device(device.index, device.name)
+        return True
+
+    def benchmark_models(self) -> None:
+        """Mesure chaque modele sur l'extrait de reference puis selectionne le plus precis sous la cible."""
+        if self.worker is not None or not self.ready or not self.models:
+            return
+        self.start_btn.configure(state="disabled")
+        self.bench_btn.configure(state="disabled")
+        target = float(self.cfg.model_target_latency_sec)
+        self._append_status(f"Test des modeles ({len(self.models)}), cible {target:.2f}s par segment...")
+        threading.Thread(
+            target=self._run_benchmark,
+            args=(list(self.models), self.backend_var.get().strip(), bool(self.cuda_var.get())),
+            name="voxbridge-modelbench",
+            daemon=True,
+        ).start()
+
+    def _run_benchmark(self, models: list[str], backend: str, use_cuda: bool) -> None:
+        from .core import RunOptions
+        from .modelbench import default_clip, recommend, run_benchmark
+
+        clip_path, reference = default_clip(self.project_root)
+        if not clip_path.exists():
+            self._queue_event("error", f"Extrait de reference introuvable: {clip_path}")
+            self._queue_event("benchmark", "")
+            return
+        options = RunOptions(
+            mode="transcription",
+            source="file",
+            device_index=0,
+            model_path=self.project_root / "whisper.cpp" / "models" / models[0],
+            use_cuda=use_cuda,
+            backend=backend,
+        )
+
+        def progress(result: ModelResult, from_cache: bool) -> None:
+            self._queue_event("status", f"{result.model}: {result.describe()}" + (" (cache)" if from_cache else ""))
+
+        try:
+            results = run_benchmark(self.project_root, models, options, clip_path, reference, progress=progress)
+        except Exception as exc:
+            self._queue_event("error", f"Test des modeles: {exc}")
+            self._queue_event("benchmark", "")
+            return
+        best, meets = recommend(results, float(self.cfg.model_target_latency_sec))
+        self._bench_result = (results, best, meets)
+        self._queue_event("benchmark", "done")
+
+    def _finish_benchmark(self, msg: str) -> None:
+        self.start_btn.configure(state="normal")
+        self.bench_btn.configure(state="normal")
+        if not msg or self._bench_result is None:
+            return
+        results, best, meets = self._bench_result
+        self._bench_result = None
+        self.bench_results.update({r.model: r for r in results if r.ok})
+        if best is None:
+            self._append_log("[error] Aucun modele n'a pu etre mesure")
+            return
+        self.model_var.set(best.model)
+        self._refresh_model_help()
+        self._save_current_config()
+        target = float(self.cfg.model_target_latency_sec)
+        if meets:
+            self._append_status(f"Modele choisi: {best.model} (le plus precis sous {target:.2f}s par segment)")
+        else:
+            self._append_status(f"Aucun modele sous {target:.2f}s par segment; le plus rapide: {best.model}")
+
+    def _toggle_profiling(self) -> None:
+        if self.worker is not None:
+            self.worker.set_profiling(bool(self.profile_var.get()))
 
     def stop_worker(self) -> None:
         if self.worker is None:
@@ -323,8 +774,8 @@ class TranslatorAppUI:
         self._append_status("stop requested...")
 
 
-def launch_gui(project_root: Path) -> None:
+def launch_gui(project_root: Path, started_at: float | None = None) -> None:
     root = tk.Tk()
-    TranslatorAppUI(root, project_root)
+    TranslatorAppUI(root, project_root, started_at)
     root.mainloop()
 
@@ -0,0 +1,143 @@
+﻿from __future__ import annotations
+
+import numpy as np
+
+
+PEAK_THRESHOLD = 300
+SUBFRAME_SEC = 0.010
+MIN_ENERGY_DB = -60.0
+ONSET_MARGIN_DB = 9.0
+HOLD_MARGIN_DB = 5.0
+FLOOR_RISE = 0.005
+FLOOR_FALL = 0.30
+ONSET_SUBFRAMES = 3
+PREROLL_SEC = 0.25
+MIN_SPEECH_SEC = 0.15
+MIN_VOICED_RATIO = 0.15
+
+
+def frame_energies_db(block: np.ndarray, frame: int) -> np.ndarray:
+    """Energie RMS (dBFS) de chaque trame de ``frame`` echantillons, en une passe."""
+    mono = block.astype(np.float32)
+    if mono.ndim == 2:
+        mono = mono.mean(axis=1)
+    usable = mono.size - mono.size % frame
+    if usable <= 0:
+        return np.empty(0, dtype=np.float32)
+    frames = mono[:usable].reshape(-1, frame) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1) + 1e-12)
+    return 20.0 * np.log10(rms)
+
+
+class Vad:
+    """Detecteur d'activite vocale: decision par bloc + filtre de segments."""
+
+    name = "base"
+    preroll_sec = 0.0
+
+    def __init__(self, rate: int) -> None:
+        self.rate = rate
+        self.accepted_segments = 0
+        self.rejected_segments = 0
+
+    def is_speech(self, block: np.ndarray) -> bool:
+        raise NotImplementedError
+
+    def is_pause(self, energy_db: float) -> bool:
+        raise NotImplementedError
+
+    def accept_segment(self, audio: np.ndarray) -> bool:
+        self.accepted_segments += 1
+        return True
+
+    def _reject(self) -> bool:
+        self.rejected_segments += 1
+        return False
+
+    def describe(self) -> str:
+        return self.name
+
+
+class PeakVad(Vad):
+    """Ancien comportement: pic d'amplitude fixe."""
+
+    name = "peak"
+
+    def __init__(self, rate: int, threshold: int = PEAK_THRESHOLD) -> None:
+        super().__init__(rate)
+        self.threshold = threshold
+
+    def is_speech(self, block: np.ndarray) -> bool:
+        if not block.size:
+            return False
+        return int(np.max(np.abs(block.astype(np.int32)))) > self.threshold
+
+    def is_pause(self, energy_db: float) -> bool:
+        return energy_db < 20.0 * np.log10(self.threshold / 32768.0)
+
+
+class EnergyVad(Vad):
+    """Energie RMS par sous-trames de 10 ms, plancher de bruit adaptatif et hysteresis.
+
+    Un segment est rejete s'il contient trop peu de parole (duree ou proportion
+    de sous-trames voisees), ce qui evite un appel whisper sur du bruit.
+    """
+
+    name = "energy"
+    preroll_sec = PREROLL_SEC
+
+    def __init__(self, rate: int) -> None:
+        super().__init__(rate)
+        self.subframe = max(1, int(rate * SUBFRAME_SEC))
+        self.noise_floor_db = MIN_ENERGY_DB + 10.0
+        self.active = False
+        self._onset_run = 0
+
+    def _update_floor(self, energies: np.ndarray) -> None:
+        quietest = float(np.min(energies))
+        rate = FLOOR_FALL if quietest < self.noise_floor_db else FLOOR_RISE
+        self.noise_floor_db += (quietest - self.noise_floor_db) * rate
+        self.noise_floor_db = max(self.noise_floor_db, MIN_ENERGY_DB)
+
+    def is_speech(self, block: np.ndarray) -> bool:
+        energies = frame_energies_db(block, self.subframe)
+        if not energies.size:
+            return self.active
+
+        onset = energies > self.noise_floor_db + ONSET_MARGIN_DB
+        hold = energies > self.noise_floor_db + HOLD_MARGIN_DB
+        voiced = 0
+        for is_onset, is_hold in zip(onset.tolist(), hold.tolist()):
+            if self.active:
+                self.active = is_hold
+                self._onset_run = 0
+            else:
+                self._onset_run = self._onset_run + 1 if is_onset else 0
+                self.active = self._onset_run >= ONSET_SUBFRAMES
+            voiced += int(self.active)
+
+        self._update_floor(energies)
+        return voiced > 0
+
+    def is_pause(self, energy_db: float) -> bool:
+        return energy_db < self.noise_floor_db + HOLD_MARGIN_DB
+
+    def accept_segment(self, audio: np.ndarray) -> bool:
+        energies = frame_energies_db(audio, self.subframe)
+        if not energies.size:
+            return self._reject()
+        voiced = int(np.count_nonzero(energies > self.noise_floor_db + HOLD_MARGIN_DB))
+        speech_sec = voiced * self.subframe / self.rate
+        if speech_sec < MIN_SPEECH_SEC or voiced / energies.size < MIN_VOICED_RATIO:
+            return self._reject()
+        return super().accept_segment(audio)
+
+    def describe(self) -> str:
+        return f"energy (plancher {self.noise_floor_db:.1f} dBFS)"
+
+
+VAD_TYPES = {"energy": EnergyVad, "peak": PeakVad}
+
+
+def create_vad(name: str, rate: int) -> Vad:
+    return VAD_TYPES.get(name, EnergyVad)(rate)
@@ -0,0 +1,540 @@
+﻿"""Service d'ingestion: surveille un dossier et transcrit les nouveaux fichiers (``python -m app.watch DOSSIER``).
+
+Les travaux et leurs morceaux sont stockes dans SQLite: apres un arret (ou un crash),
+les morceaux deja transcrits ne sont pas refaits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import signal
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .audio import WHISPER_RATE
+from .batch import (
+    FORMATS,
+    Chunk,
+    ChunkResult,
+    Cue,
+    build_cues,
+    chunk_words,
+    create_pool,
+    load_audio,
+    plan_chunks,
+    pool_settings,
+    transcribe_chunk,
+    write_outputs,
+)
+from .cli import resolve_model_path
+from .core import RunOptions
+from .merge import Word
+from .translation import TranslationService
+
+
+AUDIO_SUFFIXES = (".wav", ".flac")
+DB_FILENAME = ".voxbridge_jobs.sqlite3"
+SCAN_INTERVAL_SEC = 5.0
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SEC = 10.0
+INFLIGHT_PER_WORKER = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    chunks_total INTEGER NOT NULL DEFAULT 0,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    audio_sec REAL NOT NULL DEFAULT 0,
+    error TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    idx INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    text TEXT NOT NULL DEFAULT '',
+    words TEXT NOT NULL DEFAULT '[]',
+    error TEXT NOT NULL DEFAULT '',
+    elapsed REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    path: Path
+    status: str
+    chunks_total: int
+    chunks_done: int
+    audio_sec: float
+    error: str
+
+
+class JobStore:
+    """File de travaux persistante; un seul thread l'utilise (boucle du service)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.db = sqlite3.connect(str(path))
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def recover(self) -> int:
+        """Remet en file ce qui etait en cours lors de l'arret precedent."""
+        with self.db:
+            count = self.db.execute("UPDATE chunks SET status = 'pending' WHERE status = 'running'").rowcount
+            self.db.execute("UPDATE jobs SET status = 'pending' WHERE status = 'planning'")
+        return count
+
+    def add(self, path: Path, size: int, mtime: float) -> bool:
+        """Met le fichier en file; un fichier remplace (taille ou date changee) repart de zero sous un nouvel id."""
+        now = time.time()
+        with self.db:
+            row = self.db.execute("SELECT id, size, mtime FROM jobs WHERE path = ?", (str(path),)).fetchone()
+            if row is not None and (row["size"], row["mtime"]) == (size, mtime):
+                return False
+            # Id pris avant la suppression: jamais reutilise, les resultats en vol de l'ancien travail sont ignores.
+            job_id = self.db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM jobs").fetchone()[0]
+            if row is not None:
+                self.db.execute("DELETE FROM chunks WHERE job_id = ?", (row["id"],))
+                self.db.execute("DELETE FROM jobs WHERE id = ?", (row["id"],))
+            self.db.execute(
+                "INSERT INTO jobs (id, path, size, mtime, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, str(path), size, mtime, now, now),
+            )
+        return True
+
+    def _job(self, row: sqlite3.Row) -> Job:
+        return Job(
+            row["id"],
+            Path(row["path"]),
+            row["status"],
+            row["chunks_total"],
+            row["chunks_done"],
+            row["audio_sec"],
+            row["error"],
+        )
+
+    def job(self, job_id: int) -> Job | None:
+        row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def jobs(self, status: str | None = None) -> list[Job]:
+        if status is None:
+            rows = self.db.execute("SELECT * FROM jobs ORDER BY id").fetchall()
+        else:
+            rows = self.db.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id", (status,)).fetchall()
+        return [self._job(row) for row in rows]
+
+    def set_job(self, job_id: int, **fields) -> None:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self.db:
+            self.db.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def add_chunks(self, job_id: int, chunks: list[Chunk], audio_sec: float) -> None:
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO chunks (job_id, idx, start, end) VALUES (?, ?, ?, ?)",
+                [(job_id, c.index, c.start, c.end) for c in chunks],
+            )
+        self.set_job(job_id, status="running", chunks_total=len(chunks), audio_sec=audio_sec)
+
+    def chunks(self, job_id: int, status: str | None = None) -> list[sqlite3.Row]:
+        query = "SELECT * FROM chunks WHERE job_id = ?" + (" AND status = ?" if status else "") + " ORDER BY idx"
+        return self.db.execute(query, (job_id, status) if status else (job_id,)).fetchall()
+
+    def next_chunk(self, job_id: int, now: float) -> sqlite3.Row | None:
+        return self.db.execute(
+            "SELECT * FROM chunks WHERE job_id = ? AND status = 'pending' AND not_before <= ? ORDER BY idx LIMIT 1",
+            (job_id, now),
+        ).fetchone()
+
+    def mark_running(self, job_id: int, idx: int) -> None:
+        with self.db:
+            self.db.execute("UPDATE chunks SET status = 'running' WHERE job_id = ? AND idx = ?", (job_id, idx))
+
+    def finish_chunk(self, job_id: int, result: ChunkResult) -> None:
+        words = json.dumps([[w.text, w.start, w.end] for w in result.words])
+        with self.db:
+            self.db.execute(
+                "UPDATE chunks SET status = 'done', attempts = attempts + 1, text = ?, words = ?, error = '', "
+                "elapsed = ? WHERE job_id = ? AND idx = ?",
+                (result.text, words, result.elapsed, job_id, result.index),
+            )
+            self.db.execute(
+                "UPDATE jobs SET chunks_done = chunks_done + 1, updated_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+    def fail_chunk(self, job_id: int, idx: int, error: str, max_attempts: int) -> bool:
+        """Compte un echec; True si le morceau sera retente (avec un delai croissant)."""
+        row = self.db.execute("SELECT attempts FROM chunks WHERE job_id = ? AND idx = ?", (job_id, idx)).fetchone()
+        if row is None:  # travail remplace entre-temps
+            return False
+        attempts = row["attempts"] + 1
+        retry = attempts < max_attempts
+        not_before = time.time() + RETRY_BACKOFF_SEC * attempts
+        with self.db:
+            self.db.execute(
+                "UPDATE chunks SET status = ?, attempts = ?, error = ?, not_before = ? WHERE job_id = ? AND idx = ?",
+                ("pending" if retry else "failed", attempts, error, not_before, job_id, idx),
+            )
+        return retry
+
+    def close(self) -> None:
+        self.db.close()
+
+
+def stored_result(row: sqlite3.Row) -> ChunkResult:
+    words = [Word(text, start, end) for text, start, end in json.loads(row["words"])]
+    return ChunkResult(row["idx"], row["status"] == "done", row["text"], words, row["error"], row["elapsed"])
+
+
+class WatchService:
+    """Boucle unique: scrute le dossier, planifie les fichiers, garde le pool whisper occupe.
+
+    Les morceaux de plusieurs fichiers peuvent etre en vol en meme temps (au plus
+    ``INFLIGHT_PER_WORKER`` par worker); un fichier est finalise (SRT/VTT/JSON) des
+    que tous ses morceaux sont termines, et que ses sous-titres sont traduits si
+    ``translator`` est fourni (sans bloquer la boucle).
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        output_dir: Path,
+        store: JobStore,
+        project_root: Path,
+        options: RunOptions,
+        args: argparse.Namespace,
+        translator: TranslationService | None = None,
+    ) -> None:
+        self.directory = directory
+        self.output_dir = output_dir
+        self.store = store
+        self.project_root = project_root
+        self.options = options
+        self.args = args
+        self.translator = translator
+        self.workers = max(1, args.workers)
+        self.stop_event = threading.Event()
+        self.pool = None
+        self._inflight: dict[Future, tuple[int, int]] = {}
+        self._audio: dict[int, np.ndarray] = {}
+        self._translating: dict[int, tuple[Job, list[Cue], list[Future], dict]] = {}
+        self._sizes: dict[Path, tuple[int, float]] = {}
+        self._last_scan = 0.0
+        self._scans = 0
+
+    def log(self, message: str) -> None:
+        print(f"{time.strftime('%H:%M:%S')} {message}", flush=True)
+
+    def scan(self) -> None:
+        """Ajoute les fichiers audio dont la taille n'a pas change depuis le dernier passage (copie terminee).
+
+        Un fichier deja transcrit dont la taille ou la date a change est transcrit de nouveau.
+        """
+        for path in sorted(self.directory.iterdir()):
+            if path.suffix.lower() not in AUDIO_SUFFIXES or not path.is_file():
+                continue
+            stat = path.stat()
+            current = (stat.st_size, stat.st_mtime)
+            previous = self._sizes.get(path)
+            self._sizes[path] = current
+            if previous == current and self.store.add(path.resolve(), *current):
+                self.log(f"Nouveau fichier ou fichier modifie: {path.name}")
+
+    def _plan(self, job: Job) -> bool:
+        self.store.set_job(job.id, status="planning")
+        try:
+            pcm = load_audio(job.path)
+        except Exception as exc:
+            self.store.set_job(job.id, status="failed", error=f"lecture audio: {exc}")
+            self.log(f"{job.path.name}: echec lecture ({exc})")
+            return False
+        self._audio[job.id] = pcm
+        if job.chunks_total == 0:
+            chunks = plan_chunks(pcm, self.options.vad)
+            self.store.add_chunks(job.id, chunks, pcm.size / WHISPER_RATE)
+            self.log(f"{job.path.name}: {pcm.size / WHISPER_RATE:.1f}s, {len(chunks)} morceaux")
+        else:
+            self.store.set_job(job.id, status="running")
+            self.log(f"{job.path.name}: reprise, {job.chunks_done}/{job.chunks_total} morceaux deja faits")
+        return True
+
+    def _fill(self) -> None:
+        limit = self.workers * INFLIGHT_PER_WORKER
+        now = time.time()
+        active = self.store.jobs("running") + self.store.jobs("pending")
+        for job_id in set(self._audio) - {job.id for job in active}:
+            del self._audio[job_id]  # fichier remplace en cours de travail
+        for job in active:
+            if len(self._inflight) >= limit:
+                return
+            if job.id not in self._audio and not self._plan(job):
+                continue
+            pcm = self._audio[job.id]
+            while len(self._inflight) < limit:
+                row = self.store.next_chunk(job.id, now)
+                if row is None:
+                    break
+                self.store.mark_running(job.id, row["idx"])
+                chunk_pcm = pcm[row["start"] : row["end"]]
+                future = self.pool.submit(transcribe_chunk, row["idx"], chunk_pcm, row["attempts"])
+                self._inflight[future] = (job.id, row["idx"])
+            self._maybe_finalize(job.id)
+
+    def _collect(self, timeout: float) -> None:
+        if not self._inflight:
+            self.stop_event.wait(timeout)
+            return
+        done, _ = wait(list(self._inflight), timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            job_id, idx = self._inflight.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                raise
+            except Exception as exc:
+                result = ChunkResult(idx, False, error=str(exc))
+            if result.ok:
+                self.store.finish_chunk(job_id, result)
+            elif self.store.fail_chunk(job_id, idx, result.error, self.args.retries):
+                self.log(f"travail {job_id}, morceau {idx}: echec whisper, nouvel essai ({result.error})")
+            else:
+                self.log(f"travail {job_id}, morceau {idx}: abandon apres {self.args.retries} essais ({result.error})")
+            self._maybe_finalize(job_id)
+
+    def _maybe_finalize(self, job_id: int) -> None:
+        if job_id in self._translating:
+            return
+        job = self.store.job(job_id)
+        if job is None or job.status not in ("running", "pending"):
+            return
+        rows = self.store.chunks(job_id)
+        if any(row["status"] in ("pending", "running") for row in rows):
+            return
+        self._audio.pop(job_id, None)
+        results = [stored_result(row) for row in rows]
+        chunks = [Chunk(row["idx"], row["start"], row["end"]) for row in rows]
+        words: list[Word] = []
+        for chunk, result in zip(chunks, results):
+            if result.ok:
+                words.extend(chunk_words(chunk, result))
+        cues = build_cues(words)
+        meta = {
+            "source": str(job.path),
+            "model": self.options.model_path.name,
+            "audio_sec": round(job.audio_sec, 3),
+            "chunks": [{"index": c.index, "start": c.start_sec, "end": c.end_sec} for c in chunks],
+            "failed_chunks": [r.index for r in results if not r.ok],
+        }
+        if self.translator is not None and cues:
+            # Repris par _finish_translations quand toutes les traductions sont pretes.
+            self._translating[job_id] = (job, cues, [self.translator.submit(c.text) for c in cues], meta)
+            return
+        self._write(job, cues, meta)
+
+    def _finish_translations(self) -> None:
+        for job_id, (job, cues, futures, meta) in list(self._translating.items()):
+            if not all(future.done() for future in futures):
+                continue
+            del self._translating[job_id]
+            if self.store.job(job_id) is None:
+                continue
+            try:
+                for cue, future in zip(cues, futures):
+                    cue.translation = future.result()
+            except Exception as exc:
+                self.store.set_job(job_id, status="failed", error=f"traduction: {exc}")
+                self.log(f"{job.path.name}: echec traduction ({exc})")
+                continue
+            self._write(job, cues, meta)
+
+    def _write(self, job: Job, cues: list[Cue], meta: dict) -> None:
+        # Nom complet du fichier source: a.wav et a.flac ne s'ecrasent pas.
+        failed = meta["failed_chunks"]
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        write_outputs(self.output_dir / job.path.name, self.args.formats, cues, meta, self.args.bilingual)
+        status = "failed" if failed else "done"
+        self.store.set_job(job.id, status=status, error=f"{len(failed)} morceaux en echec" if failed else "")
+        self.log(f"{job.path.name}: {status}, {len(cues)} sous-titres -> {self.output_dir}")
+
+    def _restart_pool(self) -> None:
+        for job_id, idx in self._inflight.values():
+            self.store.fail_chunk(job_id, idx, "worker whisper arrete", self.args.retries)
+        self._inflight.clear()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = create_pool(self.project_root, self.options, self.workers, self.args.pin)
+
+    def progress(self) -> str:
+        active = self.store.jobs("running")
+        parts = [f"{j.path.name} {j.chunks_done}/{j.chunks_total}" for j in active]
+        return ", ".join(parts) or "aucun travail en cours"
+
+    def run(self) -> None:
+        recovered = self.store.recover()
+        if recovered:
+            self.log(f"Reprise: {recovered} morceaux interrompus remis en file")
+        self.pool = create_pool(self.project_root, self.options, self.workers, self.args.pin)
+        last_progress = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                if time.monotonic() - self._last_scan >= self.args.scan_sec:
+                    self._last_scan = time.monotonic()
+                    self._scans += 1
+                    self.scan()
+                self._fill()
+                self._finish_translations()
+                try:
+                    self._collect(timeout=0.5)
+                except BrokenProcessPool:
+                    self.log("Pool whisper interrompu: redemarrage")
+                    self._restart_pool()
+                if time.monotonic() - last_progress >= self.args.scan_sec and self._inflight:
+                    last_progress = time.monotonic()
+                    self.log(f"En cours: {self.progress()}")
+                if self.args.once and self._idle():
+                    break
+        finally:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def _idle(self) -> bool:
+        """Tous les fichiers stables sont traites et aucun nouvel essai n'est en attente."""
+        if self._scans < 2 or self._inflight or self._translating:
+            return False
+        known = {job.path for job in self.store.jobs()}
+        if any(path.resolve() not in known for path in self._sizes if path.exists()):
+            return False
+        return not self.store.jobs("pending") and not self.store.jobs("running")
+
+
+def print_status(store: JobStore) -> None:
+    print("id | statut   | morceaux | audio s | fichier")
+    for job in store.jobs():
+        print(
+            f"{job.id:>2} | {job.status:<8} | {job.chunks_done:>3}/{job.chunks_total:<4} | {job.audio_sec:>7.1f} | "
+            f"{job.path.name}" + (f" ({job.error})" if job.error else "")
+        )
+
+
+def parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="VoxBridge: transcription des fichiers deposes dans un dossier")
+    parser.add_argument("directory", type=Path, help="Dossier surveille (.wav, .flac)")
+    parser.add_argument("--output-dir", type=Path, default=None, help="Sorties (defaut: DOSSIER/transcripts)")
+    parser.add_argument("--db", type=Path, default=None, help=f"Base SQLite (defaut: DOSSIER/{DB_FILENAME})")
+    parser.add_argument("--status", action="store_true", help="Affiche l'etat des travaux et quitte")
+    parser.add_argument("--once", action="store_true", help="Traite le contenu actuel du dossier puis quitte")
+    parser.add_argument("--scan-sec", type=float, default=SCAN_INTERVAL_SEC, help="Intervalle de scrutation")
+    parser.add_argument("--retries", type=int, default=MAX_ATTEMPTS, help="Essais par morceau avant abandon")
+    parser.add_argument("--model", default="", help="Nom du modele dans whisper.cpp/models")
+    parser.add_argument("--backend", choices=["server", "cli"], default="server", help="Backend whisper")
+    parser.add_argument("--no-gpu", action="store_true", help="Desactive CUDA")
+    parser.add_argument("--vad", choices=["energy", "peak"], default="energy", help="Detection de parole")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Decodages simultanes (defaut: reglage app.tuning, sinon coeurs / 4)",
+    )
+    parser.add_argument("--threads", type=int, default=None, help="Threads whisper par decodage")
+    parser.add_argument("--formats", default="srt,vtt,json", help="Sorties parmi srt, vtt, json")
+    parser.add_argument("--translate", action="store_true", help="Traduit les sous-titres EN -> FR")
+    parser.add_argument("--bilingual", action="store_true", help="SRT/VTT: texte source + traduction")
+    parser.add_argument("--translation", choices=["process", "thread"], default="process")
+    parser.add_argument("--translation-workers", type=int, default=1)
+    args = parser.parse_args(argv)
+    args.formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    return args
+
+
+def main(argv: list[str] | None = None, project_root: Path | None = None) -> int:
+    sys.stdout.reconfigure(encoding="utf-8", errors="replace")
+    args = parse_args(argv)
+    project_root = project_root or Path(__file__).resolve().parents[1]
+    if not args.directory.is_dir():
+        print(f"Erreur: dossier introuvable: {args.directory}")
+        return 1
+    unknown = [f for f in args.formats if f not in FORMATS]
+    if unknown:
+        print(f"Erreur: format inconnu {', '.join(unknown)} (attendus: {', '.join(FORMATS)})")
+        return 1
+    store = JobStore(args.db or args.directory / DB_FILENAME)
+    if args.status:
+        print_status(store)
+        store.close()
+        return 0
+
+    model_path = resolve_model_path(project_root, args.model)
+    if model_path is None:
+        print("Erreur: aucun modele Whisper trouve dans whisper.cpp/models/")
+        store.close()
+        return 1
+    options = RunOptions(
+        mode="transcription",
+        source="file",
+        device_index=0,
+        model_path=model_path,
+        use_cuda=not args.no_gpu,
+        backend=args.backend,
+        vad=args.vad,
+    )
+    args.workers, options.threads, args.pin = pool_settings(project_root, model_path, args.workers, args.threads)
+    translator = None
+    if args.translate:
+        # Un seul service pour toute la duree: le modele argostranslate est charge une fois.
+        translator = TranslationService(args.translation, args.translation_workers)
+        try:
+            translator.start()
+        except Exception as exc:
+            print(f"Erreur traduction: {exc}")
+            store.close()
+            return 1
+    service = WatchService(
+        args.directory,
+        args.output_dir or args.directory / "transcripts",
+        store,
+        project_root,
+        options,
+        args,
+        translator,
+    )
+    signal.signal(signal.SIGINT, lambda *_: service.stop_event.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda *_: service.stop_event.set())
+    service.log(f"Surveillance de {args.directory} ({service.workers} workers, {model_path.name})")
+    try:
+        service.run()
+    finally:
+        if translator is not None:
+            translator.close()
+        store.close()
+    service.log("Arret")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
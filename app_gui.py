@@ -1,7 +1,11 @@
-﻿from pathlib import Path
+﻿import time
 
-from app.ui import launch_gui
+STARTED_AT = time.perf_counter()
+
+from pathlib import Path  # noqa: E402
+
+from app.ui import launch_gui  # noqa: E402
 
 
 if __name__ == "__main__":
-    launch_gui(Path(__file__).resolve().parent)
+    launch_gui(Path(__file__).resolve().parent, STARTED_AT)
@@ -0,0 +1,197 @@
+﻿from __future__ import annotations
+
+import argparse
+import json
+import resource
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import core, sources  # noqa: E402
+from app.backends import CliWhisperBackend, ServerWhisperBackend  # noqa: E402
+from app.metrics import RTF_BUCKETS  # noqa: E402
+from replay_vad import read_wav, synthetic_fixture, synthetic_long_speech  # noqa: E402
+from stubs import FileSource, StubWhisperServer, file_pyaudio, write_cli_stub  # noqa: E402
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "pipeline_baseline.json"
+SYNTHETIC_RATE = 48000
+SYNTHETIC_SEC = 60.0
+DRAIN_SEC = 1.0
+TIMEOUT_FACTOR = 4.0
+# (cle, libelle, ecart absolu ignore): plus haut = pire pour toutes ces mesures.
+CHECKED = (
+    ("wall_rtf", "RTF pipeline (mur / audio)", 0.02),
+    ("whisper_rtf", "RTF whisper (moyenne)", 0.02),
+    ("latency_p50", "latence p50 s", 0.05),
+    ("latency_p95", "latence p95 s", 0.05),
+    ("latency_p99", "latence p99 s", 0.05),
+    ("cpu_percent", "CPU %", 5.0),
+    ("peak_rss_mb", "RSS max Mo", 10.0),
+)
+
+
+def load_corpus(paths: list[str]) -> list[tuple[str, np.ndarray, int]]:
+    if not paths:
+        return [
+            ("synthetique-rafales", synthetic_fixture(SYNTHETIC_RATE, SYNTHETIC_SEC), SYNTHETIC_RATE),
+            ("synthetique-continu", synthetic_long_speech(SYNTHETIC_RATE, SYNTHETIC_SEC), SYNTHETIC_RATE),
+        ]
+    corpus = []
+    for name in paths:
+        pcm, rate, _ = read_wav(Path(name))
+        corpus.append((Path(name).name, pcm, rate))
+    return corpus
+
+
+def _cpu_seconds() -> float:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def replay(pcm: np.ndarray, rate: int, args: argparse.Namespace) -> dict[str, float]:
+    """Rejoue un enregistrement dans un vrai TranscriptionWorker (PyAudio et whisper simules)."""
+    source = FileSource(pcm, rate, args.speed)
+    stub = StubWhisperServer(args.base_ms / 1000.0, args.per_audio_ms / 1000.0, args.fail_every)
+    captions = 0
+    errors: list[str] = []
+    last_event = [time.perf_counter()]
+    stopped = threading.Event()
+
+    def on_event(kind: str, message: str) -> None:
+        nonlocal captions
+        last_event[0] = time.perf_counter()
+        if kind == "transcription":
+            captions += 1
+        elif kind == "error":
+            errors.append(message)
+        elif kind == "stopped":
+            stopped.set()
+
+    with tempfile.TemporaryDirectory(prefix="voxbridge-bench-") as tmp:
+        root = Path(tmp)
+        model = root / "ggml-bench.bin"
+        model.write_bytes(b"")
+        cli_path = write_cli_stub(root, args.base_ms / 1000.0, args.per_audio_ms / 1000.0)
+
+        def create_backend(project_root: Path, options: core.RunOptions, work_file: Path | None = None):
+            if options.backend == "server":
+                return ServerWhisperBackend(None, options.model_path, False, port=stub.port)
+            return CliWhisperBackend(cli_path, options.model_path, False, root / "temp_audio_16k.wav")
+
+        original = sources.import_pyaudio, core.create_backend
+        sources.import_pyaudio = lambda: file_pyaudio(source)
+        core.create_backend = create_backend
+        options = core.RunOptions(
+            mode="transcription",
+            source="device",
+            device_index=0,
+            model_path=model,
+            use_cuda=False,
+            backend=args.backend,
+            vad=args.vad,
+        )
+        worker = core.TranscriptionWorker(root, options, on_event)
+        audio_sec = source.pcm.shape[0] / rate
+        cpu_before = _cpu_seconds()
+        try:
+            worker.start()
+            deadline = time.perf_counter() + TIMEOUT_FACTOR * audio_sec / args.speed + 30.0
+            while time.perf_counter() < deadline and not stopped.is_set():
+                idle = all(q.qsize() == 0 for q in worker.queues)
+                if source.finished.is_set() and idle and time.perf_counter() - last_event[0] > DRAIN_SEC:
+                    break
+                time.sleep(0.05)
+            # Fin = dernier texte emis (ou fin de lecture si rien n'arrive apres).
+            wall = max(last_event[0], source.finished_at or time.perf_counter()) - source.started_at
+            worker.stop()
+            worker.join(timeout=30)
+        finally:
+            sources.import_pyaudio, core.create_backend = original
+            stub.close()
+        cpu = _cpu_seconds() - cpu_before
+
+    metrics = worker.metrics
+    latency = metrics.histogram("capture_to_text_seconds")
+    return {
+        "audio_sec": audio_sec,
+        "wall_rtf": wall * args.speed / audio_sec,
+        "whisper_rtf": metrics.histogram("whisper_rtf", RTF_BUCKETS).mean,
+        "latency_p50": latency.quantile(0.50),
+        "latency_p95": latency.quantile(0.95),
+        "latency_p99": latency.quantile(0.99),
+        "segments_per_min": captions / (audio_sec / 60.0),
+        "whisper_calls": metrics.counters.get("whisper_calls_total", 0.0),
+        "cpu_percent": 100.0 * cpu / wall if wall > 0 else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+        "dropped_frames": metrics.gauges.get("capture_dropped_frames", 0.0),
+        "errors": len(errors),
+    }
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for key, label, slack in CHECKED:
+            if key not in reference:
+                continue
+            limit = reference[key] * (1.0 + threshold)
+            if result[key] > limit and result[key] - reference[key] > slack:
+                regressions.append(f"{name}: {label} {result[key]:.3f} > {reference[key]:.3f} (+{threshold:.0%})")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rejoue des WAV dans le pipeline complet, sans audio ni whisper")
+    parser.add_argument("wav", nargs="*", help="WAV PCM16 (defaut: deux signaux synthetiques de 60 s)")
+    parser.add_argument("--speed", type=float, default=4.0, help="Vitesse de lecture (x temps reel)")
+    parser.add_argument("--backend", choices=["server", "cli"], default="server")
+    parser.add_argument("--vad", choices=["energy", "peak"], default="energy")
+    parser.add_argument("--base-ms", type=float, default=40.0, help="Latence fixe simulee par appel whisper")
+    parser.add_argument("--per-audio-ms", type=float, default=60.0, help="Latence simulee par seconde d'audio")
+    parser.add_argument("--fail-every", type=int, default=0, help="Un echec whisper toutes les N requetes (server)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistre les resultats comme reference")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Regression toleree (0.2 = +20%%)")
+    args = parser.parse_args()
+
+    results = {}
+    print("enregistrement       | audio s | RTF pipe | RTF whisper | p50 s | p95 s | p99 s | seg/min | CPU % | RSS Mo")
+    for name, pcm, rate in load_corpus(args.wav):
+        r = replay(pcm, rate, args)
+        results[name] = r
+        print(
+            f"{name:<20} | {r['audio_sec']:>7.1f} | {r['wall_rtf']:>8.2f} | {r['whisper_rtf']:>11.2f} | "
+            f"{r['latency_p50']:>5.2f} | {r['latency_p95']:>5.2f} | {r['latency_p99']:>5.2f} | "
+            f"{r['segments_per_min']:>7.1f} | {r['cpu_percent']:>5.1f} | {r['peak_rss_mb']:>6.1f}"
+        )
+        if r["errors"] or r["dropped_frames"]:
+            print(f"  {r['errors']} erreurs, {r['dropped_frames']:.0f} frames perdues")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Reference enregistree: {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"Pas de reference ({args.baseline}): --save-baseline pour en creer une")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+    for line in regressions:
+        print(f"REGRESSION: {line}")
+    if not regressions:
+        print(f"OK: aucune regression au-dela de +{args.threshold:.0%} par rapport a {args.baseline.name}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+﻿from __future__ import annotations
+
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.audio import WHISPER_RATE, Resampler  # noqa: E402
+
+
+def synth_pcm(rate: int, channels: int, seconds: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(rate * seconds)) / rate
+    chirp = 0.4 * np.sin(2 * np.pi * (200 + 1800 * t / seconds) * t)
+    voice = 0.2 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 3 * t))
+    left = chirp + voice + 0.02 * rng.standard_normal(t.size)
+    right = chirp - voice + 0.02 * rng.standard_normal(t.size)
+    stacked = np.stack([left, right], axis=1)[:, :channels]
+    return (np.clip(stacked, -1, 1) * 32767).astype(np.int16).reshape(-1)
+
+
+def numpy_path(pcm: np.ndarray, rate: int, channels: int) -> np.ndarray:
+    return Resampler(rate, channels).process(pcm.tobytes())
+
+
+def ffmpeg_path(pcm: np.ndarray, rate: int, channels: int, workdir: Path) -> np.ndarray:
+    wav_file = workdir / "temp_audio.wav"
+    wav_16k = workdir / "temp_audio_16k.wav"
+    with wave.open(str(wav_file), "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm.tobytes())
+    subprocess.run(
+        ["ffmpeg", "-y", "-i", str(wav_file), "-ar", str(WHISPER_RATE), str(wav_16k)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    with wave.open(str(wav_16k), "rb") as wf:
+        out_channels = wf.getnchannels()
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+    if out_channels > 1:
+        data = data.reshape(-1, out_channels).mean(axis=1)
+    return data
+
+
+def timed(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark reechantillonnage NumPy vs ffmpeg")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    has_ffmpeg = shutil.which("ffmpeg") is not None
+    if not has_ffmpeg:
+        print("ffmpeg absent du PATH: seul le chemin NumPy est mesure")
+
+    print("rate  | ch | numpy ms | ffmpeg ms | speedup | snr dB")
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for rate in (44100, 48000):
+            for channels in (1, 2):
+                pcm = synth_pcm(rate, channels, args.seconds)
+                numpy_sec = timed(lambda: numpy_path(pcm, rate, channels), args.repeats)
+                if not has_ffmpeg:
+                    print(f"{rate:>5} | {channels:>2} | {numpy_sec * 1000:>8.2f} | {'-':>9} | {'-':>7} | {'-':>6}")
+                    continue
+
+                ffmpeg_sec = timed(lambda: ffmpeg_path(pcm, rate, channels, workdir), args.repeats)
+                ours = numpy_path(pcm, rate, channels)
+                ref = ffmpeg_path(pcm, rate, channels, workdir)
+                n = min(ours.size, ref.size)
+                margin = WHISPER_RATE // 100
+                diff = ours[margin : n - margin] - ref[margin : n - margin]
+                snr = 10 * np.log10(np.sum(ref[margin : n - margin] ** 2) / max(np.sum(diff**2), 1e-12))
+                print(
+                    f"{rate:>5} | {channels:>2} | {numpy_sec * 1000:>8.2f} | {ffmpeg_sec * 1000:>9.2f} | "
+                    f"{ffmpeg_sec / numpy_sec:>6.1f}x | {snr:>6.1f}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
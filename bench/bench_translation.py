@@ -0,0 +1,145 @@
+﻿from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.translation import SENTENCE_DEADLINE_SEC, SentenceAggregator, build_translator  # noqa: E402
+
+
+TRANSCRIPT = (
+    "Good morning everyone and thank you for joining the call today. "
+    "We will start with a quick review of last week, then move on to the roadmap. "
+    "The new release went out on Tuesday and the feedback has been mostly positive "
+    "although a few users reported that the export button is hard to find. "
+    "Let's fix that first. "
+    "Next, the audio team wants to reduce latency on long meetings because captions "
+    "tend to drift after an hour or so and nobody has found the root cause yet. "
+    "Any questions so far? "
+    "Okay, then let's talk about hiring, we have two open positions and several "
+    "promising candidates in the pipeline."
+)
+FRAGMENT_WORDS = 8
+FRAGMENT_SEC = 3.0
+PAUSE_EVERY = 5
+POLL_SEC = 0.1
+
+
+def fragments(repeat: int) -> list[tuple[str, bool]]:
+    words = (TRANSCRIPT + " ") * repeat
+    tokens = words.split()
+    out = []
+    for i in range(0, len(tokens), FRAGMENT_WORDS):
+        index = i // FRAGMENT_WORDS
+        out.append((" ".join(tokens[i : i + FRAGMENT_WORDS]), (index + 1) % PAUSE_EVERY == 0))
+    return out
+
+
+class Translator:
+    """Vrai argostranslate si installe, sinon cout simule (surcout par appel + cout par mot)."""
+
+    def __init__(self, translate, call_ms: float, word_ms: float) -> None:
+        self.translate = translate
+        self.call_ms = call_ms
+        self.word_ms = word_ms
+        self.calls = 0
+
+    def cost(self, text: str) -> float:
+        self.calls += 1
+        if self.translate is None:
+            return (self.call_ms + self.word_ms * len(text.split())) / 1000.0
+        start = time.perf_counter()
+        self.translate(text)
+        return time.perf_counter() - start
+
+
+def simulate(items: list[tuple[str, bool]], translator: Translator, aggregate: bool, deadline: float) -> dict:
+    aggregator = SentenceAggregator(deadline_sec=deadline)
+    busy_until = 0.0
+    ends = []
+    total = 0
+    for text, _ in items:
+        total += len(text.split())
+        ends.append(total)
+    first_shown = [None] * len(items)
+    final_shown = [None] * len(items)
+    flushed_words = 0
+
+    def submit(text: str, now: float, interim: bool) -> None:
+        nonlocal busy_until, flushed_words
+        start = max(now, busy_until)
+        busy_until = start + translator.cost(text)
+        covered = flushed_words + len(text.split())
+        if not interim:
+            flushed_words = covered
+        for i, end in enumerate(ends):
+            if end > covered:
+                break
+            if first_shown[i] is None:
+                first_shown[i] = busy_until
+            if not interim and final_shown[i] is None:
+                final_shown[i] = busy_until
+
+    now = 0.0
+    for index, (text, pause) in enumerate(items):
+        arrival = (index + 1) * FRAGMENT_SEC
+        while aggregate and now + POLL_SEC < arrival:
+            now += POLL_SEC
+            flush = aggregator.poll(now)
+            if flush is not None:
+                submit(flush.text, now, interim=True)
+        now = arrival
+        if not aggregate:
+            submit(text, now, interim=False)
+            continue
+        flush = aggregator.add(text, now, pause=pause)
+        if flush is not None:
+            submit(flush.text, now, interim=False)
+
+    duration_min = len(items) * FRAGMENT_SEC / 60.0
+    arrivals = [(i + 1) * FRAGMENT_SEC for i in range(len(items))]
+    final = sorted(t - a for t, a in zip(final_shown, arrivals) if t is not None)
+    first = sorted(t - a for t, a in zip(first_shown, arrivals) if t is not None)
+    return {
+        "calls_per_min": translator.calls / duration_min,
+        "final_p50": final[len(final) // 2] if final else 0.0,
+        "final_p95": final[min(len(final) - 1, int(len(final) * 0.95))] if final else 0.0,
+        "first_p95": first[min(len(first) - 1, int(len(first) * 0.95))] if first else 0.0,
+        "interim_per_min": aggregator.interim_flushes / duration_min,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark traduction par fragment vs par phrase")
+    parser.add_argument("--repeat", type=int, default=4, help="Repetitions du texte de reference")
+    parser.add_argument("--deadline", type=float, default=SENTENCE_DEADLINE_SEC)
+    parser.add_argument("--stub", action="store_true", help="Cout simule meme si argostranslate est installe")
+    parser.add_argument("--call-ms", type=float, default=120.0, help="Surcout simule par appel")
+    parser.add_argument("--word-ms", type=float, default=6.0, help="Cout simule par mot")
+    args = parser.parse_args()
+
+    translate = None
+    if not args.stub:
+        try:
+            translate = build_translator()
+        except ImportError:
+            print("argostranslate absent: cout de traduction simule")
+
+    items = fragments(args.repeat)
+    print(f"{len(items)} fragments de {FRAGMENT_WORDS} mots, un toutes les {FRAGMENT_SEC:.0f}s")
+    print("mode     | appels/min | dont provisoires | final p50 s | final p95 s | 1er affichage p95 s")
+    for label, aggregate in (("fragment", False), ("phrase", True)):
+        translator = Translator(translate, args.call_ms, args.word_ms)
+        r = simulate(items, translator, aggregate, args.deadline)
+        print(
+            f"{label:<8} | {r['calls_per_min']:>10.1f} | {r['interim_per_min']:>16.1f} | "
+            f"{r['final_p50']:>11.2f} | {r['final_p95']:>11.2f} | {r['first_p95']:>19.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
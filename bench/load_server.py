@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import core, server  # noqa: E402
+from app.backends import ServerWhisperBackend  # noqa: E402
+from app.sources import CHUNK  # noqa: E402
+from replay_vad import read_wav, synthetic_fixture, synthetic_long_speech  # noqa: E402
+from stubs import StubWhisperServer  # noqa: E402
+
+
+SYNTHETIC_RATE = 48000
+
+
+def client_audio(index: int, args: argparse.Namespace) -> tuple[np.ndarray, int]:
+    if args.wav:
+        pcm, rate, _ = read_wav(Path(args.wav[index % len(args.wav)]))
+        return pcm[:, :1] if pcm.ndim == 2 else pcm.reshape(-1, 1), rate
+    # Alternance parole continue / rafales, graine differente par client.
+    make = synthetic_long_speech if index % 2 == 0 else synthetic_fixture
+    return make(SYNTHETIC_RATE, args.seconds, seed=index + 1), SYNTHETIC_RATE
+
+
+async def run_client(index: int, host: str, port: int, args: argparse.Namespace) -> dict:
+    """Envoie un enregistrement au rythme ``--speed`` et mesure la latence fin d'audio -> texte recu."""
+    pcm, rate = client_audio(index, args)
+    reader, writer = await asyncio.open_connection(host, port)
+    header = {"rate": rate, "channels": 1, "translate": args.translate, "name": f"client-{index}"}
+    writer.write((json.dumps(header) + "\n").encode("utf-8"))
+    sent_frames: list[int] = []
+    sent_at: list[float] = []
+    latencies: list[float] = []
+    end: dict = {}
+
+    async def send() -> None:
+        started = time.monotonic()
+        block = CHUNK * 4
+        for pos in range(0, pcm.shape[0], block):
+            writer.write(pcm[pos : pos + block].tobytes())
+            await writer.drain()
+            sent_frames.append(min(pos + block, pcm.shape[0]))
+            sent_at.append(time.monotonic())
+            delay = started + sent_frames[-1] / rate / args.speed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        writer.write_eof()
+
+    async def receive() -> None:
+        async for line in reader:
+            event = json.loads(line)
+            if event["kind"] == "transcription":
+                i = bisect_left(sent_frames, int(event["audio_end"] * rate))
+                if i < len(sent_at):
+                    latencies.append(time.monotonic() - sent_at[i])
+            elif event["kind"] == "end":
+                end.update(event)
+                return
+
+    await asyncio.gather(send(), receive())
+    writer.close()
+    values = sorted(latencies)
+
+    def q(p: float) -> float:
+        return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+    return {"name": header["name"], "texts": len(values), "p50": q(0.5), "p95": q(0.95), "max": q(1.0), **end}
+
+
+async def load_test(args: argparse.Namespace) -> list[dict]:
+    vox = None
+    stub = None
+    host, port = "127.0.0.1", 0
+    if args.connect:
+        host, _, port_text = args.connect.rpartition(":")
+        port = int(port_text)
+    else:
+        stub = StubWhisperServer(args.base_ms / 1000.0, args.per_audio_ms / 1000.0, args.fail_every)
+        core.create_backend = lambda project_root, options, work_file=None: ServerWhisperBackend(
+            None, options.model_path, False, port=stub.port
+        )
+        root = Path(tempfile.mkdtemp(prefix="voxbridge-load-"))
+        options = core.RunOptions(
+            mode="transcription", source="stdin", device_index=0, model_path=root / "ggml-bench.bin", use_cuda=False
+        )
+        vox = server.VoxServer(
+            root, options, server.parse_args(["--port", "0", "--backends", str(args.backends), "--backlog", "4"])
+        )
+        listener = await vox.start()
+        port = vox.port
+    try:
+        return await asyncio.gather(*(run_client(i, host, port, args) for i in range(args.sessions)))
+    finally:
+        if vox is not None:
+            listener.close()
+            vox.close()
+            stub.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Charge le serveur multi-sessions avec des clients synthetiques")
+    parser.add_argument("wav", nargs="*", help="WAV PCM16 (defaut: signaux synthetiques)")
+    parser.add_argument("--connect", default="", help="HOTE:PORT d'un serveur lance (defaut: serveur local simule)")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--backends", type=int, default=2, help="Backends du serveur local simule")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Duree des signaux synthetiques")
+    parser.add_argument("--speed", type=float, default=1.0, help="Vitesse d'envoi (x temps reel)")
+    parser.add_argument("--translate", action="store_true")
+    parser.add_argument("--base-ms", type=float, default=40.0, help="Latence fixe simulee par appel whisper")
+    parser.add_argument("--per-audio-ms", type=float, default=60.0, help="Latence simulee par seconde d'audio")
+    parser.add_argument("--fail-every", type=int, default=0, help="Un echec whisper toutes les N requetes")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = asyncio.run(load_test(args))
+    wall = time.perf_counter() - started
+    print("session    | textes | p50 s | p95 s | max s | serveur p95 s | segments | abandonnes")
+    for r in results:
+        print(
+            f"{r['name']:<10} | {r['texts']:>6} | {r['p50']:>5.2f} | {r['p95']:>5.2f} | {r['max']:>5.2f} | "
+            f"{r.get('latency_p95', 0.0):>13.2f} | {r.get('segments', 0):>8} | {r.get('dropped_segments', 0):>10}"
+        )
+    p95 = [r["p95"] for r in results if r["texts"]]
+    if p95:
+        print(
+            f"{len(results)} sessions en {wall:.1f}s: p95 moyen {sum(p95) / len(p95):.2f}s, "
+            f"ecart p95 max/min {max(p95) / max(min(p95), 1e-3):.2f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+﻿from __future__ import annotations
+
+import argparse
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.ringbuffer import PcmRingBuffer  # noqa: E402
+from app.segmenter import Segmenter  # noqa: E402
+from app.vad import VAD_TYPES, create_vad  # noqa: E402
+
+CHUNK = 1024
+
+
+def read_wav(path: Path) -> tuple[np.ndarray, int, int]:
+    with wave.open(str(path), "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: seul le PCM 16 bits est supporte")
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        return data.reshape(-1, wf.getnchannels()), wf.getframerate(), wf.getnchannels()
+
+
+def synthetic_fixture(rate: int = 48000, seconds: float = 20.0, seed: int = 0) -> np.ndarray:
+    """Bruit de fond + rafales de 'parole' (porteuse modulee) separees de silences."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(rate * seconds)) / rate
+    signal = 0.01 * rng.standard_normal(t.size)
+    for start in np.arange(1.0, seconds - 2.0, 4.0):
+        mask = (t >= start) & (t < start + 1.5)
+        envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t[mask]))
+        signal[mask] += 0.3 * envelope * np.sin(2 * np.pi * 180 * t[mask])
+    for start in np.arange(3.0, seconds - 1.0, 4.0):
+        mask = (t >= start) & (t < start + 0.05)
+        signal[mask] += 0.2 * rng.standard_normal(mask.sum())
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16).reshape(-1, 1)
+
+
+def synthetic_long_speech(rate: int = 48000, seconds: float = 20.0, seed: int = 1) -> np.ndarray:
+    """Parole continue avec de courtes pauses (150 ms toutes les 1.3 s)."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(rate * seconds)) / rate
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    envelope[(t % 1.3) > 1.15] = 0.0
+    signal = 0.01 * rng.standard_normal(t.size) + 0.3 * envelope * np.sin(2 * np.pi * 180 * t)
+    return (np.clip(signal, -1, 1) * 32767).astype(np.int16).reshape(-1, 1)
+
+
+def replay(pcm: np.ndarray, rate: int, channels: int, vad_name: str) -> dict[str, float]:
+    ring = PcmRingBuffer(rate * 60, channels)
+    segmenter = Segmenter(ring, rate, CHUNK, create_vad(vad_name, rate))
+    segments = 0
+    for start in range(0, pcm.shape[0] - CHUNK + 1, CHUNK):
+        ring.write(pcm[start : start + CHUNK])
+        segment = segmenter.feed(ring.written - CHUNK, ring.written)
+        if segment is not None:
+            segments += 1
+    stats = segmenter.stats
+    return {
+        "segments": segments,
+        "rejected": segmenter.vad.rejected_segments,
+        "decoded_sec": stats.decoded_frames / rate,
+        "overlap_sec": stats.overlap_frames / rate,
+        "cuts": f"{stats.pause_cuts}/{stats.forced_cuts}",
+        "audio_sec": pcm.shape[0] / rate,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rejoue des WAV dans la segmentation + VAD")
+    parser.add_argument("wav", nargs="*", type=Path, help="Fichiers WAV PCM16 (synthetique si vide)")
+    args = parser.parse_args()
+
+    fixtures = []
+    if args.wav:
+        for path in args.wav:
+            pcm, rate, channels = read_wav(path)
+            fixtures.append((path.name, pcm, rate, channels))
+    else:
+        fixtures.append(("synthetique", synthetic_fixture(), 48000, 1))
+        fixtures.append(("parole-continue", synthetic_long_speech(), 48000, 1))
+
+    print("fixture | vad | segments | rejetes | audio decode s | recouvrement s | coupes pause/forcees | audio total s")
+    for name, pcm, rate, channels in fixtures:
+        for vad_name in VAD_TYPES:
+            r = replay(pcm, rate, channels, vad_name)
+            print(
+                f"{name} | {vad_name} | {r['segments']} | {r['rejected']} | {r['decoded_sec']:.1f} | "
+                f"{r['overlap_sec']:.2f} | {r['cuts']} | {r['audio_sec']:.1f}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+﻿from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# (phase, prerequis deja importes, instruction mesuree)
+PHASES = [
+    ("interpreteur", "", "pass"),
+    ("import app.cli (banniere CLI)", "", "import app.cli"),
+    ("import app.ui (fenetre)", "", "import app.ui"),
+    ("import app.core (moteur)", "", "import app.core"),
+    ("import numpy", "", "import numpy"),
+    ("import pyaudio", "", "import pyaudio"),
+    ("enumeration peripheriques", "import app.devices", "app.devices.list_input_devices()"),
+    ("import argostranslate", "", "import argostranslate.translate"),
+    ("init traducteur", "import app.translation", "app.translation.build_translator()"),
+]
+# Modules qui ne doivent pas etre charges avant l'affichage de la fenetre / banniere.
+LAZY_MODULES = ("numpy", "pyaudio", "argostranslate", "stanza")
+FRONT_MODULES = ("app.cli", "app.ui")
+
+_MEASURE = """
+import json, sys, time
+{setup}
+t0 = time.perf_counter()
+try:
+    {stmt}
+except Exception as exc:
+    print(json.dumps({{"error": f"{{exc.__class__.__name__}}: {{exc}}"}}))
+else:
+    print(json.dumps({{"sec": time.perf_counter() - t0}}))
+"""
+
+
+def run_snippet(code: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {"error": (proc.stderr.strip().splitlines() or ["echec"])[-1]}
+    return json.loads(lines[-1])
+
+
+def measure(setup: str, stmt: str, repeats: int) -> tuple[float | None, str]:
+    samples = []
+    for _ in range(repeats):
+        result = run_snippet(_MEASURE.format(setup=setup, stmt=stmt))
+        if "error" in result:
+            return None, result["error"]
+        samples.append(result["sec"])
+    return statistics.median(samples), ""
+
+
+def eager_imports(module: str) -> list[str]:
+    code = f"import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return [f"<echec import {module}>"]
+    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return [name for name in LAZY_MODULES if name in loaded]
+
+
+def import_profile(module: str, top: int) -> list[tuple[int, str]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line.split(":", 1)[1].split("|")
+        if len(parts) != 3:
+            continue
+        rows.append((int(parts[1]), parts[2].strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Temps de demarrage par phase (process Python neufs)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--profile", default="", help="Module a profiler avec -X importtime (ex: app.core)")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    print("phase                          | mediane ms")
+    for label, setup, stmt in PHASES:
+        sec, error = measure(setup, stmt, args.repeats)
+        value = f"{sec * 1000:>10.1f}" if sec is not None else f"{'-':>10}  ({error})"
+        print(f"{label:<30} | {value}")
+
+    status = 0
+    for module in FRONT_MODULES:
+        eager = eager_imports(module)
+        if eager:
+            print(f"REGRESSION: import {module} charge {', '.join(eager)} au demarrage")
+            status = 1
+    if status == 0:
+        print(f"OK: {', '.join(FRONT_MODULES)} ne chargent pas {', '.join(LAZY_MODULES)}")
+
+    if args.profile:
+        print(f"\n-X importtime {args.profile} (cumul us | module)")
+        for cumulative, name in import_profile(args.profile, args.top):
+            print(f"{cumulative:>10} | {name}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
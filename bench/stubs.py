@@ -0,0 +1,209 @@
+﻿"""Doublures pour rejouer le pipeline sans materiel audio ni whisper.cpp.
+
+- ``file_pyaudio``: module compatible PyAudio (mode callback) qui lit un tableau PCM
+  plus vite que le temps reel.
+- ``StubWhisperServer``: faux ``whisper-server`` (POST /inference, verbose_json) avec
+  latence et sortie scriptees.
+- ``python bench/stubs.py whisper-cli ...``: faux ``whisper-cli`` (memes options).
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import sys
+import threading
+import time
+import types
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+
+WHISPER_BYTES_PER_SEC = 16000 * 2
+WORDS_PER_SEC = 2.5
+VOCABULARY = (
+    "the quick brown fox jumps over a lazy dog while captions keep flowing "
+    "through the pipeline and every segment gets its own short sentence"
+).split()
+
+
+class _FileStream:
+    def __init__(self, source: "FileSource", channels: int, frames_per_buffer: int, stream_callback, **_) -> None:
+        self.source = source
+        self.channels = channels
+        self.chunk = frames_per_buffer
+        self.callback = stream_callback
+        self._active = True
+        self._thread = threading.Thread(target=self._run, name="bench-file-stream", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        source = self.source
+        pcm = source.pcm
+        period = self.chunk / source.rate / source.speed
+        deadline = source.started_at = time.perf_counter()
+        for start in range(0, pcm.shape[0] - self.chunk + 1, self.chunk):
+            if not self._active:
+                return
+            self.callback(pcm[start : start + self.chunk].tobytes(), self.chunk, {}, 0)
+            source.fed_frames = start + self.chunk
+            deadline += period
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        source.finished_at = time.perf_counter()
+        source.finished.set()
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def stop_stream(self) -> None:
+        self._active = False
+
+    def close(self) -> None:
+        self._active = False
+
+
+class FileSource:
+    def __init__(self, pcm: np.ndarray, rate: int, speed: float, tail_sec: float = 1.0) -> None:
+        channels = pcm.shape[1] if pcm.ndim == 2 else 1
+        tail = np.zeros((int(rate * tail_sec), channels), dtype=np.int16)
+        self.pcm = np.concatenate([pcm.reshape(-1, channels), tail])
+        self.rate = rate
+        self.channels = channels
+        self.speed = speed
+        self.fed_frames = 0
+        self.started_at = 0.0
+        self.finished_at = 0.0
+        self.finished = threading.Event()
+
+
+def file_pyaudio(source: FileSource) -> types.ModuleType:
+    """Module de remplacement pour ``pyaudio``: un seul peripherique, lu depuis ``source``."""
+    module = types.ModuleType("pyaudio")
+    module.paInt16 = 8
+    module.paContinue = 0
+    module.paComplete = 1
+    module.paInputOverflow = 2
+
+    class PyAudio:
+        def get_device_count(self) -> int:
+            return 1
+
+        def get_device_info_by_index(self, index: int) -> dict:
+            return {
+                "index": index,
+                "name": "bench-file",
+                "maxInputChannels": source.channels,
+                "maxOutputChannels": 0,
+                "defaultSampleRate": source.rate,
+            }
+
+        def is_format_supported(self, rate, input_device=None, input_channels=None, input_format=None) -> bool:
+            if rate != source.rate or input_channels != source.channels:
+                raise ValueError("Invalid sample rate")
+            return True
+
+        def open(self, **kwargs) -> _FileStream:
+            return _FileStream(source, **kwargs)
+
+        def get_sample_size(self, fmt: int) -> int:
+            return 2
+
+        def terminate(self) -> None:
+            pass
+
+    module.PyAudio = PyAudio
+    return module
+
+
+def scripted_text(audio_sec: float, counter: int) -> list[tuple[str, float, float]]:
+    count = max(1, round(audio_sec * WORDS_PER_SEC))
+    step = audio_sec / count
+    words = []
+    for i in range(count):
+        word = VOCABULARY[(counter * 7 + i) % len(VOCABULARY)]
+        words.append((f" {word}", i * step, (i + 1) * step))
+    return words
+
+
+class StubWhisperServer:
+    """Latence = ``base_sec + per_audio_sec * duree``; un echec toutes les ``fail_every`` requetes."""
+
+    def __init__(self, base_sec: float = 0.05, per_audio_sec: float = 0.1, fail_every: int = 0) -> None:
+        self.base_sec = base_sec
+        self.per_audio_sec = per_audio_sec
+        self.fail_every = fail_every
+        self.requests = 0
+        self._counter = itertools.count()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:  # noqa: N802
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, payload = stub.respond(len(body) / WHISPER_BYTES_PER_SEC)
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args) -> None:  # noqa: A002
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="bench-whisper", daemon=True).start()
+
+    def respond(self, audio_sec: float) -> tuple[int, dict]:
+        n = next(self._counter)
+        self.requests += 1
+        time.sleep(self.base_sec + self.per_audio_sec * audio_sec)
+        if self.fail_every and (n + 1) % self.fail_every == 0:
+            return 500, {"error": "stub failure"}
+        words = scripted_text(audio_sec, n)
+        return 200, {
+            "text": "".join(w for w, _, _ in words),
+            "segments": [{"words": [{"word": w, "start": s, "end": e} for w, s, e in words]}],
+        }
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def write_cli_stub(directory: Path, base_sec: float, per_audio_sec: float) -> Path:
+    """Script executable qui se comporte comme ``whisper-cli`` (POSIX)."""
+    path = directory / "whisper-cli"
+    path.write_text(
+        f"#!/bin/sh\nexec {sys.executable} {Path(__file__).resolve()} whisper-cli "
+        f"--base {base_sec} --per-audio {per_audio_sec} \"$@\"\n",
+        encoding="utf-8",
+    )
+    path.chmod(0o755)
+    return path
+
+
+def _cli_main(argv: list[str]) -> int:
+    options = dict(zip(argv[::2], argv[1::2]))
+    with wave.open(options["-f"], "rb") as wf:
+        audio_sec = wf.getnframes() / wf.getframerate()
+    time.sleep(float(options.get("--base", 0.05)) + float(options.get("--per-audio", 0.1)) * audio_sec)
+    words = scripted_text(audio_sec, int(time.time() * 1000) % 997)
+    print("".join(w for w, _, _ in words))
+    if "-of" in options:
+        tokens = [{"text": w, "offsets": {"from": int(s * 1000), "to": int(e * 1000)}} for w, s, e in words]
+        Path(options["-of"] + ".json").write_text(json.dumps({"transcription": [{"tokens": tokens}]}), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "whisper-cli":
+        args = [a for a in sys.argv[2:] if a not in ("-nt", "-ojf", "-ng")]
+        sys.exit(_cli_main(args))
+    print("usage: python bench/stubs.py whisper-cli [options whisper-cli]")
+    sys.exit(2)
@@ -44,8 +44,8 @@ if (-not $SkipBuild) {
 
     & cmake @cfgArgs
 
-    Write-Host "Build whisper-cli..."
-    & cmake --build $buildDir --config Release --target whisper-cli
+    Write-Host "Build whisper-cli + whisper-server..."
+    & cmake --build $buildDir --config Release --target whisper-cli whisper-server
 }
 
 $modelsDir = Join-Path $whisperDir "models"
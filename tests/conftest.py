@@ -0,0 +1,79 @@
+﻿"""Les tests importent ``app`` et les doublures de ``bench/`` (stubs, fixtures synthetiques)."""
+
+from __future__ import annotations
+
+import sys
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "bench"))
+
+from stubs import StubWhisperServer, write_cli_stub  # noqa: E402
+
+
+def write_wav(path: Path, pcm: np.ndarray, rate: int) -> Path:
+    pcm = pcm.reshape(pcm.shape[0], -1)
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(pcm.shape[1])
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm.astype(np.int16).tobytes())
+    return path
+
+
+@pytest.fixture
+def whisper_stub():
+    stub = StubWhisperServer(base_sec=0.02, per_audio_sec=0.0)
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def model_path(tmp_path: Path) -> Path:
+    path = tmp_path / "ggml-test.bin"
+    path.write_bytes(b"")
+    return path
+
+
+@pytest.fixture
+def stub_backend(monkeypatch, whisper_stub) -> StubWhisperServer:
+    """``core.create_backend`` renvoie un backend serveur branche sur ``whisper_stub``."""
+    from app import core
+    from app.backends import ServerWhisperBackend
+
+    def create_backend(root, options, work_file=None):
+        return ServerWhisperBackend(None, options.model_path, False, port=whisper_stub.port)
+
+    monkeypatch.setattr(core, "create_backend", create_backend)
+    return whisper_stub
+
+
+@pytest.fixture
+def local_backend(monkeypatch, whisper_stub, model_path):
+    """Backend des workers batch dans ce process: un pool de threads remplace le pool de process."""
+    from app import batch, watch
+    from app.backends import ServerWhisperBackend
+
+    monkeypatch.setattr(batch, "_backend", ServerWhisperBackend(None, model_path, False, port=whisper_stub.port))
+    monkeypatch.setattr(batch, "_rtf", 1.0)
+    for module in (batch, watch):
+        monkeypatch.setattr(module, "create_pool", lambda root, options, workers, pin=False: ThreadPoolExecutor(1))
+    return whisper_stub
+
+
+@pytest.fixture
+def cli_root(tmp_path: Path) -> Path:
+    """Projet sans whisper-server et avec un faux whisper-cli: le backend serveur se replie sur le CLI."""
+    from app.core import build_whisper_cli_path
+
+    root = tmp_path / "project"
+    binary = build_whisper_cli_path(root)
+    binary.parent.mkdir(parents=True)
+    write_cli_stub(binary.parent, 0.01, 0.0).rename(binary)
+    return root
@@ -0,0 +1,51 @@
+﻿from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from app import adaptive
+from app.segmenter import MAX_SEGMENT_SEC, Segment
+
+
+RATE = 48000
+
+
+def _converge(rtf: float, decisions: int = 40) -> float:
+    controller = adaptive.SegmentController()
+    now = time.monotonic()
+    for _ in range(decisions):
+        for _ in range(adaptive.ADAPT_MIN_SEGMENTS):
+            controller.observe(3.0, 3.0 * rtf)
+        now += adaptive.ADAPT_INTERVAL_SEC
+        controller.decide(backlog=0, now=now)
+    return controller.plan.max_segment_sec
+
+
+def test_fast_whisper_shortens_below_base_segment() -> None:
+    assert _converge(0.1) == adaptive.MIN_SEGMENT_SEC <= 2.0
+    assert _converge(0.4) == MAX_SEGMENT_SEC
+    assert _converge(2.0) == adaptive.MAX_ADAPTIVE_SEGMENT_SEC
+
+
+def _segment(index: int, start_sec: float, end_sec: float, overlap_sec: float = 0.0) -> Segment:
+    start, end = int(start_sec * RATE), int(end_sec * RATE)
+    samples = np.full(int((end - start) * adaptive.WHISPER_RATE / RATE), index + 1, dtype=np.float32)
+    segment = Segment(index, start, end, np.zeros((0, 1), dtype=np.int16), RATE, 1, overlap=int(overlap_sec * RATE))
+    segment.samples = samples
+    return segment
+
+
+def test_merge_keeps_gap_between_segments_as_silence() -> None:
+    merged = adaptive.merge_segments(_segment(0, 1.0, 3.0), _segment(1, 4.5, 6.0))
+    assert merged.start == RATE and merged.end == 6 * RATE
+    assert merged.samples.size == int(5.0 * adaptive.WHISPER_RATE)
+    gap = merged.samples[2 * adaptive.WHISPER_RATE : int(3.5 * adaptive.WHISPER_RATE)]
+    assert not gap.any()
+    assert merged.samples[-1] == 2
+
+
+def test_merge_decodes_overlap_once() -> None:
+    merged = adaptive.merge_segments(_segment(0, 0.0, 3.0), _segment(1, 2.65, 5.0, overlap_sec=0.35))
+    assert merged.samples.size == 5 * adaptive.WHISPER_RATE
+    assert merged.index == 1
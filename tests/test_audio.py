@@ -0,0 +1,20 @@
+﻿from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.audio import StreamResampler, pcm16_to_float, resample
+
+
+@pytest.mark.parametrize(("rate", "channels"), [(44100, 2), (48000, 1), (8000, 1), (16000, 2)])
+def test_stream_resampler_matches_one_shot(rate: int, channels: int) -> None:
+    pcm = (np.random.default_rng(rate).standard_normal(rate * 2 * channels) * 3000).astype(np.int16)
+    expected = resample(pcm16_to_float(pcm, channels), rate)
+    resampler = StreamResampler(rate, channels)
+    parts = []
+    pos = 0
+    for size in [1, 7, 1000, 4096, 13, 60000] * 20:
+        parts.append(resampler.process(pcm[pos : pos + size * channels]))
+        pos += size * channels
+    parts.append(resampler.flush())
+    np.testing.assert_array_equal(np.concatenate(parts), expected)
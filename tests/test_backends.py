@@ -0,0 +1,141 @@
+﻿from __future__ import annotations
+
+import socket
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from conftest import write_wav
+from replay_vad import synthetic_long_speech
+from stubs import write_cli_stub
+
+from app import core
+from app.audio import WHISPER_RATE
+from app.backends import CliWhisperBackend, ServerWhisperBackend
+from app.core import RunOptions, start_backend
+from app.logsink import LOG_BACKUPS
+
+
+def _speech(seconds: float) -> np.ndarray:
+    return np.full(int(WHISPER_RATE * seconds), 0.1, dtype=np.float32)
+
+
+def test_server_backend_returns_text_and_word_timings(whisper_stub, model_path) -> None:
+    backend = ServerWhisperBackend(None, model_path, False, port=whisper_stub.port)
+    backend.start()
+    try:
+        result = backend.transcribe(_speech(2.0))
+    finally:
+        backend.close()
+    assert result.ok and result.returncode == 0
+    assert result.text.split() == [w.text for w in result.words]
+    assert len(result.words) == 5  # 2,5 mots/s dans le faux serveur
+    assert result.words[0].start == 0.0 and result.words[-1].end == pytest.approx(2.0, abs=0.05)
+    assert all(a.end <= b.start + 1e-6 for a, b in zip(result.words, result.words[1:]))
+    assert whisper_stub.requests == 2  # warm-up + decodage
+
+
+def test_server_backend_timeout_returns_failed_result(whisper_stub, model_path) -> None:
+    backend = ServerWhisperBackend(None, model_path, False, port=whisper_stub.port, timeout=0.2)
+    whisper_stub.base_sec = 1.0
+    started = time.perf_counter()
+    result = backend.transcribe(_speech(1.0))
+    assert time.perf_counter() - started < 0.9
+    assert not result.ok and result.timed_out
+    assert result.returncode == -1 and "timeout" in result.stderr
+
+
+def test_server_backend_reports_http_error(whisper_stub, model_path) -> None:
+    backend = ServerWhisperBackend(None, model_path, False, port=whisper_stub.port)
+    whisper_stub.fail_every = 1
+    result = backend.transcribe(_speech(1.0))
+    assert not result.ok and not result.timed_out and result.returncode == 500
+    assert "stub failure" in result.stderr
+
+
+def test_server_backend_start_fails_without_server(model_path) -> None:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    backend = ServerWhisperBackend(None, model_path, False, port=port, startup_timeout=0.3)
+    with pytest.raises(RuntimeError, match="ne repond pas"):
+        backend.start()
+
+
+def test_server_output_goes_to_capped_log(tmp_path: Path, model_path) -> None:
+    server = tmp_path / "whisper-server"
+    server.write_text(
+        '#!/bin/sh\ni=0\nwhile [ $i -lt 400 ]; do echo "whisper_print_timings: ligne $i"; i=$((i + 1)); done\nexit 3\n',
+        encoding="utf-8",
+    )
+    server.chmod(0o755)
+    log = tmp_path / "whisper_server.log"
+    backend = ServerWhisperBackend(server, model_path, False, log_path=log, log_max_bytes=1000, startup_timeout=5.0)
+    with pytest.raises(RuntimeError, match="code 3") as failure:
+        backend.start()
+    # Message d'echec: la fin de la sortie du serveur, pas tout le journal.
+    assert "ligne 399" in str(failure.value) and "ligne 0\n" not in str(failure.value)
+    logs = sorted(tmp_path.glob("whisper_server.log*"))
+    assert len(logs) == LOG_BACKUPS + 1
+    assert all(path.stat().st_size < 1100 for path in logs)
+    assert log.read_text(encoding="utf-8").splitlines()[-1] == "whisper_print_timings: ligne 399"
+
+
+def test_start_backend_falls_back_to_cli(cli_root, model_path) -> None:
+    events: list[tuple[str, str]] = []
+    options = RunOptions(mode="transcription", source="file", device_index=0, model_path=model_path, use_cuda=False)
+    backend = start_backend(cli_root, options, lambda kind, message: events.append((kind, message)))
+    assert isinstance(backend, CliWhisperBackend)
+    assert [kind for kind, _ in events] == ["status"]
+    assert "repli sur whisper-cli" in events[0][1]
+    result = backend.transcribe(_speech(1.2))
+    assert result.ok and result.text
+    assert result.words and result.words[-1].end <= 1.2
+
+
+def test_start_backend_reports_error_when_cli_missing(tmp_path: Path, model_path) -> None:
+    events: list[tuple[str, str]] = []
+    options = RunOptions(mode="transcription", source="file", device_index=0, model_path=model_path, use_cuda=False)
+    assert start_backend(tmp_path, options, lambda kind, message: events.append((kind, message))) is None
+    assert [kind for kind, _ in events] == ["status", "error"]
+
+
+def test_cli_backend_timeout_returns_failed_result(tmp_path: Path, model_path) -> None:
+    cli = write_cli_stub(tmp_path, 2.0, 0.0)
+    backend = CliWhisperBackend(cli, model_path, False, tmp_path / "work.wav", timeout=0.3)
+    result = backend.transcribe(_speech(0.5))
+    assert not result.ok and result.timed_out and result.returncode == -1
+
+
+def test_worker_counts_server_timeouts(tmp_path: Path, monkeypatch, whisper_stub, model_path) -> None:
+    # Le warm-up (0,5 s d'audio) passe sous le delai, les segments de parole non.
+    whisper_stub.base_sec = 0.0
+    whisper_stub.per_audio_sec = 0.5
+
+    def create_backend(root, options, work_file=None):
+        return ServerWhisperBackend(None, options.model_path, False, port=whisper_stub.port, timeout=0.5)
+
+    monkeypatch.setattr(core, "create_backend", create_backend)
+    rate = 16000
+    wav = write_wav(tmp_path / "parole.wav", synthetic_long_speech(rate, 8.0), rate)
+    options = RunOptions(
+        mode="transcription",
+        source="file",
+        device_index=0,
+        model_path=model_path,
+        use_cuda=False,
+        input_path=str(wav),
+        realtime=False,
+    )
+    events: list[tuple[str, str]] = []
+    worker = core.TranscriptionWorker(tmp_path, options, lambda kind, message: events.append((kind, message)))
+    worker.start()
+    worker.join(timeout=60)
+
+    assert not worker.is_alive()
+    counters = worker.metrics.counters
+    assert counters.get("whisper_timeouts_total", 0) == worker.segmenter.next_index >= 2
+    assert counters.get("whisper_failures_total", 0) == 0
+    assert ("error", "Whisper timeout") in events
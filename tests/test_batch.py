@@ -0,0 +1,63 @@
+﻿from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from replay_vad import synthetic_long_speech
+
+from app import batch
+
+
+def test_chunk_timeout_scales_with_length_and_rtf() -> None:
+    assert batch.chunk_timeout(2.0, 0.3) == batch.CHUNK_TIMEOUT_MIN_SEC
+    assert batch.chunk_timeout(28.0, 0.5) > 28.0 * 1.07
+    assert batch.chunk_timeout(28.0, 2.0) == pytest.approx(2 * batch.chunk_timeout(28.0, 1.0))
+    assert batch.chunk_timeout(28.0, 1.0, attempt=1) == pytest.approx(2 * batch.chunk_timeout(28.0, 1.0))
+
+
+def test_plan_chunks_skips_silence_and_bounds_length() -> None:
+    silence = np.zeros(batch.WHISPER_RATE * 10, dtype=np.int16)
+    speech = synthetic_long_speech(batch.WHISPER_RATE, 70.0).reshape(-1)
+    pcm = np.concatenate([silence, speech, silence])
+    chunks = batch.plan_chunks(pcm)
+    assert chunks[0].start_sec > 9.0
+    assert chunks[-1].end_sec < 82.0
+    assert all(c.end_sec - c.start_sec <= batch.TARGET_CHUNK_SEC for c in chunks)
+    # Coupes forcees sans recouvrement: chaque morceau reprend ou le precedent s'arrete.
+    assert all(a.end == b.start for a, b in zip(chunks, chunks[1:]))
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+
+
+def _chunks(count: int, seconds: float = 1.0) -> tuple[np.ndarray, list[batch.Chunk]]:
+    size = int(batch.WHISPER_RATE * seconds)
+    pcm = np.full(size * count, 1000, dtype=np.int16)
+    return pcm, [batch.Chunk(i, i * size, (i + 1) * size) for i in range(count)]
+
+
+def test_transcribe_chunk_measures_rtf(local_backend) -> None:
+    local_backend.per_audio_sec = 0.2
+    pcm, _ = _chunks(1)
+    result = batch.transcribe_chunk(0, pcm)
+    assert result.ok and result.text
+    assert batch._rtf >= 0.2
+    assert batch._backend.timeout == batch.CHUNK_TIMEOUT_MIN_SEC
+
+
+def test_failed_chunk_is_retried_once(tmp_path, local_backend) -> None:
+    local_backend.fail_every = 3  # 3e requete en echec: le morceau 2, reussi au second essai
+    pcm, chunks = _chunks(3)
+    results = batch.transcribe_chunks(tmp_path, None, pcm, chunks, workers=1)
+    assert [r.ok for r in results] == [True, True, True]
+    assert [r.attempts for r in results] == [1, 1, 2]
+    assert local_backend.requests == 4
+
+
+def test_chunk_failing_twice_is_reported(tmp_path, local_backend) -> None:
+    local_backend.fail_every = 1
+    pcm, chunks = _chunks(2)
+    reported = []
+    results = batch.transcribe_chunks(tmp_path, None, pcm, chunks, 1, lambda r, c: reported.append(r.index))
+    assert not any(r.ok for r in results)
+    assert [r.attempts for r in results] == [2, 2]
+    assert sorted(reported) == [0, 1]
+    assert local_backend.requests == 4
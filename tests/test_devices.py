@@ -0,0 +1,51 @@
+﻿from __future__ import annotations
+
+import time
+
+from app import devices
+from app.devices import DeviceInfo, DeviceMonitor
+
+
+def _wait(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_monitor_scans_only_on_signature_change_and_refresh(monkeypatch) -> None:
+    monkeypatch.setattr(devices, "WATCH_INTERVAL_SEC", 0.02)
+    signature = ["a"]
+    listed = [DeviceInfo(0, "mic", 1, 16000)]
+    scans: list[int] = []
+    changes: list[list[DeviceInfo]] = []
+
+    def scan() -> list[DeviceInfo]:
+        scans.append(1)
+        return list(listed)
+
+    monitor = DeviceMonitor(changes.append, list(listed), scan=scan, signature=lambda: signature[0])
+    monitor.start()
+    try:
+        time.sleep(0.2)
+        assert scans == []
+
+        listed.append(DeviceInfo(1, "headset", 1, 48000))
+        signature[0] = "b"
+        assert _wait(lambda: len(changes) == 1)
+        assert [d.name for d in changes[0]] == ["mic", "headset"]
+
+        monitor.set_active(False)
+        signature[0] = "c"
+        time.sleep(0.2)
+        assert len(scans) == 1
+
+        monitor.refresh()
+        assert _wait(lambda: len(scans) == 2)
+        assert len(changes) == 1
+    finally:
+        monitor.stop()
+        monitor.join(timeout=1)
+    assert not monitor.is_alive()
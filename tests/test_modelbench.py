@@ -0,0 +1,27 @@
+﻿from __future__ import annotations
+
+import numpy as np
+
+from app import core, modelbench
+
+
+def _options(model_path) -> core.RunOptions:
+    return core.RunOptions(mode="transcription", source="file", device_index=0, model_path=model_path, use_cuda=False)
+
+
+def _clip(seconds: float) -> np.ndarray:
+    return np.zeros(int(modelbench.WHISPER_RATE * seconds), dtype=np.float32)
+
+
+def test_benchmark_reports_fallback_backend(cli_root, model_path) -> None:
+    result = modelbench.benchmark_model(cli_root, _options(model_path), _clip(4.0), runs=1)
+    assert result.ok, result.error
+    assert result.backend == "cli"
+
+
+def test_benchmark_fails_on_segment_decode_error(stub_backend, model_path, tmp_path) -> None:
+    # Requetes: warm-up, extrait entier, puis le premier segment en echec.
+    stub_backend.fail_every = 3
+    result = modelbench.benchmark_model(tmp_path, _options(model_path), _clip(7.0), runs=1)
+    assert not result.ok
+    assert "stub failure" in result.error
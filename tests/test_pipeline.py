@@ -0,0 +1,35 @@
+﻿from __future__ import annotations
+
+import threading
+
+from app.pipeline import STOP, BoundedQueue
+
+
+def _fill(q: BoundedQueue) -> None:
+    for i in range(q.maxsize):
+        assert q.put_nowait(i)
+
+
+def test_put_stop_waits_for_room_at_end_of_stream() -> None:
+    q = BoundedQueue("test", 3)
+    _fill(q)
+    stop_event = threading.Event()
+    sender = threading.Thread(target=q.put_stop, args=(stop_event,))
+    sender.start()
+    sender.join(timeout=0.3)
+    assert sender.is_alive()
+
+    received = [q.get(timeout=1) for _ in range(4)]
+    sender.join(timeout=1)
+    assert received == [0, 1, 2, STOP]
+
+
+def test_put_stop_evicts_only_when_stopping() -> None:
+    q = BoundedQueue("test", 3)
+    _fill(q)
+    stop_event = threading.Event()
+    stop_event.set()
+    q.put_stop(stop_event)
+    received = [q.get(timeout=1) for _ in range(q.qsize())]
+    assert received[-1] is STOP
+    assert len(received) == 3
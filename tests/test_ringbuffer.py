@@ -0,0 +1,35 @@
+﻿from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.ringbuffer import PcmRingBuffer
+
+
+def _ramp(start: int, count: int, channels: int = 1) -> np.ndarray:
+    return np.repeat(np.arange(start, start + count, dtype=np.int16), channels).reshape(-1, channels)
+
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_oversized_block_advances_by_its_full_length(shared: bool) -> None:
+    ring = PcmRingBuffer(100, 2, shared=shared)
+    try:
+        ring.write(_ramp(0, 30, 2))
+        ring.write(_ramp(30, 250, 2))
+        assert ring.written == 280
+        assert ring.oldest == 180
+        assert np.array_equal(ring.view(180, 280), _ramp(180, 100, 2))
+        ring.write(_ramp(280, 10, 2))
+        assert np.array_equal(ring.view(190, 290), _ramp(190, 100, 2))
+    finally:
+        ring.close()
+
+
+def test_view_outside_window_is_rejected() -> None:
+    ring = PcmRingBuffer(100, 1)
+    ring.write(_ramp(0, 150))
+    with pytest.raises(IndexError):
+        ring.view(40, 60)
+    with pytest.raises(ValueError):
+        ring.view(0, 150)
+    assert np.array_equal(ring.view(50, 150), _ramp(50, 100))
@@ -0,0 +1,97 @@
+﻿from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from replay_vad import synthetic_long_speech
+
+from app import core, server
+from app.backends import ServerWhisperBackend
+
+
+RATE = 48000
+
+
+async def _with_server(root: Path, client) -> object:
+    options = core.RunOptions(
+        mode="transcription", source="stdin", device_index=0, model_path=root / "ggml-test.bin", use_cuda=False
+    )
+    vox = server.VoxServer(root, options, server.parse_args(["--port", "0", "--backends", "1"]))
+    listener = await vox.start()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", vox.port)
+        try:
+            return await client(reader, writer)
+        finally:
+            writer.close()
+    finally:
+        listener.close()
+        vox.close()
+
+
+@pytest.fixture
+def run_session(tmp_path: Path, stub_backend):
+    return lambda client: asyncio.run(_with_server(tmp_path, client))
+
+
+async def _events(reader: asyncio.StreamReader) -> list[dict]:
+    return [json.loads(line) async for line in reader]
+
+
+@pytest.mark.parametrize("line", [b"[]\n", b'"x"\n', b'{"rate": [48000]}\n', b"{nope\n"])
+def test_invalid_header_gets_protocol_error(run_session, line: bytes) -> None:
+    async def client(reader, writer):
+        writer.write(line)
+        return await _events(reader)
+
+    events = run_session(client)
+    assert len(events) == 1
+    assert events[0]["kind"] == "error"
+    assert events[0]["text"].startswith("En-tete invalide")
+
+
+def test_session_transcribes_resampled_audio(run_session) -> None:
+    pcm = synthetic_long_speech(RATE, 12.0).reshape(-1, 1)
+
+    async def client(reader, writer):
+        writer.write((json.dumps({"rate": RATE, "channels": 1, "name": "test"}) + "\n").encode("utf-8"))
+        writer.write(pcm.astype(np.int16).tobytes())
+        writer.write_eof()
+        return await _events(reader)
+
+    events = run_session(client)
+    texts = [e for e in events if e["kind"] == "transcription"]
+    end = events[-1]
+    assert end["kind"] == "end"
+    assert texts and all(e["text"] for e in texts)
+    assert end["segments"] >= 3
+    assert end["whisper_failures"] == 0 and end["dropped_segments"] == 0
+
+
+def test_session_reports_whisper_timeouts(run_session, monkeypatch, stub_backend) -> None:
+    # Le warm-up (0,5 s d'audio) passe sous le delai, les segments de parole non.
+    stub_backend.base_sec = 0.0
+    stub_backend.per_audio_sec = 0.5
+
+    def create_backend(root, options, work_file=None):
+        return ServerWhisperBackend(None, options.model_path, False, port=stub_backend.port, timeout=0.5)
+
+    monkeypatch.setattr(core, "create_backend", create_backend)
+    pcm = synthetic_long_speech(RATE, 8.0).reshape(-1, 1)
+
+    async def client(reader, writer):
+        writer.write((json.dumps({"rate": RATE, "channels": 1, "name": "test"}) + "\n").encode("utf-8"))
+        writer.write(pcm.astype(np.int16).tobytes())
+        writer.write_eof()
+        return await _events(reader)
+
+    events = run_session(client)
+    errors = [e["text"] for e in events if e["kind"] == "error"]
+    end = events[-1]
+    assert end["kind"] == "end" and end["segments"] >= 2
+    assert errors == ["Whisper timeout"] * end["segments"]
+    assert not [e for e in events if e["kind"] == "transcription"]
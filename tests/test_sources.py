@@ -0,0 +1,59 @@
+﻿from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+from conftest import write_wav
+from replay_vad import synthetic_long_speech
+
+from app import core
+from app.ringbuffer import PcmRingBuffer
+from app.sources import END_PADDING_SEC, MonitorSource
+
+
+def test_fast_file_transcribes_every_segment(tmp_path: Path, monkeypatch, stub_backend, model_path) -> None:
+    # Tampon court: la lecture --fast le remplirait plusieurs fois pendant que whisper decode.
+    monkeypatch.setattr(core, "RING_BUFFER_SEC", 12.0)
+    stub_backend.base_sec = 0.1
+    rate = 16000
+    wav = write_wav(tmp_path / "long.wav", synthetic_long_speech(rate, 90.0), rate)
+    options = core.RunOptions(
+        mode="transcription",
+        source="file",
+        device_index=0,
+        model_path=model_path,
+        use_cuda=False,
+        input_path=str(wav),
+        realtime=False,
+    )
+    events: list[tuple[str, str]] = []
+    worker = core.TranscriptionWorker(tmp_path, options, lambda kind, message: events.append((kind, message)))
+    worker.start()
+    worker.join(timeout=120)
+
+    assert not worker.is_alive()
+    assert ("status", "Fin de la source audio: pipeline vide") in events
+    assert worker.segmenter.next_index > 20
+    assert worker.capture_stats.stale_segments == 0
+    assert worker.capture_stats.dropped_frames == 0
+    # Chaque segment ferme est decode une fois (le warm-up du serveur n'est pas compte).
+    assert worker.metrics.histogram("whisper_seconds").count == worker.segmenter.next_index
+
+
+def test_monitor_source_overwrites_ring_instead_of_waiting(monkeypatch) -> None:
+    source = MonitorSource()
+    frames = 48000
+    script = f"import sys; sys.stdout.buffer.write(bytes({2 * frames}))"
+    monkeypatch.setattr(source, "build_command", lambda: [sys.executable, "-c", script])
+    source.open()
+    ring = PcmRingBuffer(16000, source.channels)
+    # Pipeline bloque: une source finie attendrait, le direct continue de lire le tube.
+    source.start(ring, lambda: False)
+    deadline = time.monotonic() + 10
+    while source.is_active() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    source.close()
+    assert source.frames_read == frames
+    assert ring.written == frames + int(source.rate * END_PADDING_SEC)
+    assert ring.oldest > 0
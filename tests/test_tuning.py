@@ -0,0 +1,16 @@
+﻿from __future__ import annotations
+
+import numpy as np
+
+from app import tuning
+from app.core import RunOptions
+
+
+def test_measure_survives_server_to_cli_fallback(cli_root, model_path) -> None:
+    options = RunOptions(
+        mode="transcription", source="file", device_index=0, model_path=model_path, use_cuda=False, threads=1
+    )
+    pieces = [np.zeros(tuning.WHISPER_RATE, dtype=np.float32)]
+    result = tuning.measure(cli_root, options, pieces, slots=1, pin=False, duration=0.5)
+    assert result.ok, result.error
+    assert result.decodes >= 1 and result.throughput > 0
@@ -0,0 +1,81 @@
+﻿"""Rejoue les fixtures WAV de ``bench/replay_vad.py`` dans la segmentation + VAD."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from conftest import write_wav
+from replay_vad import CHUNK, read_wav, synthetic_fixture, synthetic_long_speech
+
+from app.ringbuffer import PcmRingBuffer
+from app.segmenter import MAX_SEGMENT_SEC, TRAILING_SILENCE_SEC, Segmenter
+from app.vad import PREROLL_SEC, create_vad
+
+RATE = 48000
+BURSTS = [1.0, 5.0, 9.0, 13.0, 17.0]  # rafales de parole de 1.5 s
+CLICKS = [3.0, 7.0, 11.0, 15.0]  # clics de 50 ms entre les rafales
+BURST_SEC = 1.5
+
+
+def _replay(path: Path, vad_name: str) -> tuple[list[tuple[float, float]], Segmenter]:
+    pcm, rate, channels = read_wav(path)
+    ring = PcmRingBuffer(rate * 60, channels)
+    segmenter = Segmenter(ring, rate, CHUNK, create_vad(vad_name, rate))
+    segments = []
+    for start in range(0, pcm.shape[0] - CHUNK + 1, CHUNK):
+        ring.write(pcm[start : start + CHUNK])
+        segment = segmenter.feed(ring.written - CHUNK, ring.written)
+        if segment is not None:
+            segments.append(segment)
+    last = segmenter.finish()
+    if last is not None:
+        segments.append(last)
+    return [(s.start / rate, s.end / rate) for s in segments], segmenter
+
+
+@pytest.fixture
+def bursts_wav(tmp_path: Path) -> Path:
+    return write_wav(tmp_path / "rafales.wav", synthetic_fixture(RATE), RATE)
+
+
+@pytest.fixture
+def speech_wav(tmp_path: Path) -> Path:
+    return write_wav(tmp_path / "parole-continue.wav", synthetic_long_speech(RATE), RATE)
+
+
+def test_energy_vad_keeps_one_segment_per_burst(bursts_wav: Path) -> None:
+    bounds, segmenter = _replay(bursts_wav, "energy")
+    assert len(bounds) == len(BURSTS)
+    for (start, end), burst in zip(bounds, BURSTS):
+        assert burst - 1.0 <= start <= burst - PREROLL_SEC + 0.05
+        assert burst + BURST_SEC <= end <= burst + BURST_SEC + TRAILING_SILENCE_SEC + 0.05
+    # Aucun segment ne va jusqu'au clic suivant.
+    assert all(not start <= click <= end for start, end in bounds for click in CLICKS)
+    assert segmenter.stats.forced_cuts == 0
+
+
+def test_energy_vad_rejects_every_click(bursts_wav: Path) -> None:
+    _, segmenter = _replay(bursts_wav, "energy")
+    assert segmenter.vad.rejected_segments == len(CLICKS)
+
+
+def test_peak_vad_triggers_on_background_noise(bursts_wav: Path) -> None:
+    bounds, segmenter = _replay(bursts_wav, "peak")
+    # Le seuil de crete est sous le bruit de fond: tout l'enregistrement part au decodage.
+    assert segmenter.vad.rejected_segments == 0
+    assert bounds[0][0] == 0.0 and bounds[-1][1] == pytest.approx(20.0, abs=0.05)
+    assert segmenter.stats.forced_cuts >= len(bounds) - 1
+    _, energy = _replay(bursts_wav, "energy")
+    assert energy.stats.decoded_frames < segmenter.stats.decoded_frames / 2
+
+
+def test_continuous_speech_is_cut_without_gaps(speech_wav: Path) -> None:
+    bounds, segmenter = _replay(speech_wav, "energy")
+    assert bounds[0][0] == 0.0 and bounds[-1][1] == pytest.approx(20.0, abs=0.05)
+    assert all(first[1] == second[0] for first, second in zip(bounds, bounds[1:]))
+    assert max(end - start for start, end in bounds) <= MAX_SEGMENT_SEC
+    # Les coupes forcees tombent dans les pauses de 150 ms: pas de recouvrement a decoder deux fois.
+    assert segmenter.stats.pause_cuts == segmenter.stats.forced_cuts >= 1
+    assert segmenter.stats.overlap_frames == 0
+    assert segmenter.vad.rejected_segments == 0
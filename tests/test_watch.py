@@ -0,0 +1,99 @@
+﻿from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+
+from conftest import write_wav
+from replay_vad import synthetic_long_speech
+
+from app import core, watch
+
+
+RATE = 16000
+
+
+def test_store_requeues_replaced_file(tmp_path: Path) -> None:
+    store = watch.JobStore(tmp_path / "jobs.sqlite3")
+    path = tmp_path / "a.wav"
+    assert store.add(path, 100, 1.0)
+    first = store.jobs()[0]
+    store.add_chunks(first.id, [watch.Chunk(0, 0, 10)], 1.0)
+    store.set_job(first.id, status="done")
+    assert not store.add(path, 100, 1.0)
+    assert store.add(path, 200, 2.0)
+    jobs = store.jobs()
+    assert len(jobs) == 1 and jobs[0].id != first.id
+    assert jobs[0].status == "pending" and jobs[0].chunks_total == 0
+    assert store.chunks(first.id) == []
+    assert not store.fail_chunk(first.id, 0, "resultat perime", 3)
+    store.close()
+
+
+class ManualTranslator:
+    """Traductions retenues jusqu'a ``release``: la boucle du service ne doit pas les attendre."""
+
+    def __init__(self) -> None:
+        self.pending: list[tuple[str, Future]] = []
+        self.submitted = threading.Event()
+        self.released = False
+        self.lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        with self.lock:
+            if self.released:
+                future.set_result(f"FR {text}")
+            else:
+                self.pending.append((text, future))
+        self.submitted.set()
+        return future
+
+    def release(self) -> None:
+        with self.lock:
+            self.released = True
+            for text, future in self.pending:
+                future.set_result(f"FR {text}")
+
+
+def test_watch_outputs_keep_source_extension(tmp_path: Path, local_backend, model_path) -> None:
+    directory = tmp_path / "in"
+    directory.mkdir()
+    write_wav(directory / "a.wav", synthetic_long_speech(RATE, 6.0, seed=1), RATE)
+    write_wav(directory / "a.WAV", synthetic_long_speech(RATE, 9.0, seed=2), RATE)
+    args = watch.parse_args([str(directory), "--once", "--scan-sec", "0.05", "--formats", "srt,json"])
+    args.workers, args.pin = 1, False
+    options = core.RunOptions(
+        mode="transcription", source="file", device_index=0, model_path=model_path, use_cuda=False
+    )
+    translator = ManualTranslator()
+    services: list[watch.WatchService] = []
+
+    def run() -> None:
+        # SQLite: la base est ouverte dans le thread du service.
+        store = watch.JobStore(directory / watch.DB_FILENAME)
+        output_dir = directory / "transcripts"
+        services.append(watch.WatchService(directory, output_dir, store, tmp_path, options, args, translator))
+        try:
+            services[0].run()
+        finally:
+            store.close()
+
+    runner = threading.Thread(target=run, daemon=True)
+    runner.start()
+
+    assert translator.submitted.wait(30)
+    service = services[0]
+    # La boucle continue (scrutation, autre fichier) pendant que les traductions sont en attente.
+    scans = service._scans
+    runner.join(timeout=1.0)
+    assert runner.is_alive() and service._scans > scans
+    translator.release()
+    runner.join(timeout=30)
+    assert not runner.is_alive()
+
+    outputs = sorted(p.name for p in (directory / "transcripts").iterdir())
+    assert outputs == ["a.WAV.json", "a.WAV.srt", "a.wav.json", "a.wav.srt"]
+    assert "FR " in (directory / "transcripts" / "a.wav.srt").read_text(encoding="utf-8")